@@ -1,21 +1,24 @@
-from flask import Flask
-from pymongo import MongoClient
+from flask import Flask, request
 import os
 from dotenv import load_dotenv
 from app.config import SMTP_SERVER, SMTP_PORT, SMTP_USERNAME, SMTP_PASSWORD, JWT_SECRET_KEY
 
 load_dotenv()  # Load environment variables from .env file
 
+# Structured, non-blocking logging for everything under the 'app' package
+from app.functions.app_logging import configure_logging, get_logger, set_request_id, get_request_id
+configure_logging()
+logger = get_logger(__name__)
+
 app = Flask(__name__)
 
-# MongoDB Atlas setup
-MONGODB_URI = os.getenv('MONGODB_URI')
+# MongoDB Atlas setup; the client itself lives in app.database so modules that
+# need a collection can be imported without this startup code
+from app.database import client, db
 
 try:
-    client = MongoClient(MONGODB_URI)
     client.admin.command('ping')
-    print("Successfully connected to MongoDB!")
-    db = client['user_auth_db']  # You can change the database name
+    logger.info("Successfully connected to MongoDB")
     users_collection = db['users']
     tokens_collection = db['tokens']
     user_preferences_collection = db['user_preferences']
@@ -24,7 +27,7 @@ try:
     cart_items_collection = db['cart_items']
     orders_collection = db['orders']
 except Exception as e:
-    print(f"Error connecting to MongoDB Atlas: {e}")
+    logger.error("Error connecting to MongoDB Atlas: %s", e)
     raise
 
 # Import routes
@@ -36,6 +39,7 @@ from app.routes.saved_recipe_routes import saved_recipe_routes
 # Import new route blueprints
 from app.routes.cart_routes import cart_routes
 from app.routes.order_routes import order_routes
+from app.routes.metrics_routes import metrics_routes
 
 # Register blueprints
 app.register_blueprint(auth_routes)
@@ -46,6 +50,42 @@ app.register_blueprint(saved_recipe_routes)
 # Register new blueprints
 app.register_blueprint(cart_routes)
 app.register_blueprint(order_routes)
+app.register_blueprint(metrics_routes)
+
+# Upstream rate limits and outages become 503 responses with Retry-After
+from app.functions.upstream_errors import UpstreamUnavailable, upstream_unavailable_response
+app.register_error_handler(UpstreamUnavailable, upstream_unavailable_response)
+
+# Tag every log line with the request it belongs to, reusing the caller's X-Request-ID
+@app.before_request
+def _assign_request_id():
+    set_request_id(request.headers.get('X-Request-ID'))
+
+# Worker threads are reused across requests, so start each one unattributed;
+# token_required then charges outbound calls to the signed-in user
+from app.functions.rate_limiter import set_upstream_user
+
+@app.before_request
+def _reset_upstream_user():
+    set_upstream_user(None)
+
+@app.after_request
+def _echo_request_id(response):
+    response.headers['X-Request-ID'] = get_request_id()
+    return response
 
 # Set JWT secret key
-app.config['JWT_SECRET_KEY'] = JWT_SECRET_KEY
\ No newline at end of file
+app.config['JWT_SECRET_KEY'] = JWT_SECRET_KEY
+
+# Create the cache and cart indexes (the models only define them)
+from app.models import cart_model, ingredient_mapping_model, product_cache_model, recipe_cache_model
+for model in (cart_model, ingredient_mapping_model, product_cache_model, recipe_cache_model):
+    model.create_indexes()
+
+# Keep carted product prices current in the background
+from app.functions.cart_price_refresher import start_cart_price_refresher
+start_cart_price_refresher()
+
+# Build the product autocomplete index from the cached catalog
+from app.functions.product_autocomplete import seed_autocomplete_index
+seed_autocomplete_index()
\ No newline at end of file
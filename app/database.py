@@ -0,0 +1,12 @@
+import os
+from pymongo import MongoClient
+from dotenv import load_dotenv
+
+load_dotenv()  # Load environment variables from .env file
+
+# MongoDB Atlas setup. MongoClient connects lazily, so importing this module does no
+# I/O; app/__init__.py checks the connection and creates the indexes at startup.
+MONGODB_URI = os.getenv('MONGODB_URI')
+
+client = MongoClient(MONGODB_URI)
+db = client['user_auth_db']  # You can change the database name
\ No newline at end of file
@@ -0,0 +1,220 @@
+import os
+from app.functions.ingredient_normalizer import normalize_ingredient, singularize
+from app.functions.preference_options import ALLOWED_INTOLERANCES
+
+# Allergen screening of recipe ingredients.
+#
+# Each intolerance a user can select (ALLOWED_INTOLERANCES) maps to the ingredient
+# words and phrases that contain it, so "dairy" catches "cheddar cheese" and
+# "heavy cream". Ingredient names are normalized with normalize_ingredient() and
+# matched on whole tokens, so "eggplant" never matches "egg" and "nutmeg" never
+# matches "nut". Exclusion phrases clear an allergen for ingredients that only look
+# like it ("peanut butter" is not dairy, "almond flour" is not wheat).
+#
+# Intolerances are bits of an int mask: an ingredient's mask is computed once and
+# memoized, a recipe's mask is the OR of its ingredients', and screening a recipe
+# is a single AND against the user's mask. The tables are plain data so they can
+# be extended without touching code.
+
+_WHEAT_TERMS = (
+    'wheat', 'flour', 'bread', 'breadcrumb', 'panko', 'crouton', 'pasta', 'spaghetti',
+    'linguine', 'fettuccine', 'penne', 'macaroni', 'lasagna', 'noodle', 'noodles', 'couscous',
+    'semolina', 'durum', 'farina', 'bulgur', 'farro', 'spelt', 'seitan', 'tortilla',
+    'pita', 'bagel', 'baguette', 'croissant', 'cracker', 'biscuit', 'pastry', 'phyllo',
+    'filo', 'orzo', 'gnocchi', 'ramen', 'udon', 'soy sauce', 'teriyaki sauce'
+)
+
+_SHELLFISH_TERMS = (
+    'shellfish', 'shrimp', 'prawn', 'crab', 'lobster', 'crawfish', 'crayfish', 'langoustine',
+    'clam', 'mussel', 'oyster', 'scallop', 'cockle', 'squid', 'calamari', 'octopus'
+)
+
+# Intolerance -> ingredient words and phrases that contain it
+ALLERGEN_SYNONYMS = {
+    'dairy': (
+        'dairy', 'milk', 'cream', 'butter', 'buttermilk', 'cheese', 'cheddar', 'mozzarella',
+        'parmesan', 'parmigiano', 'pecorino', 'ricotta', 'feta', 'brie', 'camembert', 'gouda',
+        'gruyere', 'provolone', 'mascarpone', 'asiago', 'colby', 'monterey jack', 'queso',
+        'cotija', 'paneer', 'halloumi', 'burrata', 'yogurt', 'yoghurt', 'kefir', 'whey',
+        'casein', 'ghee', 'custard', 'half half', 'creme fraiche', 'gelato'
+    ),
+    'egg': (
+        'egg', 'yolk', 'egg white', 'mayonnaise', 'mayo', 'aioli', 'meringue', 'eggnog'
+    ),
+    'gluten': _WHEAT_TERMS + (
+        'gluten', 'barley', 'rye', 'malt', 'triticale', 'pumpernickel', 'beer', 'lager', 'stout'
+    ),
+    'peanut': (
+        'peanut', 'groundnut', 'goober'
+    ),
+    'sesame': (
+        'sesame', 'tahini', 'benne', 'hummus', 'halva', 'gomasio', 'zaatar'
+    ),
+    'seafood': _SHELLFISH_TERMS + (
+        'seafood', 'fish', 'salmon', 'tuna', 'cod', 'haddock', 'halibut', 'tilapia', 'trout',
+        'mackerel', 'sardine', 'anchovy', 'herring', 'snapper', 'bass', 'swordfish', 'mahi',
+        'catfish', 'pollock', 'sole', 'flounder', 'roe', 'caviar', 'bonito', 'surimi',
+        'worcestershire'  # made with anchovies
+    ),
+    'shellfish': _SHELLFISH_TERMS,
+    'soy': (
+        'soy', 'soya', 'soybean', 'tofu', 'edamame', 'tempeh', 'miso', 'tamari', 'natto'
+    ),
+    'tree nut': (
+        'tree nut', 'nut', 'almond', 'walnut', 'pecan', 'cashew', 'pistachio', 'hazelnut',
+        'filbert', 'macadamia', 'brazil nut', 'chestnut', 'pine nut', 'pignoli', 'praline',
+        'marzipan', 'nutella', 'pesto', 'gianduja', 'amaretto'
+    ),
+    'wheat': _WHEAT_TERMS
+}
+
+# Phrases that clear an intolerance for the whole ingredient they appear in
+ALLERGEN_EXCLUSIONS = {
+    'dairy': (
+        'dairy free', 'non dairy', 'vegan', 'coconut milk', 'coconut cream', 'almond milk',
+        'oat milk', 'soy milk', 'rice milk', 'cashew milk', 'peanut butter', 'almond butter',
+        'cashew butter', 'nut butter', 'sunflower butter', 'apple butter', 'cocoa butter',
+        'shea butter', 'cream tartar', 'butter bean', 'butter lettuce'
+    ),
+    'egg': (
+        'egg free', 'vegan', 'egg replacer'
+    ),
+    'gluten': (
+        'gluten free', 'rice flour', 'almond flour', 'coconut flour', 'corn flour', 'oat flour',
+        'chickpea flour', 'tapioca flour', 'potato flour', 'cassava flour', 'buckwheat flour',
+        'corn tortilla', 'rice noodle', 'rice noodles', 'rice pasta', 'glass noodle',
+        'glass noodles', 'rice paper', 'root beer', 'ginger beer'
+    ),
+    'peanut': (),
+    'sesame': (),
+    'seafood': (
+        'oyster mushroom', 'fish free', 'crab apple', 'vegan worcestershire'
+    ),
+    'shellfish': (
+        'oyster mushroom', 'crab apple'
+    ),
+    'soy': (
+        'soy free',
+    ),
+    'tree nut': (
+        'nut free', 'water chestnut'
+    ),
+    'wheat': (
+        'wheat free', 'gluten free', 'buckwheat', 'rice flour', 'almond flour', 'coconut flour',
+        'corn flour', 'oat flour', 'chickpea flour', 'tapioca flour', 'potato flour',
+        'cassava flour', 'corn tortilla', 'rice noodle', 'rice noodles', 'rice pasta',
+        'glass noodle', 'glass noodles', 'rice paper'
+    )
+}
+
+# Bit of each intolerance in an allergen mask, in a stable order
+ALLERGEN_BITS = {intolerance: 1 << bit for bit, intolerance in enumerate(sorted(ALLOWED_INTOLERANCES))}
+
+# Distinct ingredient names whose masks are kept; the memo is reset when it fills up
+ALLERGEN_MEMO_SIZE = int(os.getenv('ALLERGEN_MEMO_SIZE', 16384))
+_ingredient_masks = {}
+
+
+def _tokens(text):
+    return tuple(singularize(token) for token in normalize_ingredient(text).split())
+
+
+def _phrase_table(phrases_by_intolerance):
+    """Map each phrase's first token to [(phrase tokens, mask)], longest phrase first."""
+    table = {}
+    for intolerance, phrases in phrases_by_intolerance.items():
+        bit = ALLERGEN_BITS[intolerance]
+        for phrase in phrases:
+            tokens = _tokens(phrase)
+            if tokens:
+                table.setdefault(tokens[0], {}).setdefault(tokens, 0)
+                table[tokens[0]][tokens] |= bit
+    return {first: sorted(entries.items(), key=lambda entry: -len(entry[0]))
+            for first, entries in table.items()}
+
+
+_SYNONYMS = _phrase_table(ALLERGEN_SYNONYMS)
+_EXCLUSIONS = _phrase_table(ALLERGEN_EXCLUSIONS)
+
+
+def _match(table, tokens):
+    mask = 0
+    for position, token in enumerate(tokens):
+        for phrase, bits in table.get(token, ()):
+            if tokens[position:position + len(phrase)] == phrase:
+                mask |= bits
+    return mask
+
+
+def ingredient_allergens(ingredient_name):
+    """Return the allergen mask of one ingredient name."""
+    mask = _ingredient_masks.get(ingredient_name)
+    if mask is None:
+        if len(_ingredient_masks) >= ALLERGEN_MEMO_SIZE:
+            _ingredient_masks.clear()
+        tokens = _tokens(ingredient_name)
+        mask = _match(_SYNONYMS, tokens) & ~_match(_EXCLUSIONS, tokens)
+        _ingredient_masks[ingredient_name] = mask
+    return mask
+
+
+def allergen_mask(intolerances):
+    """Compile a user's intolerances into a mask; unknown names are ignored."""
+    mask = 0
+    for intolerance in intolerances:
+        mask |= ALLERGEN_BITS.get(intolerance.strip().lower(), 0)
+    return mask
+
+
+def recipe_allergens(recipe):
+    """Return the allergen mask of a recipe's extendedIngredients."""
+    mask = 0
+    for ingredient in recipe.get('extendedIngredients') or ():
+        name = ingredient.get('name')
+        if name:
+            mask |= ingredient_allergens(name)
+    return mask
+
+
+def screen_recipes(recipes, intolerances):
+    """
+    Check a batch of recipes against a user's intolerances in one pass.
+
+    Args:
+        recipes (list): Spoonacular recipe documents
+        intolerances (list): The user's intolerances, e.g. ['dairy', 'tree nut']
+
+    Returns:
+        list: True for each recipe that is safe to serve, in order
+    """
+    mask = allergen_mask(intolerances)
+    if not mask:
+        return [True] * len(recipes)
+
+    results = []
+    memo = _ingredient_masks
+    for recipe in recipes:
+        safe = True
+        for ingredient in recipe.get('extendedIngredients') or ():
+            name = ingredient.get('name')
+            if not name:
+                continue
+            ingredient_mask = memo.get(name)
+            if ingredient_mask is None:
+                ingredient_mask = ingredient_allergens(name)
+            if ingredient_mask & mask:
+                safe = False
+                break
+        results.append(safe)
+    return results
+
+
+def allergen_index_stats():
+    """Return index and ingredient memo sizes for the metrics endpoint."""
+    return {
+        'intolerances': len(ALLERGEN_BITS),
+        'synonyms': sum(len(phrases) for phrases in ALLERGEN_SYNONYMS.values()),
+        'exclusions': sum(len(phrases) for phrases in ALLERGEN_EXCLUSIONS.values()),
+        'ingredients_memoized': len(_ingredient_masks),
+        'memo_size': ALLERGEN_MEMO_SIZE
+    }
\ No newline at end of file
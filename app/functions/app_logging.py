@@ -0,0 +1,169 @@
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import queue
+import random
+import atexit
+import logging
+import threading
+import contextvars
+from logging.handlers import QueueHandler, QueueListener
+
+# Application logging.
+#
+# Log calls on request threads only format the record and put it on a bounded
+# in-memory queue; a single listener thread writes it out, and records are dropped
+# (and counted) rather than blocking when the queue is full. Every record carries the
+# id of the request it was logged for. Levels are set per module with LOG_LEVELS, e.g.
+#   LOG_LEVEL=INFO LOG_LEVELS=app.functions.kroger_functions=DEBUG,app.functions.product_cache=WARNING
+# Upstream payloads are only logged through log_payload(), which samples and truncates them.
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_LEVELS = os.getenv('LOG_LEVELS', '')
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json').lower()  # 'json' or 'text'
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv('LOG_PAYLOAD_SAMPLE_RATE', 0.01))
+LOG_PAYLOAD_MAX_BYTES = int(os.getenv('LOG_PAYLOAD_MAX_BYTES', 2048))
+
+# JSON fields whose values never belong in a log line, whichever call they come from
+_SECRET_FIELD_RE = re.compile(
+    r'("(?:access_token|refresh_token|id_token|client_secret|password|apiKey|api_key)"\s*:\s*)"[^"]*"?',
+    re.IGNORECASE
+)
+
+_request_id = contextvars.ContextVar('request_id', default='-')
+_listener = None
+_handler = None
+_configure_lock = threading.Lock()
+
+
+def get_request_id():
+    """Return the id of the request being handled, or '-' outside a request."""
+    return _request_id.get()
+
+
+def set_request_id(request_id=None):
+    """Set the id log records of the current request are tagged with, generating one if needed."""
+    request_id = (request_id or '')[:64] or uuid.uuid4().hex
+    _request_id.set(request_id)
+    return request_id
+
+
+class _RequestIdFilter(logging.Filter):
+    def filter(self, record):
+        record.request_id = _request_id.get()
+        return True
+
+
+class _JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f'.{int(record.msecs):03d}Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'request_id': getattr(record, 'request_id', '-'),
+            'message': record.getMessage()
+        }
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking or raising when the queue is full."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _parse_levels(spec):
+    levels = {}
+    for part in spec.split(','):
+        name, _, level = part.partition('=')
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging(stream=None):
+    """
+    Route the 'app' logger hierarchy through the non-blocking queue handler.
+
+    Safe to call more than once; only the first call installs the handler.
+    """
+    global _listener, _handler
+    with _configure_lock:
+        if _handler is not None:
+            return
+
+        output = logging.StreamHandler(stream or sys.stderr)
+        if LOG_FORMAT == 'json':
+            output.setFormatter(_JsonFormatter())
+        else:
+            output.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s'))
+
+        _handler = _DroppingQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+        _handler.addFilter(_RequestIdFilter())
+        _listener = QueueListener(_handler.queue, output, respect_handler_level=False)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+        app_logger = logging.getLogger('app')
+        app_logger.setLevel(LOG_LEVEL)
+        app_logger.addHandler(_handler)
+        app_logger.propagate = False
+        for name, level in _parse_levels(LOG_LEVELS).items():
+            logging.getLogger(name).setLevel(level)
+
+
+def get_logger(name):
+    """Return the logger for a module (pass __name__)."""
+    return logging.getLogger(name)
+
+
+def log_payload(logger, message, payload, level=logging.DEBUG):
+    """
+    Log an upstream payload for a sampled fraction of calls, truncated to LOG_PAYLOAD_MAX_BYTES.
+
+    payload may be raw response bytes, text or a JSON-serializable object; nothing is
+    decoded or serialized unless the level is enabled and the call is sampled.
+    """
+    if not logger.isEnabledFor(level) or random.random() >= LOG_PAYLOAD_SAMPLE_RATE:
+        return
+    if isinstance(payload, bytes):
+        text = payload[:LOG_PAYLOAD_MAX_BYTES + 1].decode('utf-8', errors='replace')
+        size = len(payload)
+    elif isinstance(payload, str):
+        text, size = payload, len(payload)
+    else:
+        text = json.dumps(payload, separators=(',', ':'), default=str)
+        size = len(text)
+    # Redact before truncating so a secret cut off at the size cap is still caught
+    text = _SECRET_FIELD_RE.sub(r'\1"[REDACTED]"', text)
+    if size > LOG_PAYLOAD_MAX_BYTES:
+        text = f'{text[:LOG_PAYLOAD_MAX_BYTES]}... ({size} bytes)'
+    logger.log(level, '%s: %s', message, text)
+
+
+def logging_stats():
+    """Return queue depth and dropped-record counters for the metrics endpoint."""
+    if _handler is None:
+        return {'configured': False}
+    return {
+        'configured': True,
+        'queue_length': _handler.queue.qsize(),
+        'queue_size': LOG_QUEUE_SIZE,
+        'dropped': _handler.dropped,
+        'level': LOG_LEVEL,
+        'module_levels': _parse_levels(LOG_LEVELS),
+        'payload_sample_rate': LOG_PAYLOAD_SAMPLE_RATE
+    }
\ No newline at end of file
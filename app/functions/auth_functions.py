@@ -7,14 +7,22 @@ import string
 from functools import wraps
 from app.models.user_model import users_collection
 from app.models.token_model import tokens_collection
+from app.functions.rate_limiter import set_upstream_user
 from app import app
 from app import SMTP_SERVER, SMTP_PORT, SMTP_USERNAME, SMTP_PASSWORD
 from email.mime.text import MIMEText
 import smtplib
+import os
+from app.functions.app_logging import get_logger
+
+logger = get_logger(__name__)
 
 # JWT configuration
 JWT_SECRET_KEY = app.config.get("JWT_SECRET_KEY") or ''.join(random.choices(string.ascii_letters + string.digits, k=32))
 
+# Accounts allowed to call operational endpoints, e.g. ADMIN_EMAILS=ops@example.com,dev@example.com
+ADMIN_EMAILS = {email.strip().lower() for email in os.getenv('ADMIN_EMAILS', '').split(',') if email.strip()}
+
 def generate_2fa_token():
     """Generate a 6-digit 2FA token"""
     return ''.join(random.choices(string.digits, k=6))
@@ -33,7 +41,7 @@ def send_2fa_email(email, token):
             server.send_message(msg)
         return True
     except Exception as e:
-        print(f"Error sending email: {str(e)}")
+        logger.error("Error sending email: %s", e)
         return False
 
 def token_required(f):
@@ -61,9 +69,21 @@ def token_required(f):
         except jwt.DecodeError:
             return jsonify({'message': 'Token is invalid'}), 401
         except Exception as e:
-            print(f"Token decoding error: {e}")
+            logger.warning("Token decoding error: %s", e)
             return jsonify({'message': 'Token verification failed'}), 401
 
+        # Outbound API calls made for this request count against this user's fair share
+        set_upstream_user(current_user['email'])
+        return f(current_user, *args, **kwargs)
+
+    return decorated
+
+def admin_required(f):
+    """Decorator for operational routes; use below token_required. Only ADMIN_EMAILS may call them."""
+    @wraps(f)
+    def decorated(current_user, *args, **kwargs):
+        if current_user.get('email', '').lower() not in ADMIN_EMAILS:
+            return jsonify({'message': 'Admin access required'}), 403
         return f(current_user, *args, **kwargs)
 
     return decorated
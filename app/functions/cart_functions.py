@@ -1,7 +1,8 @@
 from flask import jsonify, request
 from bson.objectid import ObjectId
 from app.models.cart_model import cart_items_collection
-from app.functions.kroger_functions import get_access_token, get_kroger_product_details
+from app.functions.kroger_functions import get_access_token, get_kroger_product_details, validate_product_id
+from app.functions.preference_functions import get_user_location_id
 import datetime
 
 def get_cart_items(current_user):
@@ -18,7 +19,8 @@ def get_cart_items(current_user):
             'image': item.get('image', ''),
             'price': item.get('price', 0),
             'quantity': item.get('quantity', 1),
-            'added_at': item.get('added_at')
+            'added_at': item.get('added_at'),
+            'price_updated_at': item.get('price_updated_at')
         })
     
     # Calculate total price
@@ -37,7 +39,10 @@ def add_to_cart(current_user):
     if not data or not data.get('product_id') or not data.get('name'):
         return jsonify({'message': 'Missing required fields (product_id, name)'}), 400
     
-    product_id = data['product_id']
+    # Kroger product IDs are digit strings; numbers sent as JSON ints are stored as strings
+    product_id = validate_product_id(data['product_id'])
+    if not product_id:
+        return jsonify({'message': 'Invalid product_id'}), 400
     
     # Check if item already in cart
     existing = cart_items_collection.find_one({
@@ -62,6 +67,8 @@ def add_to_cart(current_user):
         'image': data.get('image', ''),
         'price': data.get('price', 0),
         'quantity': data.get('quantity', 1),
+        # Store used by the background price refresher
+        'location_id': get_user_location_id(current_user),
         'added_at': datetime.datetime.utcnow()
     }
     
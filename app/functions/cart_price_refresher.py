@@ -0,0 +1,172 @@
+import os
+import time
+import datetime
+import threading
+from pymongo import UpdateMany
+from pymongo.errors import PyMongoError
+from app.models.cart_model import cart_items_collection
+from app.functions.upstream_errors import UpstreamUnavailable
+from app.functions.kroger_functions import LOCATION_ID, KROGER_BATCH_CHUNK_SIZE, fetch_products_batch, validate_product_id
+from app.functions.app_logging import get_logger
+
+logger = get_logger(__name__)
+
+# Periodically re-prices every product sitting in a cart so /cart totals stay current
+# without calling Kroger on the read path.
+CART_PRICE_REFRESH_INTERVAL = int(os.getenv('CART_PRICE_REFRESH_INTERVAL', 15 * 60))  # seconds, 0 disables
+CART_PRICE_REFRESH_RATE = float(os.getenv('CART_PRICE_REFRESH_RATE', 2))  # max Kroger batch calls per second
+
+_lock = threading.Lock()
+_stop_event = threading.Event()
+_thread = None
+_stats = {
+    'runs': 0,
+    'products_checked': 0,
+    'products_not_found': 0,
+    'items_updated': 0,
+    'errors': 0,
+    'last_run_at': None,
+    'last_duration_ms': None
+}
+
+def _carted_products_by_location():
+    """
+    Return {location_id: {product_id: [stored values]}} for every distinct product in any cart.
+
+    Product IDs are normalized to strings; the stored values are kept so items saved
+    with a numeric product_id are still updated. Items with unusable IDs are skipped.
+    """
+    pipeline = [
+        {'$group': {'_id': {'product_id': '$product_id', 'location_id': '$location_id'}}}
+    ]
+    by_location = {}
+    skipped = 0
+    for row in cart_items_collection.aggregate(pipeline):
+        stored = row['_id'].get('product_id')
+        product_id = validate_product_id(stored)
+        if product_id is None:
+            skipped += 1
+            continue
+        by_location.setdefault(row['_id'].get('location_id'), {}).setdefault(product_id, []).append(stored)
+    if skipped:
+        logger.warning("Skipped %s carted products with invalid product ids", skipped)
+    return by_location
+
+def _current_price(product):
+    items = product.get('items') or []
+    if not items:
+        return None
+    return (items[0].get('price') or {}).get('regular')
+
+def refresh_cart_prices():
+    """
+    Re-price all carted products in batched, rate-limited Kroger calls and write
+    changed prices back to cart_items with bulk writes.
+    """
+    started = time.monotonic()
+    min_interval = 1 / CART_PRICE_REFRESH_RATE if CART_PRICE_REFRESH_RATE > 0 else 0
+    checked = not_found = updated = errors = 0
+    last_call = 0.0
+    rate_limited = False
+
+    try:
+        by_location = _carted_products_by_location()
+    except PyMongoError as e:
+        logger.error("Error collecting carted products: %s", e)
+        by_location = {}
+        errors += 1
+
+    for location_id, stored_ids in by_location.items():
+        if rate_limited:
+            break
+        product_ids = list(stored_ids)
+        for start in range(0, len(product_ids), KROGER_BATCH_CHUNK_SIZE):
+            if _stop_event.is_set():
+                break
+            chunk = product_ids[start:start + KROGER_BATCH_CHUNK_SIZE]
+
+            # Stay under the configured Kroger call rate
+            wait = min_interval - (time.monotonic() - last_call)
+            if wait > 0:
+                time.sleep(wait)
+            last_call = time.monotonic()
+
+            # Items saved before stores were supported have no location_id; price them at the default store
+            try:
+                products, statuses = fetch_products_batch(
+                    chunk, location_id=location_id or LOCATION_ID, use_cache=False
+                )
+            except UpstreamUnavailable as e:
+                # Leave the remaining quota to user requests; the next run picks up from scratch
+                logger.warning("Cart price refresh stopped: %s", e)
+                errors += 1
+                rate_limited = True
+                break
+            except Exception as e:
+                # One bad chunk must not stop the rest of the run
+                logger.error("Error refreshing cart prices for %s products: %s", len(chunk), e)
+                errors += 1
+                continue
+            checked += len(chunk)
+            not_found += sum(1 for status in statuses.values() if status == 'not_found')
+            errors += sum(1 for status in statuses.values() if status == 'error')
+
+            now = datetime.datetime.utcnow()
+            operations = []
+            for product_id, product in products.items():
+                price = _current_price(product)
+                if price is None:
+                    continue
+                # {'location_id': None} also matches items without the field
+                operations.append(UpdateMany(
+                    {'product_id': {'$in': stored_ids[product_id]}, 'location_id': location_id, 'price': {'$ne': price}},
+                    {'$set': {'price': price, 'price_updated_at': now}}
+                ))
+
+            if operations:
+                try:
+                    result = cart_items_collection.bulk_write(operations, ordered=False)
+                    updated += result.modified_count
+                except PyMongoError as e:
+                    logger.error("Error writing refreshed cart prices: %s", e)
+                    errors += 1
+
+    with _lock:
+        _stats['runs'] += 1
+        _stats['products_checked'] += checked
+        _stats['products_not_found'] += not_found
+        _stats['items_updated'] += updated
+        _stats['errors'] += errors
+        _stats['last_run_at'] = datetime.datetime.utcnow().isoformat() + 'Z'
+        _stats['last_duration_ms'] = round((time.monotonic() - started) * 1000, 1)
+
+def _run():
+    while not _stop_event.wait(CART_PRICE_REFRESH_INTERVAL):
+        try:
+            refresh_cart_prices()
+        except Exception as e:
+            logger.error("Error refreshing cart prices: %s", e)
+
+def start_cart_price_refresher():
+    """Start the background refresher thread once per process."""
+    global _thread
+    if CART_PRICE_REFRESH_INTERVAL <= 0:
+        return
+    with _lock:
+        if _thread is not None and _thread.is_alive():
+            return
+        _stop_event.clear()
+        _thread = threading.Thread(target=_run, name='cart-price-refresher', daemon=True)
+        _thread.start()
+
+def stop_cart_price_refresher():
+    """Ask the background refresher to stop after its current batch."""
+    _stop_event.set()
+
+def cart_price_refresher_stats():
+    """Return refresher counters for the metrics endpoint."""
+    with _lock:
+        stats = dict(_stats)
+        stats['interval_seconds'] = CART_PRICE_REFRESH_INTERVAL
+        stats['running'] = _thread is not None and _thread.is_alive()
+    return stats
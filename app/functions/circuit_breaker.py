@@ -0,0 +1,178 @@
+import os
+import time
+import datetime
+import threading
+from collections import deque
+from app.functions.upstream_errors import CircuitOpenError
+from app.functions.app_logging import get_logger
+
+logger = get_logger(__name__)
+
+# Per-upstream circuit breakers.
+#
+# A breaker watches the outcome of the last BREAKER_WINDOW calls to an upstream and
+# opens when too many of them failed (connection errors, timeouts, 5xx) or were slow.
+# While it is open, calls fail immediately with CircuitOpenError instead of tying up
+# request threads, and callers fall back to stale cached data where they have it.
+# After the open period a few probe calls are let through (half-open); if they
+# succeed the breaker closes again, otherwise it reopens.
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+def _breaker_config(name, slow_call_seconds):
+    """Read the settings for one upstream, e.g. KROGER_BREAKER_ERROR_RATE."""
+    prefix = name.upper()
+    return {
+        'window': int(os.getenv(f'{prefix}_BREAKER_WINDOW', 20)),
+        'min_calls': int(os.getenv(f'{prefix}_BREAKER_MIN_CALLS', 10)),
+        'error_rate': float(os.getenv(f'{prefix}_BREAKER_ERROR_RATE', 0.5)),
+        'slow_call_seconds': float(os.getenv(f'{prefix}_BREAKER_SLOW_CALL', slow_call_seconds)),
+        'slow_rate': float(os.getenv(f'{prefix}_BREAKER_SLOW_RATE', 0.5)),
+        'open_seconds': float(os.getenv(f'{prefix}_BREAKER_OPEN_SECONDS', 30)),
+        'half_open_probes': int(os.getenv(f'{prefix}_BREAKER_PROBES', 2))
+    }
+
+
+class CircuitBreaker:
+    """
+    Error-rate and slow-call-rate circuit breaker for one upstream.
+
+    Callers wrap each upstream attempt in before_call() and then exactly one of
+    record_success(elapsed), record_failure(elapsed) or cancel().
+    """
+
+    def __init__(self, name, window=20, min_calls=10, error_rate=0.5, slow_call_seconds=3.0,
+                 slow_rate=0.5, open_seconds=30, half_open_probes=2):
+        self.name = name
+        self.min_calls = max(1, min_calls)
+        self.error_rate = error_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_rate = slow_rate
+        self.open_seconds = open_seconds
+        self.half_open_probes = max(1, half_open_probes)
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._outcomes = deque(maxlen=max(window, self.min_calls))  # (failed, slow)
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+
+        self._rejected = 0
+        self._fallbacks = 0
+        self._transition_counts = {}
+        self._transitions = deque(maxlen=20)
+
+    def _transition(self, state, reason):
+        key = f'{self._state}->{state}'
+        self._transition_counts[key] = self._transition_counts.get(key, 0) + 1
+        self._transitions.append({
+            'from': self._state,
+            'to': state,
+            'reason': reason,
+            'at': datetime.datetime.utcnow().isoformat() + 'Z'
+        })
+        logger.warning("Circuit breaker for %s: %s -> %s (%s)", self.name, self._state, state, reason)
+        self._state = state
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+        elif state == HALF_OPEN:
+            self._probes_in_flight = 0
+            self._probe_successes = 0
+        else:
+            self._outcomes.clear()
+
+    def _retry_after(self, now):
+        return max(1, self.open_seconds - (now - self._opened_at))
+
+    def before_call(self):
+        """
+        Ask for permission to call the upstream.
+
+        Raises:
+            CircuitOpenError: While the breaker is open, or half-open with all probes in flight
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+                self._transition(HALF_OPEN, 'open period elapsed')
+            if self._state == CLOSED:
+                return
+            if self._state == HALF_OPEN and self._probes_in_flight < self.half_open_probes:
+                self._probes_in_flight += 1
+                return
+            self._rejected += 1
+            raise CircuitOpenError(self.name, f'{self.name} is unavailable (circuit open)', self._retry_after(now))
+
+    def cancel(self):
+        """The permitted call was not made after all (e.g. no rate limiter slot)."""
+        with self._lock:
+            if self._state == HALF_OPEN and self._probes_in_flight:
+                self._probes_in_flight -= 1
+
+    def record_success(self, elapsed):
+        self._record(False, elapsed)
+
+    def record_failure(self, elapsed):
+        self._record(True, elapsed)
+
+    def _record(self, failed, elapsed):
+        slow = elapsed >= self.slow_call_seconds
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                if failed or slow:
+                    self._transition(OPEN, 'probe failed' if failed else 'probe slow')
+                else:
+                    self._probe_successes += 1
+                    if self._probe_successes >= self.half_open_probes:
+                        self._transition(CLOSED, 'probes succeeded')
+                return
+            if self._state == OPEN:
+                # A call that started before the breaker opened
+                return
+
+            self._outcomes.append((failed, slow))
+            calls = len(self._outcomes)
+            if calls < self.min_calls:
+                return
+            failures = sum(1 for outcome in self._outcomes if outcome[0])
+            slow_calls = sum(1 for outcome in self._outcomes if outcome[1])
+            if failures / calls >= self.error_rate:
+                self._transition(OPEN, f'{failures}/{calls} calls failed')
+            elif slow_calls / calls >= self.slow_rate:
+                self._transition(OPEN, f'{slow_calls}/{calls} calls slower than {self.slow_call_seconds}s')
+
+    def record_fallback(self):
+        """Count a request answered from stale cached data because the breaker was open."""
+        with self._lock:
+            self._fallbacks += 1
+
+    def stats(self):
+        """Return state, window and transition statistics."""
+        with self._lock:
+            calls = len(self._outcomes)
+            return {
+                'state': self._state,
+                'window_calls': calls,
+                'window_error_rate': round(sum(1 for o in self._outcomes if o[0]) / calls, 3) if calls else None,
+                'window_slow_rate': round(sum(1 for o in self._outcomes if o[1]) / calls, 3) if calls else None,
+                'rejected': self._rejected,
+                'stale_fallbacks': self._fallbacks,
+                'transitions': dict(self._transition_counts),
+                'recent_transitions': list(self._transitions)
+            }
+
+
+_breakers = {
+    'kroger': CircuitBreaker('kroger', **_breaker_config('kroger', slow_call_seconds=3.0)),
+    'spoonacular': CircuitBreaker('spoonacular', **_breaker_config('spoonacular', slow_call_seconds=5.0))
+}
+
+
+def get_circuit_breaker(upstream):
+    """Return the shared breaker for 'kroger' or 'spoonacular'."""
+    return _breakers[upstream]
\ No newline at end of file
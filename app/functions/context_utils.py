@@ -0,0 +1,9 @@
+import contextvars
+
+def submit_in_context(executor, fn, *args, **kwargs):
+    """
+    Submit fn to an executor so it runs with a copy of the caller's context variables
+    (the user for outbound rate limiting, ...), which worker threads do not inherit.
+    """
+    context = contextvars.copy_context()
+    return executor.submit(context.run, fn, *args, **kwargs)
\ No newline at end of file
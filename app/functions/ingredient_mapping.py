@@ -0,0 +1,108 @@
+import os
+import datetime
+import threading
+from pymongo.errors import PyMongoError
+from app.models.ingredient_mapping_model import ingredient_mappings_collection
+from app.functions.lru_cache import LRUCache
+from app.functions.ingredient_normalizer import normalize_ingredient
+from app.functions.app_logging import get_logger
+
+logger = get_logger(__name__)
+
+# Learned mapping from ingredient name to the Kroger product chosen for it, per store.
+# Names Kroger has no products for are remembered too, for a shorter time.
+INGREDIENT_MAPPING_TTL = int(os.getenv('INGREDIENT_MAPPING_TTL', 30 * 24 * 3600))
+INGREDIENT_NEGATIVE_TTL = int(os.getenv('INGREDIENT_NEGATIVE_TTL', 6 * 3600))
+INGREDIENT_MAPPING_CACHE_SIZE = int(os.getenv('INGREDIENT_MAPPING_CACHE_SIZE', 5000))
+
+# Returned by lookup_ingredient_mapping() for names known to have no Kroger product
+NO_MATCH = object()
+
+_lru = LRUCache(maxsize=INGREDIENT_MAPPING_CACHE_SIZE)
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'negative_hits': 0, 'misses': 0, 'stored': 0, 'stored_negative': 0, 'errors': 0}
+
+def _count(counter):
+    with _stats_lock:
+        _stats[counter] += 1
+
+def lookup_ingredient_mapping(ingredient_name, location_id):
+    """
+    Find the Kroger product previously chosen for an ingredient at a store.
+
+    Returns:
+        str | object | None: The productId, NO_MATCH if the name is known to have
+        no products, or None if the name has not been resolved yet
+    """
+    key = (normalize_ingredient(ingredient_name), location_id)
+    now = datetime.datetime.utcnow()
+
+    entry = _lru.get(key)
+    if entry is None or entry['expires_at'] <= now:
+        try:
+            entry = ingredient_mappings_collection.find_one(
+                {'ingredient': key[0], 'location_id': location_id},
+                {'product_id': 1, 'expires_at': 1}
+            )
+        except PyMongoError as e:
+            _count('errors')
+            logger.error("Error reading ingredient mapping: %s", e)
+            entry = None
+
+        # The TTL monitor only runs periodically, so check expiry ourselves
+        if entry is None or entry['expires_at'] <= now:
+            _lru.pop(key)
+            _count('misses')
+            return None
+        _lru.set(key, {'product_id': entry.get('product_id'), 'expires_at': entry['expires_at']})
+
+    if entry.get('product_id') is None:
+        _count('negative_hits')
+        return NO_MATCH
+    _count('hits')
+    return entry['product_id']
+
+def record_ingredient_mapping(ingredient_name, location_id, product_id):
+    """
+    Remember which Kroger product an ingredient resolved to at a store.
+
+    Args:
+        ingredient_name (str): The ingredient name as searched
+        location_id (str): The Kroger store
+        product_id (str): The chosen productId, or None when the search returned no products
+    """
+    key = (normalize_ingredient(ingredient_name), location_id)
+    ttl = INGREDIENT_MAPPING_TTL if product_id else INGREDIENT_NEGATIVE_TTL
+    now = datetime.datetime.utcnow()
+    expires_at = now + datetime.timedelta(seconds=ttl)
+
+    _lru.set(key, {'product_id': product_id, 'expires_at': expires_at})
+    _count('stored' if product_id else 'stored_negative')
+    try:
+        ingredient_mappings_collection.update_one(
+            {'ingredient': key[0], 'location_id': location_id},
+            {'$set': {'product_id': product_id, 'updated_at': now, 'expires_at': expires_at}},
+            upsert=True
+        )
+    except PyMongoError as e:
+        _count('errors')
+        logger.error("Error writing ingredient mapping: %s", e)
+
+def forget_ingredient_mapping(ingredient_name, location_id):
+    """Drop a learned mapping, e.g. when its product no longer exists."""
+    key = (normalize_ingredient(ingredient_name), location_id)
+    _lru.pop(key)
+    try:
+        ingredient_mappings_collection.delete_one({'ingredient': key[0], 'location_id': location_id})
+    except PyMongoError as e:
+        _count('errors')
+        logger.error("Error deleting ingredient mapping: %s", e)
+
+def ingredient_mapping_stats():
+    """Return lookup counters for the metrics endpoint."""
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats['hits'] + stats['negative_hits'] + stats['misses']
+    stats['hit_ratio'] = round((stats['hits'] + stats['negative_hits']) / lookups, 3) if lookups else None
+    stats['lru_size'] = len(_lru)
+    return stats
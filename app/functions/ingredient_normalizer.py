@@ -0,0 +1,138 @@
+import re
+from functools import lru_cache
+
+# Recipe ingredient name normalization.
+#
+# Spoonacular names carry section prefixes ("additional toppings: "), preparation
+# words ("fresh", "chopped") and plurals, so the same grocery item shows up under
+# many spellings. normalize_ingredient() reduces a name to a canonical key used to
+# dedupe ingredients and as the ingredient mapping key. ingredient_search_term()
+# cleans a name more lightly for the Kroger search, keeping connector words
+# ("salt and pepper", "cream of tartar") and plurals that change the meaning of
+# the query. The rules below are plain tables so they can be extended without
+# touching code.
+
+# Section labels Spoonacular puts in front of the actual ingredient
+PREFIX_PATTERNS = (
+    r'additional toppings?:',
+    r'for (?:the )?[a-z ]+:',
+    r'garnish:',
+    r'optional:',
+    r'topping:',
+)
+
+# Preparation and quality words that do not change which product to buy
+QUALIFIERS = frozenset((
+    'fresh', 'freshly', 'chopped', 'minced', 'diced', 'sliced', 'grated', 'shredded',
+    'crushed', 'peeled', 'cubed', 'julienned', 'halved', 'quartered', 'trimmed',
+    'finely', 'roughly', 'coarsely', 'thinly', 'thickly', 'lightly', 'well',
+    'large', 'small', 'medium', 'organic', 'raw',
+    'softened', 'melted', 'beaten', 'packed', 'sifted', 'rinsed', 'drained',
+    'chilled', 'optional', 'taste',
+))
+
+# Connector words: dropped from the canonical key, kept inside search terms
+CONNECTORS = frozenset(('to', 'and', 'or', 'of'))
+
+# Plurals the suffix rules below would get wrong
+IRREGULAR_SINGULARS = {
+    'leaves': 'leaf',
+    'loaves': 'loaf',
+    'halves': 'half',
+    'knives': 'knife',
+    'cookies': 'cookie',
+    'brownies': 'brownie',
+    'smoothies': 'smoothie',
+}
+
+# Words ending in "s" that are already singular
+SINGULAR_EXCEPTIONS = frozenset((
+    'asparagus', 'hummus', 'couscous', 'molasses', 'swiss', 'brussels', 'citrus',
+    'lemongrass', 'watercress', 'bass', 'grits', 'hibiscus', 'octopus', 'schnapps',
+    'gras', 'series', 'species', 'chips', 'greens', 'oats', 'noodles', 'sprinkles',
+))
+
+# (suffix, replacement), tried in order; the first match wins
+PLURAL_SUFFIX_RULES = (
+    ('ies', 'y'),
+    ('sses', 'ss'),
+    ('shes', 'sh'),
+    ('ches', 'ch'),
+    ('xes', 'x'),
+    ('oes', 'o'),
+    ('s', ''),
+)
+
+_PREFIX_RE = re.compile(r'^(?:\s*(?:' + '|'.join(PREFIX_PATTERNS) + r')\s*)+')
+_PARENTHETICAL_RE = re.compile(r'\([^)]*\)')
+_NON_WORD_RE = re.compile(r"[^a-z0-9%' -]+")
+
+
+def singularize(word):
+    """Fold a plural ingredient word to its singular form."""
+    if word in IRREGULAR_SINGULARS:
+        return IRREGULAR_SINGULARS[word]
+    if word in SINGULAR_EXCEPTIONS or len(word) <= 3 or word.endswith(('ss', 'us', 'is')):
+        return word
+    for suffix, replacement in PLURAL_SUFFIX_RULES:
+        if word.endswith(suffix):
+            if suffix == 'ies' and len(word) <= 4:
+                # "pies", "ties": the stem is too short to be a "-y" word
+                return word[:-1]
+            return word[:-len(suffix)] + replacement
+    return word
+
+
+def _tokens(ingredient_name):
+    name = ingredient_name.casefold()
+    name = _PREFIX_RE.sub('', name)
+    name = _PARENTHETICAL_RE.sub(' ', name)
+    name = _NON_WORD_RE.sub(' ', name).replace('-', ' ')
+    return [token for token in (token.strip("'") for token in name.split()) if token]
+
+
+@lru_cache(maxsize=8192)
+def normalize_ingredient(ingredient_name):
+    """
+    Reduce an ingredient name to its canonical key.
+
+    e.g. "Additional toppings: Freshly Chopped Tomatoes" -> "tomato"
+
+    Args:
+        ingredient_name (str): The ingredient name as Spoonacular returns it
+
+    Returns:
+        str: The canonical key, or '' for an empty name
+    """
+    tokens = _tokens(ingredient_name)
+    kept = [token for token in tokens if token not in QUALIFIERS and token not in CONNECTORS]
+    if not kept:
+        # Never normalize a name away entirely; "fresh" alone is still a search term
+        return ' '.join(tokens)
+
+    # Only the head noun is pluralized in ingredient names ("green beans", "egg yolks")
+    kept[-1] = singularize(kept[-1])
+    return ' '.join(kept)
+
+
+@lru_cache(maxsize=8192)
+def ingredient_search_term(ingredient_name):
+    """
+    Clean an ingredient name into a Kroger search term.
+
+    e.g. "salt and pepper, to taste" -> "salt and pepper", "2% milk" -> "2% milk"
+
+    Args:
+        ingredient_name (str): The ingredient name as Spoonacular returns it
+
+    Returns:
+        str: The search term, or '' for an empty name
+    """
+    tokens = _tokens(ingredient_name)
+    kept = [token for token in tokens if token not in QUALIFIERS]
+    # Connectors only make sense between words ("salt to taste" -> "salt")
+    while kept and kept[0] in CONNECTORS:
+        kept.pop(0)
+    while kept and kept[-1] in CONNECTORS:
+        kept.pop()
+    return ' '.join(kept) if kept else ' '.join(tokens)
\ No newline at end of file
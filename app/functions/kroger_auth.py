@@ -0,0 +1,158 @@
+import threading
+import time
+import datetime
+import requests
+from app.functions.app_logging import get_logger
+from app.functions.upstream_errors import UpstreamUnavailable
+
+logger = get_logger(__name__)
+
+
+class KrogerTokenManager:
+    """
+    Caches the Kroger client-credentials access token and refreshes it before it expires.
+
+    Args:
+        fetch_token (callable): Returns (access_token, expires_in_seconds) or raises on failure
+            (requests errors and bad responses give None; UpstreamUnavailable propagates as a 503)
+        expiry_margin (int): Seconds before expiry at which a cached token is no longer handed out
+        refresh_ahead (int): Seconds before expiry at which a background refresh is started
+    """
+
+    def __init__(self, fetch_token, expiry_margin=60, refresh_ahead=300):
+        self._fetch_token = fetch_token
+        self.expiry_margin = expiry_margin
+        self.refresh_ahead = max(refresh_ahead, expiry_margin)
+
+        self._lock = threading.Lock()          # guards token state and counters
+        self._refresh_lock = threading.Lock()  # only one refresh may run at a time
+
+        self._token = None
+        self._expires_at = 0.0
+        self._started_at = time.monotonic()
+        self._last_refresh_at = None
+
+        self._fetch_count = 0
+        self._failure_count = 0
+        self._cache_hits = 0
+        self._background_refreshes = 0
+        self._total_latency = 0.0
+        self._last_latency = None
+        self._max_latency = 0.0
+
+    def get_token(self):
+        """Return a valid access token, fetching a new one only when needed."""
+        now = time.monotonic()
+        with self._lock:
+            token, expires_at = self._token, self._expires_at
+            usable = token is not None and now < expires_at - self.expiry_margin
+            if usable:
+                self._cache_hits += 1
+
+        if usable:
+            if now >= expires_at - self.refresh_ahead:
+                self._start_background_refresh()
+            return token
+
+        return self._refresh_blocking()
+
+    def invalidate(self, token=None):
+        """
+        Drop the cached token, e.g. after Kroger rejects it with a 401.
+
+        When token is given the cache is only dropped if it still holds that token, so
+        concurrent requests rejected with the same token trigger a single refresh.
+        """
+        with self._lock:
+            if token is not None and token != self._token:
+                return
+            self._token = None
+            self._expires_at = 0.0
+
+    def stats(self):
+        """Return fetch counters and refresh latency for the metrics endpoint."""
+        now = time.monotonic()
+        with self._lock:
+            uptime = now - self._started_at
+            attempts = self._fetch_count + self._failure_count
+            return {
+                'token_cached': self._token is not None,
+                'expires_in_seconds': max(0, round(self._expires_at - now)) if self._token else 0,
+                'fetch_count': self._fetch_count,
+                'failure_count': self._failure_count,
+                'cache_hits': self._cache_hits,
+                'background_refreshes': self._background_refreshes,
+                'fetches_per_hour': round(self._fetch_count / (uptime / 3600), 2) if uptime > 0 else 0,
+                'last_refresh_at': self._last_refresh_at,
+                'last_latency_ms': round(self._last_latency * 1000, 1) if self._last_latency is not None else None,
+                'avg_latency_ms': round(self._total_latency / attempts * 1000, 1) if attempts else None,
+                'max_latency_ms': round(self._max_latency * 1000, 1),
+                'uptime_seconds': round(uptime)
+            }
+
+    def _refresh_blocking(self):
+        with self._refresh_lock:
+            # Another thread may have refreshed the token while we were waiting
+            with self._lock:
+                if self._token is not None and time.monotonic() < self._expires_at - self.expiry_margin:
+                    self._cache_hits += 1
+                    return self._token
+            return self._refresh()
+
+    def _start_background_refresh(self):
+        if not self._refresh_lock.acquire(blocking=False):
+            return  # A refresh is already in progress
+
+        def run():
+            try:
+                self._refresh(background=True)
+            except UpstreamUnavailable as e:
+                logger.warning("Background Kroger token refresh skipped: %s", e)
+            finally:
+                self._refresh_lock.release()
+
+        threading.Thread(target=run, name='kroger-token-refresh', daemon=True).start()
+
+    def _refresh(self, background=False):
+        started = time.monotonic()
+        try:
+            token, expires_in = self._fetch_token()
+            if not token:
+                raise ValueError("token response did not include an access_token")
+        except UpstreamUnavailable:
+            # Rate limited or circuit open: let the caller answer 503 with Retry-After
+            token = self._record_failure(started)
+            if token is not None:
+                return token
+            raise
+        except (requests.exceptions.RequestException, ValueError, KeyError, TypeError) as e:
+            token = self._record_failure(started)
+            if token is None:
+                logger.error("Error refreshing Kroger access token: %s", e)
+            return token
+
+        finished = time.monotonic()
+        with self._lock:
+            self._token = token
+            # Count the lifetime from when the request was sent so the cached expiry is never late
+            self._expires_at = started + float(expires_in or 0)
+            self._fetch_count += 1
+            if background:
+                self._background_refreshes += 1
+            self._record_latency(finished - started)
+            self._last_refresh_at = datetime.datetime.utcnow().isoformat() + 'Z'
+        return token
+
+    def _record_failure(self, started):
+        """Count a failed refresh and return the old token if it has not actually expired yet."""
+        with self._lock:
+            self._failure_count += 1
+            self._record_latency(time.monotonic() - started)
+            if self._token is not None and time.monotonic() < self._expires_at:
+                return self._token
+        return None
+
+    def _record_latency(self, elapsed):
+        self._last_latency = elapsed
+        self._total_latency += elapsed
+        self._max_latency = max(self._max_latency, elapsed)
\ No newline at end of file
@@ -1,18 +1,80 @@
 import os
+import re
+import json
+import time
+import base64
+import binascii
 import requests
-from flask import jsonify,request
+from concurrent.futures import ThreadPoolExecutor, wait, as_completed, TimeoutError as FuturesTimeoutError
+from flask import jsonify,request, Response
 from dotenv import load_dotenv
+from app.functions.kroger_auth import KrogerTokenManager
+from app.functions.upstream_client import upstream_get, upstream_post
+from app.functions.upstream_errors import UpstreamUnavailable, CircuitOpenError
+from app.functions.circuit_breaker import get_circuit_breaker
+from app.functions.context_utils import submit_in_context
+from app.functions.single_flight import coalesce
+from app.functions.ingredient_normalizer import normalize_ingredient, ingredient_search_term
+from app.functions.kroger_product import KrogerProduct
+from app.functions.product_cache import lookup_cached_product, get_cached_product, cache_product, cache_products, cache_product_prices, kroger_product_for
+from app.functions.ingredient_mapping import (
+    NO_MATCH, lookup_ingredient_mapping, record_ingredient_mapping, forget_ingredient_mapping
+)
+from app.functions.app_logging import get_logger
+
+logger = get_logger(__name__)
 
 load_dotenv()  # Load environment variables from .env file
 
 # Kroger API credentials
 CLIENT_ID = os.getenv('KROGER_CLIENT_ID')
 CLIENT_SECRET = os.getenv('KROGER_CLIENT_SECRET')
-LOCATION_ID = '01400943'  # Default location ID
+LOCATION_ID = os.getenv('KROGER_LOCATION_ID', '01400943')  # Default location ID for users without a store
+
+# Product detail fan-out: max parallel /products/{id} calls per request and per-call timeout (seconds)
+KROGER_DETAIL_CONCURRENCY = int(os.getenv('KROGER_DETAIL_CONCURRENCY', 8))
+KROGER_DETAIL_TIMEOUT = float(os.getenv('KROGER_DETAIL_TIMEOUT', 5))
+
+# Recipe pricing: max parallel ingredient lookups and overall deadline (seconds)
+KROGER_INGREDIENT_CONCURRENCY = int(os.getenv('KROGER_INGREDIENT_CONCURRENCY', 6))
+KROGER_RECIPE_DEADLINE = float(os.getenv('KROGER_RECIPE_DEADLINE', 10))
+
+# 'search' builds products straight from the location-scoped search payload and only
+# calls /products/{productId} when fields are missing; 'detail' always makes the detail call
+KROGER_RESOLUTION_MODE = os.getenv('KROGER_RESOLUTION_MODE', 'search').lower()
+REQUIRED_PRODUCT_FIELDS = ('productId', 'upc', 'description', 'brand', 'categories')
+REQUIRED_ITEM_FIELDS = ('itemId', 'price', 'size', 'soldBy')
+
+# Search paging: products per page when no limit is given, and Kroger's caps on
+# filter.limit and filter.start
+KROGER_SEARCH_DEFAULT_LIMIT = int(os.getenv('KROGER_SEARCH_DEFAULT_LIMIT', 10))
+KROGER_SEARCH_MAX_LIMIT = 50
+KROGER_SEARCH_MAX_START = 250
+
+# Batch lookups: max ids accepted by /kroger/products and ids per filter.productId request
+KROGER_BATCH_MAX_IDS = int(os.getenv('KROGER_BATCH_MAX_IDS', 100))
+KROGER_BATCH_CHUNK_SIZE = int(os.getenv('KROGER_BATCH_CHUNK_SIZE', 50))
+
+# Kroger product IDs are 13-digit UPC-style strings; allow some slack in the length
+PRODUCT_ID_PATTERN = re.compile(r'^[0-9]{1,20}$')
+
+def validate_product_id(product_id):
+    """Return a product ID as a string if it is a valid Kroger product ID, otherwise None."""
+    if isinstance(product_id, bool):
+        return None
+    if isinstance(product_id, int):
+        product_id = str(product_id)
+    if not isinstance(product_id, str):
+        return None
+    product_id = product_id.strip()
+    return product_id if PRODUCT_ID_PATTERN.match(product_id) else None
 
-def get_access_token():
+def _request_access_token():
     """
-    Get an access token from the Kroger API using client credentials.
+    Request a new client-credentials token from the Kroger API.
+
+    Returns:
+        tuple: (access_token, expires_in_seconds)
     """
     url = "https://api.kroger.com/v1/connect/oauth2/token"
     headers = {"Content-Type": "application/x-www-form-urlencoded"}
@@ -20,217 +82,311 @@ def get_access_token():
         "grant_type": "client_credentials",
         "scope": "product.compact"
     }
-    try:
-        response = requests.post(
-            url,
-            headers=headers,
-            data=data,
-            auth=(CLIENT_ID, CLIENT_SECRET)
-        )
-        response.raise_for_status()
-        return response.json().get("access_token")
-    except requests.exceptions.RequestException as e:
-        print(f"Error getting Kroger access token: {e}")
-        return None
+    response = upstream_post(
+        'kroger',
+        url,
+        headers=headers,
+        data=data,
+        auth=(CLIENT_ID, CLIENT_SECRET),
+        log_body=False  # the response is the access token
+    )
+    response.raise_for_status()
+    token_data = response.json()
+    return token_data.get("access_token"), token_data.get("expires_in", 1800)
+
+# Shared by every request thread so the OAuth endpoint is only hit when the token is about to expire
+kroger_token_manager = KrogerTokenManager(
+    _request_access_token,
+    expiry_margin=int(os.getenv('KROGER_TOKEN_EXPIRY_MARGIN', 60)),
+    refresh_ahead=int(os.getenv('KROGER_TOKEN_REFRESH_AHEAD', 300))
+)
+
+def get_access_token():
+    """
+    Get a cached Kroger API access token, refreshing it shortly before it expires.
+    """
+    return kroger_token_manager.get_token()
 
-def search_products(query, access_token):
+def _kroger_get(url, headers, **kwargs):
+    """
+    GET a Kroger API URL with the bearer token in headers. If Kroger rejects the token
+    with a 401 (revoked or expired early) it is dropped, a new one is fetched and the
+    call is retried once; headers is updated so later calls reuse the new token.
+    """
+    response = upstream_get('kroger', url, headers=headers, **kwargs)
+    if response.status_code == 401:
+        rejected = headers.get('Authorization', '').partition(' ')[2]
+        kroger_token_manager.invalidate(rejected)
+        access_token = get_access_token()
+        if access_token:
+            headers['Authorization'] = f'Bearer {access_token}'
+            response = upstream_get('kroger', url, headers=headers, **kwargs)
+    return response
+
+@coalesce('kroger.search_products',
+          key=lambda query, access_token, location_id=LOCATION_ID, limit=None, start=None:
+          (query, location_id, limit, start))
+def search_products(query, access_token, location_id=LOCATION_ID, limit=None, start=None):
     """
     Search for products using the Kroger API.
+
+    Concurrent searches for the same term, store and page share one call.
+
+    Args:
+        query (str): The search term
+        access_token (str): Kroger access token
+        location_id (str): The Kroger store to search
+        limit (int): Page size (filter.limit); Kroger's default when omitted
+        start (int): Number of results to skip (filter.start)
     """
-    url = f"https://api.kroger.com/v1/products?filter.term={query}&filter.locationId={LOCATION_ID}"
+    url = f"https://api.kroger.com/v1/products?filter.term={query}&filter.locationId={location_id}"
+    if limit:
+        url += f"&filter.limit={limit}"
+    if start:
+        url += f"&filter.start={start}"
     headers = {
         "Accept": "application/json",
         "Authorization": f"Bearer {access_token}"
     }
     try:
-        response = requests.get(url, headers=headers)
+        response = _kroger_get(url, headers)
         response.raise_for_status()
         return response.json()
     except requests.exceptions.RequestException as e:
-        print(f"Error searching Kroger products: {e}")
+        logger.error("Error searching Kroger products: %s", e)
         return None
 
-def get_kroger_product_details(ingredient_name, access_token):
+def _has_complete_product_fields(product):
+    """
+    Check whether a search hit has every field the product formatters read,
+    so the /products/{productId} detail call can be skipped.
+    """
+    if any(not product.get(field) for field in REQUIRED_PRODUCT_FIELDS):
+        return False
+    items = product.get('items')
+    if not items:
+        return False
+    for item in items:
+        if any(field not in item for field in REQUIRED_ITEM_FIELDS):
+            return False
+        if item['price'].get('regular') is None:
+            return False
+    return True
+
+def _stale_product(product_id, location_id):
+    """
+    Cached product record with possibly outdated prices, served while the Kroger
+    circuit breaker is open. Returns None if there is none.
+    """
+    product = get_cached_product(product_id, location_id, allow_stale=True)
+    if product is not None:
+        get_circuit_breaker('kroger').record_fallback()
+    return product
+
+def _fetch_product_detail(product_id, headers, location_id):
+    """
+    Get a raw product record by ID, from the product cache or the /products/{productId} endpoint.
+    """
+    product = get_cached_product(product_id, location_id)
+    if product is None:
+        product_url = f"https://api.kroger.com/v1/products/{product_id}?filter.locationId={location_id}"
+        try:
+            product_response = _kroger_get(product_url, headers, timeout=KROGER_DETAIL_TIMEOUT)
+        except CircuitOpenError:
+            product = _stale_product(product_id, location_id)
+            if product is None:
+                raise
+            return product
+        product = product_response.json().get('data')
+        if product:
+            cache_product(product, location_id)
+    return product or None
+
+@coalesce('kroger.get_kroger_product_details',
+          key=lambda ingredient_name, access_token, location_id=LOCATION_ID: (ingredient_name, location_id))
+def get_kroger_product_details(ingredient_name, access_token, location_id=LOCATION_ID):
     """
     Get detailed product information for a specific ingredient from the Kroger API.
+
+    Ingredients that were resolved before reuse the learned productId and skip the
+    search call; names known to have no Kroger products return None straight away.
+    Concurrent lookups of the same ingredient at the same store share one resolution.
     """
-    # First, search for the product
-    search_url = f"https://api.kroger.com/v1/products?filter.term={ingredient_name}&filter.locationId={LOCATION_ID}"
     headers = {
         'Accept': 'application/json',
         'Authorization': f'Bearer {access_token}'
     }
 
     try:
-        # Search for product
-        search_response = requests.get(search_url, headers=headers)
+        mapped_product_id = lookup_ingredient_mapping(ingredient_name, location_id)
+        if mapped_product_id is NO_MATCH:
+            return None
+        if mapped_product_id:
+            product = _fetch_product_detail(mapped_product_id, headers, location_id)
+            if product:
+                return kroger_product_for(product, location_id).to_ingredient_dict(ingredient_name)
+            # The product has gone away; search again below
+            forget_ingredient_mapping(ingredient_name, location_id)
+
+        # First, search for the product
+        search_url = f"https://api.kroger.com/v1/products?filter.term={ingredient_name}&filter.locationId={location_id}"
+        search_response = _kroger_get(search_url, headers, timeout=KROGER_DETAIL_TIMEOUT)
         search_data = search_response.json()
 
         if not search_data.get('data'):
+            # Only a successful empty search means Kroger has nothing for this name
+            if search_response.ok:
+                record_ingredient_mapping(ingredient_name, location_id, None)
             return None
 
-        # Get first product from search results
-        product_id = search_data['data'][0]['productId']
+        # The location-scoped search hit usually carries everything we need
+        product = search_data['data'][0]
+        if KROGER_RESOLUTION_MODE == 'search' and _has_complete_product_fields(product):
+            cache_product(product, location_id)
+        else:
+            # Get detailed product information
+            product = _fetch_product_detail(product['productId'], headers, location_id)
+            if not product:
+                return None
+
+        record_ingredient_mapping(ingredient_name, location_id, product['productId'])
+        return kroger_product_for(product, location_id).to_ingredient_dict(ingredient_name)
+    except UpstreamUnavailable:
+        raise
+    except Exception as e:
+        logger.error("Error fetching product details for %s: %s", ingredient_name, e)
+        return None
 
-        # Get detailed product information
-        product_url = f"https://api.kroger.com/v1/products/{product_id}?filter.locationId={LOCATION_ID}"
-        product_response = requests.get(product_url, headers=headers)
-        product_data = product_response.json()
+def _fetch_search_product_info(search_product, headers, location_id):
+    """
+    Fetch the detail record for one search hit and format it for the search response.
+    """
+    product = _fetch_product_detail(search_product['productId'], headers, location_id)
+    return kroger_product_for(product or {}, location_id).to_dict(default_item=True)
 
-        if not product_data.get('data'):
-            return None
+def _encode_search_cursor(start):
+    """Opaque cursor for the search page starting at the given offset."""
+    return base64.urlsafe_b64encode(json.dumps({'start': start}).encode()).decode().rstrip('=')
 
-        product = product_data['data']
-        return {
-            'name': ingredient_name,
-            'productId': product['productId'],
-            'upc': product['upc'],
-            'description': product['description'],
-            'brand': product['brand'],
-            'categories': product['categories'],
-            'countryOrigin': product.get('countryOrigin'),
-            'temperature': product.get('temperature'),
-            'images': product.get('images', []),
-            'items': [{
-                'itemId': item['itemId'],
-                'price': item['price'],
-                'size': item['size'],
-                'soldBy': item['soldBy'],
-                'inventory': item.get('inventory'),
-                'fulfillment': item.get('fulfillment')
-            } for item in product.get('items', [])]
-        }
-    except Exception as e:
-        print(f"Error fetching product details for {ingredient_name}: {str(e)}")
+def _decode_search_cursor(cursor):
+    """Offset encoded in a search cursor, or None if the cursor is invalid."""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        start = int(data['start'])
+    except (binascii.Error, ValueError, TypeError, KeyError):
         return None
+    return start if 0 <= start <= KROGER_SEARCH_MAX_START else None
 
-def kroger_search():
+def _next_search_start(search_data, start, limit, returned):
+    """Offset of the next page, or None when this page is the last one."""
+    next_start = start + limit
+    if returned < limit or next_start > KROGER_SEARCH_MAX_START:
+        return None
+    total = ((search_data.get('meta') or {}).get('pagination') or {}).get('total')
+    if isinstance(total, int) and next_start >= total:
+        return None
+    return next_start
+
+def kroger_search(location_id=LOCATION_ID):
     """
-    Search for Kroger products based on a query.
+    Search for Kroger products based on a query at the given store.
+
+    Results are paged: 'limit' (1-50) sets the page size and 'cursor' (the
+    'nextCursor' of the previous page) or 'start' selects the page. Product
+    details are only resolved for the products on the requested page.
     """
     query = request.args.get("query")
     if not query:
         return jsonify({'error': 'No search query provided'}), 400
 
+    limit = request.args.get('limit', KROGER_SEARCH_DEFAULT_LIMIT, type=int)
+    if limit is None or not 1 <= limit <= KROGER_SEARCH_MAX_LIMIT:
+        return jsonify({'error': f'limit must be between 1 and {KROGER_SEARCH_MAX_LIMIT}'}), 400
+
+    cursor = request.args.get('cursor')
+    if cursor:
+        start = _decode_search_cursor(cursor)
+        if start is None:
+            return jsonify({'error': 'Invalid cursor'}), 400
+    else:
+        start = request.args.get('start', 0, type=int)
+        if start is None or not 0 <= start <= KROGER_SEARCH_MAX_START:
+            return jsonify({'error': f'start must be between 0 and {KROGER_SEARCH_MAX_START}'}), 400
+
     try:
         access_token = get_access_token()
         if not access_token:
             return jsonify({'error': 'Failed to get Kroger access token'}), 500
 
-        search_url = f"https://api.kroger.com/v1/products?filter.term={query}&filter.locationId={LOCATION_ID}"
         headers = {
             'Accept': 'application/json',
             'Authorization': f'Bearer {access_token}'
         }
 
-        search_response = requests.get(search_url, headers=headers)
-        search_data = search_response.json()
+        search_data = search_products(query, access_token, location_id, limit=limit, start=start)
+        if search_data is None:
+            return jsonify({
+                'query': query,
+                'products': [],
+                'error': 'Failed to search Kroger products'
+            })
 
         if not search_data.get('data'):
             return jsonify({
                 'query': query,
-                'products': []
+                'locationId': location_id,
+                'products': [],
+                'start': start,
+                'limit': limit,
+                'nextCursor': None
             })
 
-        products = []
-        for search_product in search_data['data']:
-            try:
-                product_id = search_product['productId']
-                product_url = f"https://api.kroger.com/v1/products/{product_id}?filter.locationId={LOCATION_ID}"
+        # Never resolve more than the requested page, whatever Kroger sends back
+        search_products_data = search_data['data'][:limit]
+        next_start = _next_search_start(search_data, start, limit, len(search_products_data))
 
-                product_response = requests.get(product_url, headers=headers)
-                product_data = product_response.json()
+        if KROGER_RESOLUTION_MODE == 'search':
+            cache_products(
+                [product for product in search_products_data if _has_complete_product_fields(product)],
+                location_id
+            )
 
-                product = product_data.get('data', {})
-
-                # Create a product dictionary with default values for missing data
-                product_info = {
-                    'productId': product.get('productId', 'N/A'),
-                    'upc': product.get('upc', 'N/A'),
-                    'description': product.get('description', 'N/A'),
-                    'brand': product.get('brand', 'N/A'),
-                    'categories': product.get('categories', ['N/A']),
-                    'countryOrigin': product.get('countryOrigin', 'N/A'),
-                    'temperature': product.get('temperature', 'N/A'),
-                    'images': product.get('images', []),
-                    'items': []
-                }
-
-                # Process items with default values
-                for item in product.get('items', []):
-                    item_info = {
-                        'itemId': item.get('itemId', 'N/A'),
-                        'price': {
-                            'regular': item.get('price', {}).get('regular', 0.0),
-                            'promo': item.get('price', {}).get('promo', None)
-                        },
-                        'size': item.get('size', 'N/A'),
-                        'soldBy': item.get('soldBy', 'N/A'),
-                        'inventory': item.get('inventory', {
-                            'status': 'N/A'
-                        }),
-                        'fulfillment': item.get('fulfillment', {
-                            'status': 'N/A'
-                        })
-                    }
-                    product_info['items'].append(item_info)
-
-                # If no items were found, add a default item
-                if not product_info['items']:
-                    product_info['items'].append({
-                        'itemId': 'N/A',
-                        'price': {
-                            'regular': 0.0,
-                            'promo': None
-                        },
-                        'size': 'N/A',
-                        'soldBy': 'N/A',
-                        'inventory': {
-                            'status': 'N/A'
-                        },
-                        'fulfillment': {
-                            'status': 'N/A'
-                        }
-                    })
-
-                products.append(product_info)
-
-            except Exception as product_error:
-                print(f"Error processing product: {str(product_error)}")
-                # Add minimal product info if there's an error
-                products.append({
-                    'productId': search_product.get('productId', 'N/A'),
-                    'upc': 'N/A',
-                    'description': search_product.get('description', 'N/A'),
-                    'brand': search_product.get('brand', 'N/A'),
-                    'categories': ['N/A'],
-                    'countryOrigin': 'N/A',
-                    'temperature': 'N/A',
-                    'images': [],
-                    'items': [{
-                        'itemId': 'N/A',
-                        'price': {
-                            'regular': 0.0,
-                            'promo': None
-                        },
-                        'size': 'N/A',
-                        'soldBy': 'N/A',
-                        'inventory': {
-                            'status': 'N/A'
-                        },
-                        'fulfillment': {
-                            'status': 'N/A'
-                        }
-                    }]
-                })
+        # Fetch product details concurrently; results are collected in search order
+        products = []
+        max_workers = max(1, min(KROGER_DETAIL_CONCURRENCY, len(search_products_data)))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # In search mode only hits with missing fields need a detail call
+            futures = [
+                None if KROGER_RESOLUTION_MODE == 'search' and _has_complete_product_fields(search_product)
+                else submit_in_context(executor, _fetch_search_product_info, search_product, headers, location_id)
+                for search_product in search_products_data
+            ]
+            for search_product, future in zip(search_products_data, futures):
+                try:
+                    if future is None:
+                        products.append(KrogerProduct.from_payload(search_product).to_dict(default_item=True))
+                    else:
+                        products.append(future.result())
+                except UpstreamUnavailable:
+                    raise
+                except Exception as product_error:
+                    logger.warning("Error processing product: %s", product_error)
+                    # Add minimal product info if there's an error
+                    products.append(KrogerProduct.from_search_hit(search_product).to_dict(default_item=True))
 
         return jsonify({
             'query': query,
-            'products': products
+            'locationId': location_id,
+            'products': products,
+            'start': start,
+            'limit': limit,
+            'nextCursor': _encode_search_cursor(next_start) if next_start is not None else None
         })
 
+    except UpstreamUnavailable:
+        raise
     except Exception as e:
-        print(f"Error searching Kroger products: {str(e)}")
+        logger.error("Error searching Kroger products: %s", e)
         # Return minimal response even on error
         return jsonify({
             'query': query,
@@ -238,9 +394,20 @@ def kroger_search():
             'error': str(e)
         })
 
-def kroger_recipe_ingredients_info(recipe_id):
+def kroger_recipe_ingredients_info(recipe_id, location_id=LOCATION_ID, stream=False):
     """
-    Get Kroger product details for all ingredients in a recipe.
+    Get Kroger product details for all ingredients in a recipe, priced at the given store.
+
+    Ingredient names are normalized and deduplicated first, then looked up
+    concurrently. If the lookups are not finished within
+    KROGER_RECIPE_DEADLINE seconds, the ingredients resolved so far are returned and
+    the rest are listed under 'unresolved'. Ingredients that could not be looked up
+    because Kroger is rate limited or unavailable are also listed there, with a
+    'retryAfter' hint; only when none resolved is the error raised (a 503).
+
+    With stream=True the response is NDJSON: one {"type": "ingredient"} line per
+    ingredient as soon as it is resolved, then a {"type": "summary"} line with the
+    total, the unresolved names and the time to first item and to completion.
     """
     from app.functions.recipe_functions import get_recipe_ingredients  # Avoid circular import
 
@@ -253,102 +420,305 @@ def kroger_recipe_ingredients_info(recipe_id):
     if not access_token:
         return jsonify({'error': 'Failed to get Kroger access token'}), 500
 
+    # Collapse duplicates ("salt" listed twice, "egg" and "eggs") into one lookup per canonical
+    # name; Kroger is searched with the lightly cleaned term and the recipe's own name is shown
+    lookups = {}
+    for ingredient in ingredients["ingredients"]:
+        if ingredient["name"] and normalize_ingredient(ingredient["name"]):
+            lookups.setdefault(normalize_ingredient(ingredient["name"]), ingredient["name"])
+    ingredient_names = list(lookups.values())
+
+    if stream:
+        return Response(
+            _stream_recipe_ingredients(ingredient_names, access_token, location_id),
+            mimetype='application/x-ndjson',
+            headers={'X-Accel-Buffering': 'no'}  # Don't let a proxy hold lines back
+        )
+
+    # Resolve ingredients in parallel, but never wait past the overall deadline
+    executor = ThreadPoolExecutor(max_workers=max(1, min(KROGER_INGREDIENT_CONCURRENCY, len(ingredient_names))))
+    futures = [
+        submit_in_context(executor, get_kroger_product_details, ingredient_search_term(ingredient_name),
+                          access_token, location_id)
+        for ingredient_name in ingredient_names
+    ]
+    done, not_done = wait(futures, timeout=KROGER_RECIPE_DEADLINE)
+    executor.shutdown(wait=False, cancel_futures=True)
+
     kroger_ingredients = []
+    unresolved = []
     total_price = 0
+    upstream_error = None
+
+    for ingredient_name, future in zip(ingredient_names, futures):
+        try:
+            product_details = future.result() if future in done else None
+        except UpstreamUnavailable as e:
+            # Ingredients served from the stale cache are still worth returning
+            upstream_error = e
+            product_details = None
+
+        if product_details:
+            # Coalesced lookups share one dict; copy it before naming it after this recipe's ingredient
+            kroger_ingredients.append(dict(product_details, name=ingredient_name))
+            total_price += _ingredient_price(product_details)
+        else:
+            unresolved.append(ingredient_name)
+
+    if upstream_error is not None and not kroger_ingredients:
+        raise upstream_error
+
+    response = {
+        'ingredients': kroger_ingredients,
+        'totalPrice': round(total_price, 2),
+        'unresolved': unresolved,
+        'timedOut': bool(not_done)
+    }
+    if upstream_error is not None:
+        response['retryAfter'] = upstream_error.retry_after
+    return jsonify(response)
 
-    for ingredient in ingredients["ingredients"]:
-        if ingredient["name"]:
-            new_ingredient_name = ingredient["name"]
-            # Remove any variation of "additional toppings: "
-            if "additional toppings: " in new_ingredient_name.lower():
-                new_ingredient_name = new_ingredient_name.split("additional toppings: ")[-1]
-                prefix = new_ingredient_name.split("additional toppings: ")[0]
-                if prefix and prefix.strip():
-                    new_ingredient_name = prefix.strip() + " " + new_ingredient_name
-
-            # Get Kroger product details for this ingredient
-            product_details = get_kroger_product_details(new_ingredient_name, access_token)
-
-            if product_details:
-                kroger_ingredients.append(product_details)
-                # Add the price of the first item variant to the total
-                if product_details['items'] and 'price' in product_details['items'][0]:
-                    total_price += product_details['items'][0]['price'].get('regular', 0)
+def _ingredient_price(product_details):
+    """
+    Price of the first item variant of a matched ingredient, used for recipe totals.
+    """
+    if product_details['items'] and 'price' in product_details['items'][0]:
+        return product_details['items'][0]['price'].get('regular', 0) or 0
+    return 0
 
-    return jsonify({
-        'ingredients': kroger_ingredients,
-        'totalPrice': round(total_price, 2)
-    })
+def _stream_recipe_ingredients(ingredient_names, access_token, location_id):
+    """
+    Yield one NDJSON line per ingredient as soon as its lookup finishes, followed by
+    a summary line with the total price, unresolved names and timings.
+    """
+    started = time.monotonic()
+    first_item_ms = None
+    timed_out = False
+    retry_after = None
+    resolved = set()
+    total_price = 0
 
-def get_product_details(product_id):
+    executor = ThreadPoolExecutor(max_workers=max(1, min(KROGER_INGREDIENT_CONCURRENCY, len(ingredient_names))))
+    future_names = {
+        submit_in_context(executor, get_kroger_product_details, ingredient_search_term(ingredient_name),
+                          access_token, location_id): ingredient_name
+        for ingredient_name in ingredient_names
+    }
+    try:
+        for future in as_completed(future_names, timeout=KROGER_RECIPE_DEADLINE):
+            try:
+                product_details = future.result()
+            except UpstreamUnavailable as e:
+                # The status line is already sent; report the ingredient as unresolved instead of a 503
+                retry_after = max(retry_after or 0, e.retry_after)
+                continue
+            if not product_details:
+                continue
+            if first_item_ms is None:
+                first_item_ms = round((time.monotonic() - started) * 1000, 1)
+            resolved.add(future_names[future])
+            total_price += _ingredient_price(product_details)
+            yield json.dumps({'type': 'ingredient', 'ingredient': dict(product_details, name=future_names[future])}) + '\n'
+    except FuturesTimeoutError:
+        timed_out = True
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    summary = {
+        'type': 'summary',
+        'totalPrice': round(total_price, 2),
+        'unresolved': [ingredient_name for ingredient_name in ingredient_names if ingredient_name not in resolved],
+        'timedOut': timed_out,
+        'timing': {
+            'firstItemMs': first_item_ms,
+            'totalMs': round((time.monotonic() - started) * 1000, 1)
+        }
+    }
+    if retry_after is not None:
+        summary['retryAfter'] = retry_after
+    yield json.dumps(summary) + '\n'
+
+def get_product_details(product_id, location_id=LOCATION_ID):
     """
     Get detailed information for a specific product from the Kroger API by product ID.
     
     Args:
         product_id (str): The Kroger product ID
+        location_id (str): The Kroger store to price the product at
         
     Returns:
         dict: Product details or None if not found
     """
     try:
-        # Get access token
-        access_token = get_access_token()
-        if not access_token:
-            return {"error": "Failed to get Kroger access token"}, 500
-            
-        # Make API request to get product details
-        product_url = f"https://api.kroger.com/v1/products/{product_id}?filter.locationId={LOCATION_ID}"
-        headers = {
-            'Accept': 'application/json',
-            'Authorization': f'Bearer {access_token}'
-        }
-        
-        product_response = requests.get(product_url, headers=headers)
-        product_response.raise_for_status()
-        product_data = product_response.json()
-        
-        if not product_data.get('data'):
-            return {"error": "Product not found"}, 404
-            
-        product = product_data['data']
+        product = get_cached_product(product_id, location_id)
+        if product is None:
+            # Get access token
+            access_token = get_access_token()
+            if not access_token:
+                return {"error": "Failed to get Kroger access token"}, 500
+
+            # Make API request to get product details
+            product_url = f"https://api.kroger.com/v1/products/{product_id}?filter.locationId={location_id}"
+            headers = {
+                'Accept': 'application/json',
+                'Authorization': f'Bearer {access_token}'
+            }
+
+            try:
+                product_response = _kroger_get(product_url, headers)
+            except CircuitOpenError:
+                product = _stale_product(product_id, location_id)
+                if product is None:
+                    raise
+            else:
+                product_response.raise_for_status()
+                product_data = product_response.json()
+
+                if not product_data.get('data'):
+                    return {"error": "Product not found"}, 404
+
+                product = product_data['data']
+                cache_product(product, location_id)
         
         # Format the response
-        product_info = {
-            'productId': product.get('productId', 'N/A'),
-            'upc': product.get('upc', 'N/A'),
-            'description': product.get('description', 'N/A'),
-            'brand': product.get('brand', 'N/A'),
-            'categories': product.get('categories', ['N/A']),
-            'countryOrigin': product.get('countryOrigin', 'N/A'),
-            'temperature': product.get('temperature', 'N/A'),
-            'images': product.get('images', []),
-            'items': []
-        }
-        
-        # Process items with default values
-        for item in product.get('items', []):
-            item_info = {
-                'itemId': item.get('itemId', 'N/A'),
-                'price': {
-                    'regular': item.get('price', {}).get('regular', 0.0),
-                    'promo': item.get('price', {}).get('promo', None)
-                },
-                'size': item.get('size', 'N/A'),
-                'soldBy': item.get('soldBy', 'N/A'),
-                'inventory': item.get('inventory', {
-                    'status': 'N/A'
-                }),
-                'fulfillment': item.get('fulfillment', {
-                    'status': 'N/A'
-                })
-            }
-            product_info['items'].append(item_info)
-            
+        product_info = kroger_product_for(product, location_id).to_dict()
+
         return product_info, 200
         
     except requests.exceptions.HTTPError as http_err:
         status_code = http_err.response.status_code if hasattr(http_err, 'response') else 502
         return {"error": f"HTTP error occurred: {str(http_err)}"}, status_code
+    except UpstreamUnavailable:
+        raise
     except Exception as e:
-        print(f"Error getting product details: {str(e)}")
-        return {"error": f"Failed to get product details: {str(e)}"}, 500
\ No newline at end of file
+        logger.error("Error getting product details: %s", e)
+        return {"error": f"Failed to get product details: {str(e)}"}, 500
+
+def fetch_products_batch(product_ids, access_token=None, location_id=LOCATION_ID, use_cache=True, record_popularity=True):
+    """
+    Get raw product records for many product IDs with as few Kroger calls as possible.
+
+    Cached products are served locally; the rest are requested KROGER_BATCH_CHUNK_SIZE
+    at a time through the multi-id filter.productId search. Products whose cached static
+    fields are still current only have their prices and inventory written back.
+
+    Args:
+        product_ids (list): Kroger product IDs, without duplicates
+        access_token (str): Kroger access token; fetched when needed if omitted
+        location_id (str): The Kroger store to price the products at
+        use_cache (bool): Set to False to always ask Kroger, e.g. when refreshing prices
+        record_popularity (bool): Count the lookups towards the product cache's popularity;
+            background fetches (price refreshes, warmups) pass False
+
+    Returns:
+        tuple: (products, statuses) where products maps id -> raw record and
+        statuses maps id -> 'ok', 'stale' (served from cache while Kroger is
+        unavailable), 'not_found' or 'error' (also given to malformed ids)
+    """
+    products = {}
+    statuses = {}
+    missing = []
+    cached_static = set()  # ids whose cached static fields are still current
+
+    for product_id in product_ids:
+        if validate_product_id(product_id) != product_id:
+            # Never let a malformed id reach the Kroger query string
+            statuses[product_id] = 'error'
+            continue
+        product, state = lookup_cached_product(product_id, location_id, record_popularity=use_cache and record_popularity)
+        if use_cache and state == 'fresh':
+            products[product_id] = product
+            statuses[product_id] = 'ok'
+            continue
+        if state is not None:
+            cached_static.add(product_id)
+        missing.append(product_id)
+
+    if not missing:
+        return products, statuses
+
+    access_token = access_token or get_access_token()
+    if not access_token:
+        for product_id in missing:
+            statuses[product_id] = 'error'
+        return products, statuses
+
+    headers = {
+        'Accept': 'application/json',
+        'Authorization': f'Bearer {access_token}'
+    }
+
+    for start in range(0, len(missing), KROGER_BATCH_CHUNK_SIZE):
+        chunk = missing[start:start + KROGER_BATCH_CHUNK_SIZE]
+        params = {
+            'filter.productId': ','.join(chunk),
+            'filter.locationId': location_id,
+            'filter.limit': len(chunk)
+        }
+        try:
+            response = _kroger_get("https://api.kroger.com/v1/products", headers, params=params)
+            response.raise_for_status()
+            found = {product['productId']: product for product in response.json().get('data', [])}
+        except CircuitOpenError:
+            # Price refreshes (use_cache=False) must not be answered from the cache
+            if not use_cache:
+                raise
+            for product_id in chunk:
+                product = _stale_product(product_id, location_id)
+                if product is not None:
+                    products[product_id] = product
+                    statuses[product_id] = 'stale'
+                else:
+                    statuses[product_id] = 'error'
+            continue
+        except UpstreamUnavailable:
+            raise
+        except Exception as e:
+            logger.error("Error fetching Kroger product batch: %s", e)
+            for product_id in chunk:
+                statuses[product_id] = 'error'
+            continue
+
+        # Only the prices of products cached in full need refreshing; the rest are stored whole
+        cache_product_prices([found[product_id] for product_id in found if product_id in cached_static], location_id)
+        cache_products([found[product_id] for product_id in found if product_id not in cached_static], location_id)
+        for product_id in chunk:
+            if product_id in found:
+                products[product_id] = found[product_id]
+                statuses[product_id] = 'ok'
+            else:
+                statuses[product_id] = 'not_found'
+
+    return products, statuses
+
+def get_products_batch(location_id=LOCATION_ID):
+    """
+    Get details for several Kroger products at once from a comma-separated ids parameter,
+    priced at the given store.
+    """
+    ids_param = request.args.get('ids', '')
+    # Keep the requested order but look each id up only once
+    product_ids = list(dict.fromkeys(product_id.strip() for product_id in ids_param.split(',') if product_id.strip()))
+
+    if not product_ids:
+        return jsonify({'error': 'No product ids provided'}), 400
+    if len(product_ids) > KROGER_BATCH_MAX_IDS:
+        return jsonify({'error': f'Too many product ids (max {KROGER_BATCH_MAX_IDS})'}), 400
+    invalid_ids = [product_id for product_id in product_ids if not validate_product_id(product_id)]
+    if invalid_ids:
+        return jsonify({'error': 'Invalid product ids', 'invalid_ids': invalid_ids}), 400
+
+    products, statuses = fetch_products_batch(product_ids, location_id=location_id)
+
+    result = {}
+    for product_id in product_ids:
+        entry = {'status': statuses.get(product_id, 'error')}
+        if product_id in products:
+            entry['product'] = kroger_product_for(products[product_id], location_id).to_dict()
+        result[product_id] = entry
+
+    return jsonify({
+        'products': result,
+        'count': len(product_ids),
+        'found': len(products)
+    }), 200
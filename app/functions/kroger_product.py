@@ -0,0 +1,140 @@
+# Compact representation of Kroger product payloads.
+#
+# Every Kroger code path (search, product details, recipe ingredient pricing, batch
+# lookups) normalizes raw API records through KrogerProduct, so missing fields get
+# the same defaults everywhere and each endpoint serializes from one place. The
+# classes use __slots__ and keep the raw nested values (images, inventory, ...) by
+# reference instead of rebuilding default dicts per product.
+
+NA = 'N/A'
+# Shared defaults; serialized as-is and never mutated
+_NA_STATUS = {'status': NA}
+_NA_CATEGORIES = (NA,)
+_NO_IMAGES = ()
+
+
+class KrogerItem:
+    """One purchasable variant (size/package) of a Kroger product."""
+
+    __slots__ = ('item_id', 'regular_price', 'promo_price', 'size', 'sold_by', 'inventory', 'fulfillment')
+
+    def __init__(self, item_id=NA, regular_price=0.0, promo_price=None, size=NA, sold_by=NA,
+                 inventory=_NA_STATUS, fulfillment=_NA_STATUS):
+        self.item_id = item_id
+        self.regular_price = regular_price
+        self.promo_price = promo_price
+        self.size = size
+        self.sold_by = sold_by
+        self.inventory = inventory
+        self.fulfillment = fulfillment
+
+    @classmethod
+    def from_payload(cls, item):
+        """Build an item from a raw Kroger item record, defaulting missing fields."""
+        price = item.get('price') or {}
+        return cls(
+            item.get('itemId', NA),
+            price.get('regular', 0.0),
+            price.get('promo'),
+            item.get('size', NA),
+            item.get('soldBy', NA),
+            item.get('inventory', _NA_STATUS),
+            item.get('fulfillment', _NA_STATUS)
+        )
+
+    def to_dict(self):
+        return {
+            'itemId': self.item_id,
+            'price': {
+                'regular': self.regular_price,
+                'promo': self.promo_price
+            },
+            'size': self.size,
+            'soldBy': self.sold_by,
+            'inventory': self.inventory,
+            'fulfillment': self.fulfillment
+        }
+
+
+# Placeholder for products Kroger returns without any items
+DEFAULT_ITEM = KrogerItem()
+
+
+class KrogerProduct:
+    """A Kroger product with its items, normalized from a raw API record."""
+
+    __slots__ = ('product_id', 'upc', 'description', 'brand', 'categories', 'country_origin',
+                 'temperature', 'images', 'items')
+
+    def __init__(self, product_id=NA, upc=NA, description=NA, brand=NA, categories=_NA_CATEGORIES,
+                 country_origin=NA, temperature=NA, images=_NO_IMAGES, items=()):
+        self.product_id = product_id
+        self.upc = upc
+        self.description = description
+        self.brand = brand
+        self.categories = categories
+        self.country_origin = country_origin
+        self.temperature = temperature
+        self.images = images
+        self.items = items
+
+    @classmethod
+    def from_payload(cls, product):
+        """
+        Build a product from a raw Kroger product record.
+
+        Args:
+            product (dict): A record from the /products endpoints (may be partial)
+
+        Returns:
+            KrogerProduct: The normalized product
+        """
+        get = product.get
+        return cls(
+            get('productId', NA),
+            get('upc', NA),
+            get('description', NA),
+            get('brand', NA),
+            get('categories', _NA_CATEGORIES),
+            get('countryOrigin', NA),
+            get('temperature', NA),
+            get('images', _NO_IMAGES),
+            tuple(KrogerItem.from_payload(item) for item in get('items', ()))
+        )
+
+    @classmethod
+    def from_search_hit(cls, search_product):
+        """Minimal product built from the identifying fields of a search hit, used when its details fail."""
+        get = search_product.get
+        return cls(get('productId', NA), description=get('description', NA), brand=get('brand', NA))
+
+    @property
+    def regular_price(self):
+        """Regular price of the first item, used for recipe totals."""
+        return (self.items[0].regular_price or 0) if self.items else 0
+
+    def to_dict(self, default_item=False):
+        """
+        Serialize for an API response.
+
+        Args:
+            default_item (bool): Add a placeholder item when the product has none
+        """
+        items = self.items or ((DEFAULT_ITEM,) if default_item else ())
+        return {
+            'productId': self.product_id,
+            'upc': self.upc,
+            'description': self.description,
+            'brand': self.brand,
+            'categories': self.categories,
+            'countryOrigin': self.country_origin,
+            'temperature': self.temperature,
+            'images': self.images,
+            'items': [item.to_dict() for item in items]
+        }
+
+    def to_ingredient_dict(self, ingredient_name):
+        """Serialize as the Kroger match for a recipe ingredient."""
+        product_info = {'name': ingredient_name}
+        product_info.update(self.to_dict())
+        return product_info
\ No newline at end of file
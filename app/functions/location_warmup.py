@@ -0,0 +1,65 @@
+import os
+import time
+import threading
+from app.functions.product_cache import hot_product_ids
+from app.functions.kroger_functions import fetch_products_batch
+from app.functions.app_logging import get_logger
+
+logger = get_logger(__name__)
+
+# When a store is seen for the first time in this process, prefetch the products
+# that are most popular across all stores so its first users hit a warm cache.
+LOCATION_WARMUP_PRODUCTS = int(os.getenv('LOCATION_WARMUP_PRODUCTS', 100))
+
+_lock = threading.Lock()
+_warmed_locations = set()
+_stats = {'locations_warmed': 0, 'products_warmed': 0, 'failures': 0, 'last_duration_ms': None}
+
+def _warm_location(location_id, product_ids):
+    started = time.monotonic()
+    try:
+        # Warmups must not count towards the popularity that picks the products to warm
+        products, _ = fetch_products_batch(product_ids, location_id=location_id, record_popularity=False)
+    except Exception as e:
+        logger.warning("Error warming product cache for location %s: %s", location_id, e)
+        with _lock:
+            _stats['failures'] += 1
+            # Allow a later request to try again
+            _warmed_locations.discard(location_id)
+        return
+
+    with _lock:
+        _stats['locations_warmed'] += 1
+        _stats['products_warmed'] += len(products)
+        _stats['last_duration_ms'] = round((time.monotonic() - started) * 1000, 1)
+
+def ensure_location_warm(location_id):
+    """
+    Start a background warmup of the product cache for a store not seen before.
+    """
+    with _lock:
+        if location_id in _warmed_locations:
+            return
+
+    product_ids = hot_product_ids(LOCATION_WARMUP_PRODUCTS)
+    if not product_ids:
+        # Nothing has been requested yet; leave the store unmarked so a later request warms it
+        return
+
+    with _lock:
+        if location_id in _warmed_locations:
+            return
+        _warmed_locations.add(location_id)
+    threading.Thread(
+        target=_warm_location,
+        args=(location_id, product_ids),
+        name=f'warmup-{location_id}',
+        daemon=True
+    ).start()
+
+def location_warmup_stats():
+    """Return warmup counters for the metrics endpoint."""
+    with _lock:
+        stats = dict(_stats)
+        stats['known_locations'] = len(_warmed_locations)
+    return stats
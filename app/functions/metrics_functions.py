@@ -0,0 +1,36 @@
+from flask import jsonify
+from app.functions.kroger_functions import kroger_token_manager
+from app.functions.product_cache import product_cache_stats
+from app.functions.ingredient_mapping import ingredient_mapping_stats
+from app.functions.upstream_client import upstream_stats
+from app.functions.location_warmup import location_warmup_stats
+from app.functions.cart_price_refresher import cart_price_refresher_stats
+from app.functions.single_flight import single_flight_stats
+from app.functions.product_autocomplete import autocomplete_stats
+from app.functions.recipe_cache import recipe_cache_stats
+from app.functions.recipe_functions import complex_search_cache_stats
+from app.functions.recipe_reservoir import recipe_reservoir_stats
+from app.functions.allergen_index import allergen_index_stats
+from app.functions.nutrition_filter import nutrition_filter_stats
+from app.functions.app_logging import logging_stats
+
+def get_metrics():
+    """
+    Collect runtime counters for the upstream integrations.
+    """
+    return jsonify({
+        'kroger_token': kroger_token_manager.stats(),
+        'product_cache': product_cache_stats(),
+        'ingredient_mapping': ingredient_mapping_stats(),
+        'upstreams': upstream_stats(),
+        'location_warmup': location_warmup_stats(),
+        'cart_price_refresher': cart_price_refresher_stats(),
+        'coalescing': single_flight_stats(),
+        'autocomplete': autocomplete_stats(),
+        'recipe_cache': recipe_cache_stats(),
+        'complex_search_cache': complex_search_cache_stats(),
+        'random_recipe_reservoir': recipe_reservoir_stats(),
+        'allergen_index': allergen_index_stats(),
+        'nutrition_filter': nutrition_filter_stats(),
+        'logging': logging_stats()
+    }), 200
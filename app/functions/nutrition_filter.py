@@ -0,0 +1,170 @@
+import os
+import threading
+import numpy as np
+from collections import OrderedDict
+from app.functions.preference_options import NUTRITION_GOALS
+
+# Local nutrition-goal filtering of recipes.
+#
+# A user's nutrition goals (names of NUTRITION_GOALS entries) are compiled once into
+# per-nutrient [min, max] bounds. A batch of recipes is screened by reading the
+# goal nutrients out of each recipe's nutrition block by name into one NumPy
+# matrix and comparing it against the bounds in a single vectorized step.
+# Recipes without nutrition data, or without a value for a nutrient, pass on
+# that nutrient; Spoonacular only includes nutrition when asked to.
+
+# Goal parameter -> (Spoonacular nutrient name, bound it sets)
+GOAL_PARAM_NUTRIENTS = {
+    'minCalories': ('Calories', 'min'),
+    'maxCalories': ('Calories', 'max'),
+    'minProtein': ('Protein', 'min'),
+    'maxProtein': ('Protein', 'max'),
+    'minCarbs': ('Carbohydrates', 'min'),
+    'maxCarbs': ('Carbohydrates', 'max'),
+    'minFat': ('Fat', 'min'),
+    'maxFat': ('Fat', 'max'),
+    'minFiber': ('Fiber', 'min'),
+    'maxFiber': ('Fiber', 'max')
+}
+
+# Compiled goal sets kept, keyed by the goals they were compiled from
+NUTRITION_FILTER_CACHE_SIZE = int(os.getenv('NUTRITION_FILTER_CACHE_SIZE', 256))
+
+_GOALS_BY_NAME = {goal['name'].lower(): goal for goal in NUTRITION_GOALS.values()}
+_lock = threading.Lock()
+_compiled = OrderedDict()  # goal key -> NutritionFilter, least recently used first
+
+
+def _resolve_goal(goal):
+    """
+    Return the NUTRITION_GOALS entry for a stored goal.
+
+    Preferences store the goal's display name ('Low Carb', see add_nutrition_goals);
+    a goal key ('low_carb') is accepted too.
+    """
+    if not isinstance(goal, str):
+        return None
+    key = goal.strip().lower()
+    return _GOALS_BY_NAME.get(key) or NUTRITION_GOALS.get(key.replace(' ', '_'))
+
+
+def nutrition_goal_params(goals):
+    """
+    Merge a user's nutrition goals into one set of Spoonacular parameters.
+
+    Goals are applied in order and a later goal's value for a parameter replaces an
+    earlier one, as /recipes has always done.
+
+    Args:
+        goals (list): The user's stored nutrition goal names
+
+    Returns:
+        dict: e.g. {'maxCarbs': 50, 'minProtein': 20}
+    """
+    params = {}
+    for goal in goals or ():
+        resolved = _resolve_goal(goal)
+        if resolved is not None:
+            params.update(resolved['params'])
+    return params
+
+
+class NutritionFilter:
+    """Per-nutrient bounds compiled from a set of nutrition goals."""
+
+    def __init__(self, params):
+        bounds = {}
+        for param, value in params.items():
+            if param not in GOAL_PARAM_NUTRIENTS:
+                continue
+            nutrient, side = GOAL_PARAM_NUTRIENTS[param]
+            bounds.setdefault(nutrient, [-np.inf, np.inf])[0 if side == 'min' else 1] = float(value)
+
+        self.nutrients = tuple(sorted(bounds))
+        self._columns = {nutrient: column for column, nutrient in enumerate(self.nutrients)}
+        self.lower = np.array([bounds[nutrient][0] for nutrient in self.nutrients], dtype=np.float64)
+        self.upper = np.array([bounds[nutrient][1] for nutrient in self.nutrients], dtype=np.float64)
+
+    def __bool__(self):
+        return bool(self.nutrients)
+
+    def nutrient_matrix(self, recipes):
+        """Return a (recipes x goal nutrients) array of amounts, NaN where a value is missing."""
+        values = np.full((len(recipes), len(self.nutrients)), np.nan)
+        columns = self._columns
+        rows, cols, amounts = [], [], []
+        for row, recipe in enumerate(recipes):
+            nutrition = recipe.get('nutrition')
+            if not nutrition:
+                continue
+            for nutrient in nutrition.get('nutrients') or ():
+                column = columns.get(nutrient.get('name'))
+                if column is not None:
+                    rows.append(row)
+                    cols.append(column)
+                    amounts.append(nutrient.get('amount'))
+        if rows:
+            # One scatter into the matrix; None amounts become NaN
+            values[rows, cols] = np.array(amounts, dtype=np.float64)
+        return values
+
+    def mask(self, recipes):
+        """
+        Evaluate the goals for a batch of recipes.
+
+        Returns:
+            numpy.ndarray: One bool per recipe, True when it meets every goal
+        """
+        if not self.nutrients:
+            return np.ones(len(recipes), dtype=bool)
+        return self.evaluate(self.nutrient_matrix(recipes))
+
+    def evaluate(self, values):
+        """Return one bool per row of a nutrient_matrix(), True when it is within every bound."""
+        # Comparisons with NaN are False, so missing values never fail a bound
+        return ~((values < self.lower) | (values > self.upper)).any(axis=1)
+
+    def bounds(self):
+        """Return the compiled bounds as {nutrient: {'min': ..., 'max': ...}}."""
+        return {
+            nutrient: {
+                'min': None if np.isinf(low) else float(low),
+                'max': None if np.isinf(high) else float(high)
+            }
+            for nutrient, low, high in zip(self.nutrients, self.lower, self.upper)
+        }
+
+
+def compile_nutrition_goals(goals):
+    """
+    Return the shared NutritionFilter for a user's nutrition goals.
+
+    Args:
+        goals (list): The user's stored nutrition goals
+
+    Returns:
+        NutritionFilter: Falsy when the goals set no bounds
+    """
+    params = nutrition_goal_params(goals)
+    key = tuple(sorted(params.items()))
+    with _lock:
+        compiled = _compiled.get(key)
+        if compiled is not None:
+            _compiled.move_to_end(key)
+            return compiled
+
+    compiled = NutritionFilter(params)
+    with _lock:
+        _compiled[key] = compiled
+        if len(_compiled) > NUTRITION_FILTER_CACHE_SIZE:
+            _compiled.popitem(last=False)
+    return compiled
+
+
+def nutrition_filter_stats():
+    """Return the number of compiled goal sets for the metrics endpoint."""
+    with _lock:
+        return {
+            'compiled_goal_sets': len(_compiled),
+            'max_goal_sets': NUTRITION_FILTER_CACHE_SIZE
+        }
\ No newline at end of file
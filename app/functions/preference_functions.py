@@ -1,69 +1,12 @@
+import re
 from flask import jsonify, request
 from app import user_preferences_collection
 from app.functions.auth_functions import token_required
+from app.functions.kroger_functions import LOCATION_ID
+from app.functions.preference_options import ALLOWED_DIETS, ALLOWED_INTOLERANCES, ALLOWED_CUISINES, NUTRITION_GOALS
 
-# Diet Preferences
-ALLOWED_DIETS = {
-    'gluten free': 'Gluten Free',
-    'ketogenic': 'Ketogenic',
-    'vegetarian': 'Vegetarian',
-    'lacto-vegetarian': 'Lacto-Vegetarian',
-    'ovo-vegetarian': 'Ovo-Vegetarian',
-    'vegan': 'Vegan',
-    'pescetarian': 'Pescetarian',
-    'paleo': 'Paleo',
-    'primal': 'Primal',
-    'low fodmap': 'Low FODMAP',
-    'whole30': 'Whole30'
-}
-
-# Intolerances
-ALLOWED_INTOLERANCES = {
-    'dairy', 'egg', 'gluten', 'peanut', 'sesame',
-    'seafood', 'shellfish', 'soy', 'tree nut', 'wheat'
-}
-
-# Cuisines
-ALLOWED_CUISINES = {
-    "African", "American", "British", "Cajun", "Caribbean",
-    "Chinese", "Eastern European", "French", "German", "Greek",
-    "Indian", "Irish", "Italian", "Japanese", "Jewish", "Korean",
-    "Latin American", "Mediterranean", "Mexican", "Middle Eastern",
-    "Nordic", "Southern", "Spanish", "Thai", "Vietnamese"
-}
-
-NUTRITION_GOALS = {
-    'low_carb': {
-        'name': 'Low Carb',
-        'params': {
-            'maxCarbs': 50,  # Maximum 50g carbs per serving
-            'minProtein': 20  # Ensure adequate protein
-        }
-    },
-    'high_protein': {
-        'name': 'High Protein',
-        'params': {
-            'minProtein': 30,  # Minimum 30g protein per serving
-            'maxFat': 30  # Limit fat for lean protein focus
-        }
-    },
-    'low_calorie': {
-        'name': 'Low Calorie',
-        'params': {
-            'maxCalories': 500,  # Maximum 500 calories per serving
-            'minProtein': 15  # Ensure adequate protein
-        }
-    },
-    'balanced': {
-        'name': 'Balanced',
-        'params': {
-            'minProtein': 20,
-            'maxFat': 30,
-            'maxCarbs': 60,
-            'minFiber': 5
-        }
-    }
-}
+# Kroger store IDs are 8 alphanumeric characters, e.g. '01400943'
+LOCATION_ID_PATTERN = re.compile(r'^[A-Za-z0-9]{8}$')
 
 def validate_diet(input_diet):
     lower_diet = input_diet.strip().lower()
@@ -77,6 +20,12 @@ def validate_cuisine(input_cuisine):
     title_cuisine = input_cuisine.strip().title()
     return title_cuisine if title_cuisine in ALLOWED_CUISINES else None
 
+def validate_location_id(input_location_id):
+    if not isinstance(input_location_id, str):
+        return None
+    location_id = input_location_id.strip()
+    return location_id if LOCATION_ID_PATTERN.match(location_id) else None
+
 # Diet Endpoints
 def get_diets(current_user):
     prefs = user_preferences_collection.find_one({'email': current_user['email']})
@@ -395,4 +344,44 @@ def remove_nutrition_goals(current_user):
     return jsonify({
         'message': 'Nutrition goals removed successfully',
         'removed_goals': validated_goals
+    }), 200
+
+def get_user_location_id(current_user):
+    """Return the Kroger store the user prices against, or the default store"""
+    prefs = user_preferences_collection.find_one({'email': current_user['email']}, {'location_id': 1})
+    return (prefs or {}).get('location_id') or LOCATION_ID
+
+# Store Location Endpoints
+def get_location(current_user):
+    """Get the user's Kroger store"""
+    prefs = user_preferences_collection.find_one({'email': current_user['email']})
+    location_id = prefs.get('location_id') if prefs else None
+    return jsonify({
+        'location_id': location_id or LOCATION_ID,
+        'is_default': not location_id
+    }), 200
+
+def set_location(current_user):
+    """Set the user's Kroger store"""
+    data = request.json
+    if not data or not data.get('location_id'):
+        return jsonify({'message': 'Missing location_id field'}), 400
+
+    location_id = validate_location_id(data['location_id'])
+    if not location_id:
+        return jsonify({'message': 'Invalid location_id. Expected an 8 character Kroger store ID'}), 400
+
+    user_preferences_collection.update_one(
+        {'email': current_user['email']},
+        {'$set': {'location_id': location_id}},
+        upsert=True
+    )
+
+    # Avoid circular import: the warmup pulls in the Kroger client
+    from app.functions.location_warmup import ensure_location_warm
+    ensure_location_warm(location_id)
+
+    return jsonify({
+        'message': 'Location updated successfully',
+        'location_id': location_id
     }), 200
\ No newline at end of file
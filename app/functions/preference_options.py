@@ -0,0 +1,68 @@
+# Preference values users can choose from.
+#
+# Plain data with no imports, so modules that only need the allowed values (the
+# allergen index, the nutrition filter, the benchmarks) can use them without the
+# database-backed preference_functions.
+
+# Diet Preferences
+ALLOWED_DIETS = {
+    'gluten free': 'Gluten Free',
+    'ketogenic': 'Ketogenic',
+    'vegetarian': 'Vegetarian',
+    'lacto-vegetarian': 'Lacto-Vegetarian',
+    'ovo-vegetarian': 'Ovo-Vegetarian',
+    'vegan': 'Vegan',
+    'pescetarian': 'Pescetarian',
+    'paleo': 'Paleo',
+    'primal': 'Primal',
+    'low fodmap': 'Low FODMAP',
+    'whole30': 'Whole30'
+}
+
+# Intolerances
+ALLOWED_INTOLERANCES = {
+    'dairy', 'egg', 'gluten', 'peanut', 'sesame',
+    'seafood', 'shellfish', 'soy', 'tree nut', 'wheat'
+}
+
+# Cuisines
+ALLOWED_CUISINES = {
+    "African", "American", "British", "Cajun", "Caribbean",
+    "Chinese", "Eastern European", "French", "German", "Greek",
+    "Indian", "Irish", "Italian", "Japanese", "Jewish", "Korean",
+    "Latin American", "Mediterranean", "Mexican", "Middle Eastern",
+    "Nordic", "Southern", "Spanish", "Thai", "Vietnamese"
+}
+
+NUTRITION_GOALS = {
+    'low_carb': {
+        'name': 'Low Carb',
+        'params': {
+            'maxCarbs': 50,  # Maximum 50g carbs per serving
+            'minProtein': 20  # Ensure adequate protein
+        }
+    },
+    'high_protein': {
+        'name': 'High Protein',
+        'params': {
+            'minProtein': 30,  # Minimum 30g protein per serving
+            'maxFat': 30  # Limit fat for lean protein focus
+        }
+    },
+    'low_calorie': {
+        'name': 'Low Calorie',
+        'params': {
+            'maxCalories': 500,  # Maximum 500 calories per serving
+            'minProtein': 15  # Ensure adequate protein
+        }
+    },
+    'balanced': {
+        'name': 'Balanced',
+        'params': {
+            'minProtein': 20,
+            'maxFat': 30,
+            'maxCarbs': 60,
+            'minFiber': 5
+        }
+    }
+}
\ No newline at end of file
@@ -0,0 +1,302 @@
+import os
+import re
+import time
+import heapq
+import threading
+from bisect import bisect_left, insort
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from flask import jsonify, request
+from app.functions.app_logging import get_logger
+
+logger = get_logger(__name__)
+
+# In-memory prefix index over the descriptions and brands of products we have cached.
+#
+# Every product stored in the product cache is indexed here, so search-box
+# autocomplete is answered locally without a Kroger round trip. The index is a
+# sorted list of (key, product_id, word_position) tuples searched with bisect; each
+# description contributes one key per word start ("kroger whole milk", "whole milk",
+# "milk") so typing any word of it matches. Memory is bounded by evicting the least
+# recently indexed products. Matches are ranked by word position, then by how often
+# the product has been requested (the product cache's popularity counter).
+#
+# A selective prefix matches few entries, which are ranked directly. A common prefix
+# ("m", "mi", "milk") can match tens of thousands, so its top AUTOCOMPLETE_MAX_LIMIT
+# products are ranked in the background and kept; such a query only reads that list.
+# Ranked lists are redone once they are older than AUTOCOMPLETE_RANK_TTL, so newly
+# indexed products and popularity changes show up for common prefixes within that
+# window, and the AUTOCOMPLETE_RANKED_PREFIXES most recently used are kept.
+AUTOCOMPLETE_MAX_PRODUCTS = int(os.getenv('AUTOCOMPLETE_MAX_PRODUCTS', 20000))
+AUTOCOMPLETE_DEFAULT_LIMIT = 8
+AUTOCOMPLETE_MAX_LIMIT = 20
+# Word starts indexed per description, and most matching entries ranked directly per query
+AUTOCOMPLETE_MAX_WORDS = 8
+AUTOCOMPLETE_MAX_SCAN = int(os.getenv('AUTOCOMPLETE_MAX_SCAN', 64))
+# Common prefixes whose ranked top products are kept, and seconds before they are re-ranked
+AUTOCOMPLETE_RANKED_PREFIXES = int(os.getenv('AUTOCOMPLETE_RANKED_PREFIXES', 4096))
+AUTOCOMPLETE_RANK_TTL = int(os.getenv('AUTOCOMPLETE_RANK_TTL', 60))
+
+_WORD_RE = re.compile(r'[a-z0-9]+')
+# Sorts after every character, so (prefix + _MAX_CHAR,) bounds the keys starting with prefix
+_MAX_CHAR = '\U0010ffff'
+
+_rank_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='autocomplete-rank')
+_RANK_CHUNK = 1024  # index entries ranked between GIL releases
+
+
+def _normalize(text):
+    return ' '.join(_WORD_RE.findall(text.casefold()))
+
+
+class ProductPrefixIndex:
+    """
+    Thread-safe, size-bounded prefix index of product descriptions and brands.
+
+    Args:
+        max_products (int): Products kept before the least recently indexed is evicted
+        popularity (callable): Returns {product_id: request count} for a list of ids, used
+            to rank matches; matches are ranked without it if omitted
+    """
+
+    def __init__(self, max_products=20000, popularity=None):
+        self.max_products = max_products
+        self._popularity = popularity
+        self._ranked = OrderedDict()  # common prefix -> (ranked_at, top product ids), least recently used first
+        self._ranking = set()  # prefixes with a ranking queued
+        self._lock = threading.Lock()
+        self._entries = []  # sorted (key, product_id, word_position)
+        self._products = OrderedDict()  # product_id -> (description, brand, keys)
+        self._latencies = deque(maxlen=1000)
+        self._queries = 0
+        self._evictions = 0
+
+    @staticmethod
+    def _keys(description, brand):
+        keys = []
+        words = _normalize(description).split()
+        for position in range(min(len(words), AUTOCOMPLETE_MAX_WORDS)):
+            keys.append((' '.join(words[position:]), position))
+        brand_key = _normalize(brand)
+        if brand_key:
+            # Rank brand matches after matches on the start of the description
+            keys.append((brand_key, 1))
+        return keys
+
+    def add(self, product_id, description, brand=''):
+        """Index one product, replacing its previous entry."""
+        if not product_id or not description:
+            return
+        with self._lock:
+            existing = self._products.get(product_id)
+            if existing is not None and existing[0] == description and existing[1] == brand:
+                self._products.move_to_end(product_id)
+                return
+            if existing is not None:
+                self._remove_locked(product_id)
+
+            keys = self._keys(description, brand)
+            for key, position in keys:
+                insort(self._entries, (key, product_id, position))
+            self._products[product_id] = (description, brand, keys)
+
+            while len(self._products) > self.max_products:
+                self._remove_locked(next(iter(self._products)))
+                self._evictions += 1
+
+    def _remove_locked(self, product_id):
+        _, _, keys = self._products.pop(product_id)
+        for key, position in keys:
+            entry = (key, product_id, position)
+            index = bisect_left(self._entries, entry)
+            if index < len(self._entries) and self._entries[index] == entry:
+                del self._entries[index]
+
+    def _rank(self, candidates, products, limit):
+        """Return the ids of the top limit distinct products among index entries."""
+        best = {}
+        for _, product_id, position in candidates:
+            if position < best.get(product_id, AUTOCOMPLETE_MAX_WORDS):
+                best[product_id] = position
+        popularity = self._popularity(list(best)) if self._popularity else {}
+        return heapq.nsmallest(limit, best, key=lambda product_id: (
+            best[product_id], -popularity.get(product_id, 0), len(products[product_id][0])
+        ))
+
+    def search(self, prefix, limit=AUTOCOMPLETE_DEFAULT_LIMIT):
+        """
+        Return up to limit products whose description or brand has a word starting with prefix.
+
+        Matches at the start of the description come first, then more often requested
+        products, then shorter descriptions.
+        """
+        started = time.perf_counter()
+        prefix = _normalize(prefix)
+        ranked = []
+        candidates = []
+        products = {}
+        rerank = False
+        if prefix:
+            with self._lock:
+                low = bisect_left(self._entries, (prefix,))
+                high = bisect_left(self._entries, (prefix + _MAX_CHAR,), low)
+                ranked_prefix = None
+                if high - low > AUTOCOMPLETE_MAX_SCAN:
+                    ranked_prefix = self._ranked.get(prefix)
+                    if ranked_prefix is not None:
+                        self._ranked.move_to_end(prefix)
+                    rerank = ranked_prefix is None or time.monotonic() - ranked_prefix[0] >= AUTOCOMPLETE_RANK_TTL
+                if ranked_prefix is not None:
+                    ranked = ranked_prefix[1][:limit]
+                else:
+                    # Few enough matches to rank directly; a common prefix not ranked yet
+                    # is answered from its first entries until its ranking is ready
+                    candidates = self._entries[low:min(high, low + AUTOCOMPLETE_MAX_SCAN)]
+                    products = {product_id: self._products[product_id] for _, product_id, _ in candidates}
+
+            if candidates:
+                ranked = self._rank(candidates, products, limit)
+            if rerank:
+                self._schedule_rank(prefix)
+
+        with self._lock:
+            products = {product_id: self._products[product_id] for product_id in ranked if product_id in self._products}
+        # Products evicted since their prefix was ranked are left out until it is ranked again
+        results = [{
+            'productId': product_id,
+            'description': products[product_id][0],
+            'brand': products[product_id][1]
+        } for product_id in ranked if product_id in products]
+
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._queries += 1
+            self._latencies.append(elapsed)
+        return results
+
+    def _schedule_rank(self, prefix):
+        with self._lock:
+            if prefix in self._ranking:
+                return
+            self._ranking.add(prefix)
+        _rank_executor.submit(self.rank_prefix, prefix)
+
+    def rank_prefix(self, prefix):
+        """Rank and keep the top AUTOCOMPLETE_MAX_LIMIT products of a common (normalized) prefix."""
+        try:
+            with self._lock:
+                low = bisect_left(self._entries, (prefix,))
+                high = bisect_left(self._entries, (prefix + _MAX_CHAR,), low)
+                candidates = self._entries[low:high]
+
+            # Work in chunks and yield the GIL in between, so request threads answering
+            # queries are not stalled while a prefix with thousands of matches is ranked
+            best = {}
+            for start in range(0, len(candidates), _RANK_CHUNK):
+                for _, product_id, position in candidates[start:start + _RANK_CHUNK]:
+                    if position < best.get(product_id, AUTOCOMPLETE_MAX_WORDS):
+                        best[product_id] = position
+                time.sleep(0)
+            product_ids = list(best)
+            popularity = self._popularity(product_ids) if self._popularity else {}
+            keyed = []
+            for start in range(0, len(product_ids), _RANK_CHUNK):
+                for product_id in product_ids[start:start + _RANK_CHUNK]:
+                    # Read without the lock; products evicted in the meantime are skipped
+                    product = self._products.get(product_id)
+                    if product is not None:
+                        keyed.append((best[product_id], -popularity.get(product_id, 0), len(product[0]), product_id))
+                time.sleep(0)
+            ranked = [entry[3] for entry in heapq.nsmallest(AUTOCOMPLETE_MAX_LIMIT, keyed)]
+
+            with self._lock:
+                self._ranked[prefix] = (time.monotonic(), ranked)
+                self._ranked.move_to_end(prefix)
+                while len(self._ranked) > AUTOCOMPLETE_RANKED_PREFIXES:
+                    self._ranked.popitem(last=False)
+        except Exception as e:
+            logger.warning("Error ranking autocomplete prefix %r: %s", prefix, e)
+        finally:
+            with self._lock:
+                self._ranking.discard(prefix)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._products)
+
+    def stats(self):
+        """Return index size and query latency statistics."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            stats = {
+                'products': len(self._products),
+                'keys': len(self._entries),
+                'max_products': self.max_products,
+                'evictions': self._evictions,
+                'ranked_prefixes': len(self._ranked),
+                'queries': self._queries
+            }
+        if latencies:
+            stats['latency_us'] = {
+                'avg': round(sum(latencies) / len(latencies) * 1e6, 1),
+                'p50': round(latencies[len(latencies) // 2] * 1e6, 1),
+                'p95': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1e6, 1),
+                'max': round(latencies[-1] * 1e6, 1)
+            }
+        return stats
+
+
+def _product_popularity(product_ids):
+    from app.functions.product_cache import product_popularity  # Avoid circular import
+    return product_popularity(product_ids)
+
+
+_index = ProductPrefixIndex(max_products=AUTOCOMPLETE_MAX_PRODUCTS, popularity=_product_popularity)
+
+
+def index_products(products):
+    """Add raw Kroger product records to the autocomplete index."""
+    for product in products:
+        _index.add(product.get('productId'), product.get('description') or '', product.get('brand') or '')
+
+
+def seed_autocomplete_index():
+    """
+    Fill the index from the MongoDB product cache in the background, so a freshly
+    started process can answer autocomplete queries right away.
+    """
+    def _seed():
+        from app.models.product_cache_model import product_cache_collection  # Avoid circular import
+        try:
+            cursor = product_cache_collection.find(
+                {}, {'product.productId': 1, 'product.description': 1, 'product.brand': 1}
+            ).sort('static_fetched_at', -1).limit(AUTOCOMPLETE_MAX_PRODUCTS)
+            # Oldest first so the most recently cached products are the last to be evicted
+            index_products(reversed([doc.get('product') or {} for doc in cursor]))
+        except Exception as e:
+            logger.warning("Error seeding autocomplete index: %s", e)
+
+    threading.Thread(target=_seed, name='autocomplete-seed', daemon=True).start()
+
+
+def product_autocomplete():
+    """
+    Suggest cached products whose description or brand starts with the 'q' parameter.
+    """
+    prefix = request.args.get('q', '')
+    if not prefix.strip():
+        return jsonify({'error': 'No query provided'}), 400
+
+    limit = request.args.get('limit', AUTOCOMPLETE_DEFAULT_LIMIT, type=int)
+    if limit is None or not 1 <= limit <= AUTOCOMPLETE_MAX_LIMIT:
+        return jsonify({'error': f'limit must be between 1 and {AUTOCOMPLETE_MAX_LIMIT}'}), 400
+
+    return jsonify({
+        'query': prefix,
+        'suggestions': _index.search(prefix, limit)
+    }), 200
+
+
+def autocomplete_stats():
+    """Return index size and query latency for the metrics endpoint."""
+    return _index.stats()
\ No newline at end of file
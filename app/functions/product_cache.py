@@ -0,0 +1,260 @@
+import os
+import copy
+import datetime
+import threading
+from collections import Counter
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+from app.models.product_cache_model import product_cache_collection
+from app.functions.lru_cache import LRUCache
+from app.functions.kroger_product import KrogerProduct
+from app.functions.product_autocomplete import index_products
+from app.functions.app_logging import get_logger
+
+logger = get_logger(__name__)
+
+# Read-through cache for raw Kroger product records, keyed by (productId, locationId).
+# Static fields (description, brand, images, ...) change rarely, while item prices,
+# inventory and fulfillment change often, so each has its own freshness window:
+# cache_products() stores whole records, cache_product_prices() refreshes only the items.
+# LRU entries also hold the record normalized as a KrogerProduct, built once per entry,
+# so responses served from the cache only serialize it (see kroger_product_for()).
+PRODUCT_CACHE_SIZE = int(os.getenv('PRODUCT_CACHE_SIZE', 5000))
+PRODUCT_STATIC_TTL = int(os.getenv('PRODUCT_STATIC_TTL', 7 * 24 * 3600))
+PRODUCT_VOLATILE_TTL = int(os.getenv('PRODUCT_VOLATILE_TTL', 15 * 60))
+# Number of distinct product IDs tracked for popularity (used to warm up new stores)
+PRODUCT_POPULARITY_SIZE = int(os.getenv('PRODUCT_POPULARITY_SIZE', 10000))
+
+_lru = LRUCache(maxsize=PRODUCT_CACHE_SIZE)
+_stats_lock = threading.Lock()
+_stats = {
+    'lru': {'hits': 0, 'misses': 0, 'stale': 0},
+    'mongo': {'hits': 0, 'misses': 0, 'stale': 0, 'errors': 0}
+}
+_popularity = Counter()
+
+def _count(tier, counter):
+    with _stats_lock:
+        _stats[tier][counter] += 1
+
+def _record_popularity(product_id):
+    with _stats_lock:
+        _popularity[product_id] += 1
+        if len(_popularity) > PRODUCT_POPULARITY_SIZE:
+            # Keep the most requested half so the counter stays bounded
+            top = _popularity.most_common(PRODUCT_POPULARITY_SIZE // 2)
+            _popularity.clear()
+            _popularity.update(dict(top))
+
+def hot_product_ids(limit):
+    """Return the most frequently requested product IDs across all stores."""
+    with _stats_lock:
+        return [product_id for product_id, _ in _popularity.most_common(limit)]
+
+def product_popularity(product_ids):
+    """Return {product_id: request count} for the given product IDs that have been requested."""
+    with _stats_lock:
+        return {product_id: _popularity[product_id] for product_id in product_ids if product_id in _popularity}
+
+def _entry(product, static_fetched_at, volatile_fetched_at):
+    return {
+        'product': product,
+        'kroger_product': KrogerProduct.from_payload(product),
+        'static_fetched_at': static_fetched_at,
+        'volatile_fetched_at': volatile_fetched_at
+    }
+
+def _freshness(entry, now):
+    """Classify a cache entry as 'fresh', 'stale' (static fields only) or 'expired'."""
+    if now - entry['static_fetched_at'] >= datetime.timedelta(seconds=PRODUCT_STATIC_TTL):
+        return 'expired'
+    if now - entry['volatile_fetched_at'] >= datetime.timedelta(seconds=PRODUCT_VOLATILE_TTL):
+        return 'stale'
+    return 'fresh'
+
+def lookup_cached_product(product_id, location_id, record_popularity=True):
+    """
+    Look up a raw Kroger product record in the in-process LRU, then in MongoDB.
+
+    Args:
+        product_id (str): The Kroger product ID
+        location_id (str): The Kroger store the prices belong to
+        record_popularity (bool): Count the lookup towards hot_product_ids()
+
+    Returns:
+        tuple: (product, state) where state is 'fresh', 'stale' (prices and inventory
+        are past PRODUCT_VOLATILE_TTL, static fields are still current) or None on a miss
+    """
+    key = (product_id, location_id)
+    now = datetime.datetime.utcnow()
+    if record_popularity:
+        _record_popularity(product_id)
+
+    entry = _lru.get(key)
+    if entry is None:
+        _count('lru', 'misses')
+    else:
+        state = _freshness(entry, now)
+        if state == 'fresh':
+            _count('lru', 'hits')
+            return entry['product'], 'fresh'
+        if state == 'stale':
+            _count('lru', 'stale')
+        else:
+            _count('lru', 'misses')
+            _lru.pop(key)
+
+    try:
+        doc = product_cache_collection.find_one({'product_id': product_id, 'location_id': location_id})
+    except PyMongoError as e:
+        _count('mongo', 'errors')
+        logger.error("Error reading product cache: %s", e)
+        doc = None
+
+    if doc is not None:
+        state = _freshness(doc, now)
+        if state != 'expired':
+            _count('mongo', 'hits' if state == 'fresh' else 'stale')
+            entry = _entry(doc['product'], doc['static_fetched_at'], doc['volatile_fetched_at'])
+            _lru.set(key, entry)
+            return entry['product'], state
+    _count('mongo', 'misses')
+
+    # Fall back to a stale LRU entry if that is all we have
+    if entry is not None and _freshness(entry, now) == 'stale':
+        return entry['product'], 'stale'
+    return None, None
+
+def get_cached_product(product_id, location_id, allow_stale=False):
+    """
+    Look up a raw Kroger product record in the in-process LRU, then in MongoDB.
+
+    Args:
+        product_id (str): The Kroger product ID
+        location_id (str): The Kroger store the prices belong to
+        allow_stale (bool): Also return records whose prices and inventory are past
+            PRODUCT_VOLATILE_TTL (their static fields are still current)
+
+    Returns:
+        dict: The raw product record, or None on a miss
+    """
+    product, state = lookup_cached_product(product_id, location_id)
+    if state == 'fresh' or (allow_stale and state == 'stale'):
+        return product
+    return None
+
+def kroger_product_for(product, location_id):
+    """
+    Return a raw Kroger product record normalized as a KrogerProduct.
+
+    Records returned by the product cache reuse the KrogerProduct built when they
+    were cached; any other record (e.g. one just fetched from Kroger) is normalized here.
+
+    Args:
+        product (dict): A raw product record
+        location_id (str): The Kroger store the record was looked up for
+    """
+    entry = _lru.get((product.get('productId'), location_id))
+    if entry is not None and entry['product'] is product:
+        return entry['kroger_product']
+    return KrogerProduct.from_payload(product)
+
+def cache_products(products, location_id):
+    """
+    Store raw Kroger product records in both cache tiers.
+
+    Args:
+        products (list): Raw product records as returned by the Kroger API
+        location_id (str): The Kroger store the prices belong to
+    """
+    now = datetime.datetime.utcnow()
+    expires_at = now + datetime.timedelta(seconds=PRODUCT_STATIC_TTL)
+    operations = []
+
+    for product in products:
+        product_id = product.get('productId')
+        if not product_id:
+            continue
+        # Callers format the record into their own response dicts, so keep a private copy
+        product = copy.deepcopy(product)
+        _lru.set((product_id, location_id), _entry(product, now, now))
+        operations.append(UpdateOne(
+            {'product_id': product_id, 'location_id': location_id},
+            {'$set': {
+                'product': product,
+                'static_fetched_at': now,
+                'volatile_fetched_at': now,
+                'expires_at': expires_at
+            }},
+            upsert=True
+        ))
+
+    if not operations:
+        return
+    index_products(products)
+    try:
+        product_cache_collection.bulk_write(operations, ordered=False)
+    except PyMongoError as e:
+        _count('mongo', 'errors')
+        logger.error("Error writing product cache: %s", e)
+
+def cache_product_prices(products, location_id):
+    """
+    Refresh only the volatile fields (the items: prices, inventory, fulfillment) of cached products.
+
+    The cached static fields and their static_fetched_at are kept, so a product whose
+    static fields were fetched in full is not overwritten by a compact record and is
+    still refetched once PRODUCT_STATIC_TTL passes. Products that are not cached are
+    left alone; store those with cache_products().
+
+    Args:
+        products (list): Raw product records carrying fresh items
+        location_id (str): The Kroger store the prices belong to
+    """
+    now = datetime.datetime.utcnow()
+    operations = []
+
+    for product in products:
+        product_id = product.get('productId')
+        if not product_id:
+            continue
+        items = copy.deepcopy(product.get('items') or [])
+        key = (product_id, location_id)
+        entry = _lru.get(key)
+        if entry is not None and _freshness(entry, now) != 'expired':
+            _lru.set(key, _entry(dict(entry['product'], items=items), entry['static_fetched_at'], now))
+        operations.append(UpdateOne(
+            {'product_id': product_id, 'location_id': location_id},
+            {'$set': {'product.items': items, 'volatile_fetched_at': now}}
+        ))
+
+    if not operations:
+        return
+    try:
+        product_cache_collection.bulk_write(operations, ordered=False)
+    except PyMongoError as e:
+        _count('mongo', 'errors')
+        logger.error("Error writing product cache prices: %s", e)
+
+def cache_product(product, location_id):
+    """Store a single raw Kroger product record in both cache tiers."""
+    cache_products([product], location_id)
+
+def invalidate_product(product_id, location_id):
+    """Remove a product from both cache tiers."""
+    _lru.pop((product_id, location_id))
+    try:
+        product_cache_collection.delete_one({'product_id': product_id, 'location_id': location_id})
+    except PyMongoError as e:
+        _count('mongo', 'errors')
+        logger.error("Error invalidating product cache: %s", e)
+
+def product_cache_stats():
+    """Return hit/miss/stale counters for each cache tier."""
+    with _stats_lock:
+        stats = {tier: dict(counters) for tier, counters in _stats.items()}
+    stats['lru']['size'] = len(_lru)
+    stats['lru']['max_size'] = PRODUCT_CACHE_SIZE
+    stats['static_ttl_seconds'] = PRODUCT_STATIC_TTL
+    stats['volatile_ttl_seconds'] = PRODUCT_VOLATILE_TTL
+    return stats
@@ -0,0 +1,206 @@
+import os
+import time
+import threading
+import contextvars
+from collections import deque
+from app.functions.upstream_errors import RateLimitExceeded
+
+# Outbound rate limiting for the upstream APIs.
+#
+# Each upstream gets a token bucket refilled at its plan quota. Callers that find the
+# bucket empty wait in a bounded queue; waiting requests are granted slots round-robin
+# across users so one user pricing a long recipe cannot starve everyone else. A caller
+# that cannot get a slot before its deadline gets RateLimitExceeded (a fast 503).
+
+# The user outbound calls are attributed to; reset at the start of every request,
+# set by token_required and copied into worker threads (see context_utils.submit_in_context)
+BACKGROUND_USER = 'background'
+_current_user = contextvars.ContextVar('upstream_user', default=BACKGROUND_USER)
+
+
+def set_upstream_user(user_key):
+    """Attribute the outbound calls made by the current request to user_key (None for background)."""
+    _current_user.set(user_key or BACKGROUND_USER)
+
+
+def _limiter_config(name, rate, burst, max_queue, max_wait):
+    """Read the settings for one upstream, e.g. KROGER_RATE_LIMIT or SPOONACULAR_RATE_QUEUE."""
+    prefix = name.upper()
+    return {
+        'rate': float(os.getenv(f'{prefix}_RATE_LIMIT', rate)),  # requests per second
+        'burst': int(os.getenv(f'{prefix}_RATE_BURST', burst)),
+        'max_queue': int(os.getenv(f'{prefix}_RATE_QUEUE', max_queue)),
+        'max_wait': float(os.getenv(f'{prefix}_RATE_WAIT', max_wait))  # seconds
+    }
+
+
+class _Waiter:
+    __slots__ = ('user_key', 'granted')
+
+    def __init__(self, user_key):
+        self.user_key = user_key
+        self.granted = False
+
+
+class FairRateLimiter:
+    """
+    Token bucket with a bounded, per-user round-robin wait queue.
+
+    A request takes a token immediately when one is available and nobody is
+    queued. Otherwise it joins its user's FIFO queue; each new token goes to the
+    head of the next user's queue in turn.
+    """
+
+    def __init__(self, name, rate, burst, max_queue=100, max_wait=2.0):
+        self.name = name
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+
+        self._cond = threading.Condition()
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._queues = {}  # user_key -> deque of _Waiter
+        self._order = deque()  # users with queued waiters, in round-robin order
+        self._waiting = 0
+
+        self._granted = 0
+        self._queued = 0
+        self._rejected_full = 0
+        self._timed_out = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _refill(self, now):
+        if self.rate > 0:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _retry_after(self):
+        """Seconds until everyone queued now, plus one more caller, would have a slot."""
+        if self.rate <= 0:
+            return self.max_wait or 1
+        return max(0.0, self._waiting + 1 - self._tokens) / self.rate
+
+    def _dispatch(self):
+        """Hand available tokens to queued waiters, one user at a time."""
+        handed = False
+        while self._order and self._tokens >= 1:
+            user_key = self._order[0]
+            queue = self._queues[user_key]
+            waiter = queue.popleft()
+            waiter.granted = True
+            self._tokens -= 1
+            self._waiting -= 1
+            handed = True
+            if queue:
+                self._order.rotate(-1)
+            else:
+                self._order.popleft()
+                del self._queues[user_key]
+        if handed:
+            self._cond.notify_all()
+
+    def _remove(self, waiter):
+        queue = self._queues.get(waiter.user_key)
+        if queue is None:
+            return
+        queue.remove(waiter)
+        self._waiting -= 1
+        if not queue:
+            del self._queues[waiter.user_key]
+            self._order.remove(waiter.user_key)
+
+    def acquire(self, user_key=None, timeout=None):
+        """
+        Take one request slot, waiting up to timeout seconds (default max_wait).
+
+        Raises:
+            RateLimitExceeded: If the queue is full or no slot frees up in time
+        """
+        user_key = user_key or _current_user.get()
+        timeout = self.max_wait if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+
+        with self._cond:
+            self._refill(started)
+            if not self._waiting and self._tokens >= 1:
+                self._tokens -= 1
+                self._granted += 1
+                return
+
+            if self._waiting >= self.max_queue or timeout <= 0:
+                self._rejected_full += 1
+                raise RateLimitExceeded(
+                    self.name, f'{self.name} request queue is full', self._retry_after())
+
+            waiter = _Waiter(user_key)
+            if user_key not in self._queues:
+                self._queues[user_key] = deque()
+                self._order.append(user_key)
+            self._queues[user_key].append(waiter)
+            self._waiting += 1
+            self._queued += 1
+
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                self._dispatch()
+                if waiter.granted:
+                    waited = now - started
+                    self._granted += 1
+                    self._wait_total += waited
+                    self._wait_max = max(self._wait_max, waited)
+                    return
+                if now >= deadline:
+                    self._remove(waiter)
+                    self._timed_out += 1
+                    # Our place in line may have been the one blocking the next user
+                    self._cond.notify_all()
+                    raise RateLimitExceeded(
+                        self.name, f'Timed out waiting for a {self.name} request slot', self._retry_after())
+                next_token = (1 - self._tokens) / self.rate if self.rate > 0 else deadline - now
+                self._cond.wait(min(deadline - now, max(next_token, 0.001)))
+
+    def stats(self):
+        """Return quota, queue and wait statistics."""
+        with self._cond:
+            self._refill(time.monotonic())
+            queued = self._queued - self._timed_out
+            return {
+                'rate_per_second': self.rate,
+                'burst': self.burst,
+                'tokens_available': round(self._tokens, 2),
+                'queue_length': self._waiting,
+                'queue_users': len(self._order),
+                'max_queue': self.max_queue,
+                'max_wait_seconds': self.max_wait,
+                'granted': self._granted,
+                'queued': self._queued,
+                'rejected_queue_full': self._rejected_full,
+                'timed_out': self._timed_out,
+                'avg_wait_ms': round(self._wait_total / queued * 1000, 1) if queued > 0 else None,
+                'max_wait_ms': round(self._wait_max * 1000, 1)
+            }
+
+
+# Defaults are conservative per-process rates; set {NAME}_RATE_LIMIT and
+# {NAME}_RATE_BURST to the quota of the plan each deployment is on.
+_limiters = {
+    'kroger': FairRateLimiter('kroger', **_limiter_config(
+        'kroger', rate=5, burst=20, max_queue=200, max_wait=2.0)),
+    'spoonacular': FairRateLimiter('spoonacular', **_limiter_config(
+        'spoonacular', rate=2, burst=10, max_queue=100, max_wait=2.0))
+}
+
+
+def get_rate_limiter(upstream):
+    """Return the shared limiter for 'kroger' or 'spoonacular'."""
+    return _limiters[upstream]
+
+
+def rate_limiter_stats():
+    """Return statistics for every upstream limiter."""
+    return {name: limiter.stats() for name, limiter in _limiters.items()}
\ No newline at end of file
@@ -0,0 +1,130 @@
+import os
+import datetime
+import threading
+from pymongo.errors import PyMongoError
+from app.models.recipe_cache_model import recipe_cache_collection
+from app.functions.lru_cache import LRUCache
+from app.functions.app_logging import get_logger
+
+logger = get_logger(__name__)
+
+# Read-through cache for Spoonacular /recipes/{id}/information documents.
+# Recipe information almost never changes, so documents are served for
+# RECIPE_CACHE_TTL; MongoDB keeps them until RECIPE_CACHE_MAX_AGE so they can still
+# be served stale while Spoonacular is unavailable.
+RECIPE_CACHE_SIZE = int(os.getenv('RECIPE_CACHE_SIZE', 500))
+RECIPE_CACHE_TTL = int(os.getenv('RECIPE_CACHE_TTL', 7 * 24 * 3600))
+RECIPE_CACHE_MAX_AGE = int(os.getenv('RECIPE_CACHE_MAX_AGE', 30 * 24 * 3600))
+
+_lru = LRUCache(maxsize=RECIPE_CACHE_SIZE)
+_stats_lock = threading.Lock()
+_stats = {
+    'lru': {'hits': 0, 'misses': 0},
+    'mongo': {'hits': 0, 'misses': 0, 'stale': 0, 'errors': 0},
+    'invalidations': 0
+}
+
+def _count(tier, counter):
+    with _stats_lock:
+        _stats[tier][counter] += 1
+
+def _key(recipe_id):
+    # Routes pass ints, saved recipes may carry strings
+    return str(recipe_id)
+
+def get_cached_recipe(recipe_id, allow_stale=False):
+    """
+    Look up a Spoonacular recipe information document in the in-process LRU, then in MongoDB.
+
+    Args:
+        recipe_id (int): The Spoonacular recipe ID
+        allow_stale (bool): Also return documents older than RECIPE_CACHE_TTL
+
+    Returns:
+        dict: The recipe document, or None on a miss
+    """
+    key = _key(recipe_id)
+    now = datetime.datetime.utcnow()
+    fresh_after = now - datetime.timedelta(seconds=RECIPE_CACHE_TTL)
+
+    entry = _lru.get(key)
+    if entry is not None:
+        if entry['fetched_at'] >= fresh_after:
+            _count('lru', 'hits')
+            return entry['recipe']
+        _lru.pop(key)
+    _count('lru', 'misses')
+
+    try:
+        doc = recipe_cache_collection.find_one({'recipe_id': key})
+    except PyMongoError as e:
+        _count('mongo', 'errors')
+        logger.error("Error reading recipe cache: %s", e)
+        doc = None
+
+    if doc is None:
+        _count('mongo', 'misses')
+        return None
+    if doc['fetched_at'] >= fresh_after:
+        _count('mongo', 'hits')
+        _lru.set(key, {'recipe': doc['recipe'], 'fetched_at': doc['fetched_at']})
+        return doc['recipe']
+    if allow_stale:
+        _count('mongo', 'stale')
+        return doc['recipe']
+    _count('mongo', 'misses')
+    return None
+
+def cache_recipe(recipe_id, recipe):
+    """Store a Spoonacular recipe information document in both cache tiers."""
+    key = _key(recipe_id)
+    now = datetime.datetime.utcnow()
+    _lru.set(key, {'recipe': recipe, 'fetched_at': now})
+    try:
+        recipe_cache_collection.update_one(
+            {'recipe_id': key},
+            {'$set': {
+                'recipe': recipe,
+                'fetched_at': now,
+                'expires_at': now + datetime.timedelta(seconds=RECIPE_CACHE_MAX_AGE)
+            }},
+            upsert=True
+        )
+    except PyMongoError as e:
+        _count('mongo', 'errors')
+        logger.error("Error writing recipe cache: %s", e)
+
+def invalidate_recipe(recipe_id):
+    """Remove a recipe from both cache tiers so the next request fetches it again."""
+    key = _key(recipe_id)
+    _lru.pop(key)
+    with _stats_lock:
+        _stats['invalidations'] += 1
+    try:
+        recipe_cache_collection.delete_one({'recipe_id': key})
+    except PyMongoError as e:
+        _count('mongo', 'errors')
+        logger.error("Error invalidating recipe cache: %s", e)
+
+def _ratio(hits, total):
+    return round(hits / total, 3) if total else None
+
+def recipe_cache_stats():
+    """Return hit/miss counters and hit ratios for each cache tier."""
+    with _stats_lock:
+        lru = dict(_stats['lru'])
+        mongo = dict(_stats['mongo'])
+        invalidations = _stats['invalidations']
+    lookups = lru['hits'] + lru['misses']
+    lru['hit_ratio'] = _ratio(lru['hits'], lookups)
+    lru['size'] = len(_lru)
+    lru['max_size'] = RECIPE_CACHE_SIZE
+    mongo['hit_ratio'] = _ratio(mongo['hits'], lru['misses'])
+    return {
+        'lru': lru,
+        'mongo': mongo,
+        'hit_ratio': _ratio(lru['hits'] + mongo['hits'], lookups),
+        'invalidations': invalidations,
+        'ttl_seconds': RECIPE_CACHE_TTL,
+        'max_age_seconds': RECIPE_CACHE_MAX_AGE
+    }
\ No newline at end of file
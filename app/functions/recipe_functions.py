@@ -1,8 +1,21 @@
 import os
+import json
+import time
+import hashlib
+import threading
 import requests
 from flask import jsonify, request
 from dotenv import load_dotenv
 from pathlib import Path
+from app.functions.upstream_client import upstream_get
+from app.functions.single_flight import coalesce
+from app.functions.upstream_errors import UpstreamUnavailable, CircuitOpenError
+from app.functions.circuit_breaker import get_circuit_breaker
+from app.functions.recipe_cache import get_cached_recipe, cache_recipe
+from app.functions.lru_cache import LRUCache
+from app.functions.app_logging import get_logger
+
+logger = get_logger(__name__)
 
 # Force load environment variables
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
@@ -10,7 +23,28 @@ load_dotenv(BASE_DIR / '.env', override=True)
 
 # Spoonacular API key
 SPOONACULAR_API_KEY = os.getenv("API_KEY")
-print(f"🔑 Recipe Functions API Key: {SPOONACULAR_API_KEY}")
+if not SPOONACULAR_API_KEY:
+    logger.warning("API_KEY is not set; Spoonacular requests will fail")
+
+# Bulk recipe lookups: max ids per request and ids per informationBulk call
+RECIPE_BULK_MAX_IDS = int(os.getenv('RECIPE_BULK_MAX_IDS', 100))
+SPOONACULAR_BULK_CHUNK_SIZE = int(os.getenv('SPOONACULAR_BULK_CHUNK_SIZE', 50))
+
+# complexSearch response cache: search results change slowly and many users send the
+# same query and preference filters, so responses are shared for a short while.
+# Expired responses are kept for COMPLEX_SEARCH_STALE_GRACE more seconds and served,
+# flagged as stale, while Spoonacular's circuit breaker is open.
+COMPLEX_SEARCH_CACHE_SIZE = int(os.getenv('COMPLEX_SEARCH_CACHE_SIZE', 1000))
+COMPLEX_SEARCH_CACHE_TTL = int(os.getenv('COMPLEX_SEARCH_CACHE_TTL', 300))
+COMPLEX_SEARCH_STALE_GRACE = int(os.getenv('COMPLEX_SEARCH_STALE_GRACE', 3600))
+# complexSearch parameters holding comma-separated lists whose order does not matter
+COMPLEX_SEARCH_LIST_PARAMS = frozenset((
+    'diet', 'intolerances', 'cuisine', 'excludeCuisine', 'includeIngredients', 'excludeIngredients', 'type'
+))
+
+_complex_search_cache = LRUCache(maxsize=COMPLEX_SEARCH_CACHE_SIZE, ttl=COMPLEX_SEARCH_CACHE_TTL + COMPLEX_SEARCH_STALE_GRACE)
+_complex_search_stats_lock = threading.Lock()
+_complex_search_stats = {'hits': 0, 'misses': 0, 'stale': 0}
 
 def recipes():
     """
@@ -27,16 +61,19 @@ def recipes():
     }
 
     try:
-        response = requests.get(url, params=params)
+        response = upstream_get('spoonacular', url, params=params)
         response.raise_for_status()
         return jsonify(response.json())
     except requests.exceptions.RequestException as e:
-        print(f"Error fetching recipes: {e}")
+        logger.error("Error fetching recipes: %s", e)
         return jsonify({'error': 'Failed to fetch recipes'}), 500
 
+@coalesce('spoonacular.get_recipe_ingredients', key=lambda recipe_id: str(recipe_id))
 def get_recipe_ingredients(recipe_id):
     """
     Get the ingredients for a specific recipe from Spoonacular API.
+
+    Concurrent requests for the same recipe share one call.
     """
     url = f"https://api.spoonacular.com/recipes/{recipe_id}/ingredientWidget.json"
     params = {
@@ -44,7 +81,7 @@ def get_recipe_ingredients(recipe_id):
     }
 
     try:
-        response = requests.get(url, params=params)
+        response = upstream_get('spoonacular', url, params=params)
         response.raise_for_status()
 
         data = response.json()
@@ -63,7 +100,7 @@ def get_recipe_ingredients(recipe_id):
         return {'ingredients': cleaned_ingredients}, None
 
     except requests.exceptions.RequestException as e:
-        print(f"Error fetching recipe ingredients: {e}")
+        logger.error("Error fetching recipe ingredients: %s", e)
         return None, str(e)
 
 def recipe_ingredients(recipe_id):
@@ -75,19 +112,36 @@ def recipe_ingredients(recipe_id):
         return jsonify({'error': error}), 500
     return jsonify(ingredients)
 
+@coalesce('spoonacular.fetch_recipe_detail', key=lambda recipe_id: str(recipe_id))
 def fetch_recipe_detail(recipe_id):
     """
     Fetches detailed information about a recipe using Spoonacular API.
+
+    Recipes are served from the recipe cache when possible (stale copies too while
+    Spoonacular's circuit breaker is open). Concurrent requests for the same recipe
+    share one call.
     """
+    recipe = get_cached_recipe(recipe_id)
+    if recipe is not None:
+        return recipe, 200
+
     url = f"https://api.spoonacular.com/recipes/{recipe_id}/information"
     params = {"apiKey": SPOONACULAR_API_KEY}
 
     try:
-        response = requests.get(url, params=params)
+        response = upstream_get('spoonacular', url, params=params)
         response.raise_for_status()
-        return response.json(), 200
+        recipe = response.json()
+        cache_recipe(recipe_id, recipe)
+        return recipe, 200
+    except CircuitOpenError:
+        recipe = get_cached_recipe(recipe_id, allow_stale=True)
+        if recipe is None:
+            raise
+        get_circuit_breaker('spoonacular').record_fallback()
+        return recipe, 200
     except requests.exceptions.RequestException as e:
-        print(f"Error fetching recipe details: {e}")
+        logger.error("Error fetching recipe details: %s", e)
         return {"error": "Failed to fetch recipe details"}, 500
 
 def find_recipes_by_ingredients(ingredients, number=10, limit_license=True, ranking=1, ignore_pantry=False):
@@ -119,9 +173,161 @@ def find_recipes_by_ingredients(ingredients, number=10, limit_license=True, rank
     }
     
     try:
-        response = requests.get(url, params=params)
+        response = upstream_get('spoonacular', url, params=params)
         response.raise_for_status()
         return response.json(), 200
     except requests.exceptions.RequestException as e:
-        print(f"Error finding recipes by ingredients: {e}")
-        return {"error": "Failed to find recipes by ingredients"}, 500
\ No newline at end of file
+        logger.error("Error finding recipes by ingredients: %s", e)
+        return {"error": "Failed to find recipes by ingredients"}, 500
+
+def fetch_recipes_bulk(recipe_ids):
+    """
+    Get information documents for many recipes with as few Spoonacular calls as possible.
+
+    Cached recipes are served locally; the rest are requested SPOONACULAR_BULK_CHUNK_SIZE
+    at a time from /recipes/informationBulk and added to the recipe cache.
+
+    Args:
+        recipe_ids (list): Spoonacular recipe IDs
+
+    Returns:
+        list: One recipe document per requested id, in the same order, with None for
+        recipes that were not found or could not be fetched
+
+    Raises:
+        UpstreamUnavailable: If Spoonacular is unavailable and none of the recipes are cached
+    """
+    keys = [str(recipe_id) for recipe_id in recipe_ids]
+    recipes = {}
+    missing = []
+
+    for key in dict.fromkeys(keys):
+        recipe = get_cached_recipe(key)
+        if recipe is not None:
+            recipes[key] = recipe
+        else:
+            missing.append(key)
+
+    upstream_error = None
+    for start in range(0, len(missing), SPOONACULAR_BULK_CHUNK_SIZE):
+        chunk = missing[start:start + SPOONACULAR_BULK_CHUNK_SIZE]
+        params = {"ids": ','.join(chunk), "apiKey": SPOONACULAR_API_KEY}
+        try:
+            response = upstream_get('spoonacular', "https://api.spoonacular.com/recipes/informationBulk", params=params)
+            response.raise_for_status()
+            fetched = response.json()
+        except CircuitOpenError as e:
+            upstream_error = e
+            for key in chunk:
+                recipe = get_cached_recipe(key, allow_stale=True)
+                if recipe is not None:
+                    get_circuit_breaker('spoonacular').record_fallback()
+                    recipes[key] = recipe
+            continue
+        except UpstreamUnavailable as e:
+            upstream_error = e
+            continue
+        except requests.exceptions.RequestException as e:
+            logger.error("Error fetching recipe information in bulk: %s", e)
+            continue
+
+        for recipe in fetched:
+            key = str(recipe.get('id'))
+            if key in chunk:
+                recipes[key] = recipe
+                cache_recipe(key, recipe)
+
+    if upstream_error is not None and not recipes:
+        raise upstream_error
+    return [recipes.get(key) for key in keys]
+
+def recipes_bulk():
+    """
+    Handle the route for fetching information for several recipes from a comma-separated ids parameter.
+    """
+    ids_param = request.args.get('ids', '')
+    recipe_ids = [recipe_id.strip() for recipe_id in ids_param.split(',') if recipe_id.strip()]
+
+    if not recipe_ids:
+        return jsonify({'error': 'No recipe ids provided'}), 400
+    if not all(recipe_id.isdigit() for recipe_id in recipe_ids):
+        return jsonify({'error': 'Recipe ids must be numeric'}), 400
+    if len(recipe_ids) > RECIPE_BULK_MAX_IDS:
+        return jsonify({'error': f'Too many recipe ids (max {RECIPE_BULK_MAX_IDS})'}), 400
+
+    recipes = fetch_recipes_bulk(recipe_ids)
+    return jsonify({
+        'results': [recipe for recipe in recipes if recipe is not None],
+        'missing': [int(recipe_id) for recipe_id, recipe in zip(recipe_ids, recipes) if recipe is None]
+    }), 200
+
+def _complex_search_key(params):
+    """
+    Canonical hash of complexSearch parameters: the API key and unset values are
+    dropped, list values are sorted and case is ignored, so equivalent searches share a key.
+    """
+    canonical = {}
+    for name, value in params.items():
+        if name == 'apiKey' or value is None:
+            continue
+        if isinstance(value, (list, tuple)) or name in COMPLEX_SEARCH_LIST_PARAMS:
+            items = value.split(',') if isinstance(value, str) else value
+            value = ','.join(sorted(str(item).strip().lower() for item in items if str(item).strip()))
+        elif isinstance(value, str):
+            value = value.strip().lower()
+        else:
+            value = str(value)
+        canonical[name] = value
+    return hashlib.sha256(json.dumps(canonical, sort_keys=True).encode()).hexdigest()
+
+@coalesce('spoonacular.complex_search', key=_complex_search_key)
+def complex_search(params):
+    """
+    Run a Spoonacular complexSearch, answering from the response cache when an
+    equivalent search was made within COMPLEX_SEARCH_CACHE_TTL seconds. While the
+    circuit breaker is open, an expired response still in its stale grace window is served.
+
+    Args:
+        params (dict): The complexSearch query parameters, including apiKey
+
+    Returns:
+        tuple: (data, stale) where data is the complexSearch response (shared between
+        callers, do not modify) and stale is True if it is an expired cached response
+
+    Raises:
+        requests.exceptions.HTTPError: If Spoonacular answers with an error status
+        CircuitOpenError: If the breaker is open and nothing is cached for the search
+    """
+    key = _complex_search_key(params)
+    entry = _complex_search_cache.get(key)
+    fresh = entry is not None and time.monotonic() - entry['fetched_at'] < COMPLEX_SEARCH_CACHE_TTL
+    with _complex_search_stats_lock:
+        _complex_search_stats['hits' if fresh else 'misses'] += 1
+    if fresh:
+        return entry['data'], False
+
+    try:
+        response = upstream_get('spoonacular', "https://api.spoonacular.com/recipes/complexSearch", params=params)
+    except CircuitOpenError:
+        if entry is None:
+            raise
+        get_circuit_breaker('spoonacular').record_fallback()
+        with _complex_search_stats_lock:
+            _complex_search_stats['stale'] += 1
+        return entry['data'], True
+    response.raise_for_status()
+    data = response.json()
+    _complex_search_cache.set(key, {'data': data, 'fetched_at': time.monotonic()})
+    return data, False
+
+def complex_search_cache_stats():
+    """Return hit/miss counters and the hit ratio of the complexSearch response cache."""
+    with _complex_search_stats_lock:
+        stats = dict(_complex_search_stats)
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_ratio'] = round(stats['hits'] / lookups, 3) if lookups else None
+    stats['size'] = len(_complex_search_cache)
+    stats['max_size'] = COMPLEX_SEARCH_CACHE_SIZE
+    stats['ttl_seconds'] = COMPLEX_SEARCH_CACHE_TTL
+    stats['stale_grace_seconds'] = COMPLEX_SEARCH_STALE_GRACE
+    return stats
\ No newline at end of file
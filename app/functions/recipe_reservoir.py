@@ -0,0 +1,296 @@
+import os
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from app.functions.upstream_client import upstream_get
+from app.functions.recipe_functions import SPOONACULAR_API_KEY
+from app.functions.allergen_index import screen_recipes
+from app.functions.nutrition_filter import compile_nutrition_goals, nutrition_goal_params
+from app.functions.app_logging import get_logger
+
+logger = get_logger(__name__)
+
+# Pre-filled reservoirs of random recipes for /randomrecipe.
+#
+# Each preference bucket (diet tags, cuisine tags, intolerances, nutrition goals) has
+# a queue of random recipes that already passed the allergen and nutrition filters.
+# Requests pop from it in O(1); when it drops below RANDOM_RESERVOIR_LOW_WATER a
+# background refill tops it back up to RANDOM_RESERVOIR_SIZE. Only the first request
+# of a new bucket waits for Spoonacular. Recipes are trimmed to the fields
+# /randomrecipe returns before they are queued, and the least recently used buckets
+# are dropped once all reservoirs together hold more than RANDOM_RESERVOIR_MAX_RECIPES.
+RANDOM_RESERVOIR_SIZE = int(os.getenv('RANDOM_RESERVOIR_SIZE', 60))
+RANDOM_RESERVOIR_LOW_WATER = int(os.getenv('RANDOM_RESERVOIR_LOW_WATER', 20))
+RANDOM_RESERVOIR_MAX_BUCKETS = int(os.getenv('RANDOM_RESERVOIR_MAX_BUCKETS', 200))
+RANDOM_RESERVOIR_MAX_RECIPES = int(os.getenv('RANDOM_RESERVOIR_MAX_RECIPES', 3000))
+# Synchronous Spoonacular calls a request may make when its bucket runs short
+RANDOM_RESERVOIR_COLD_ATTEMPTS = int(os.getenv('RANDOM_RESERVOIR_COLD_ATTEMPTS', 2))
+# Spoonacular caps /recipes/random at 100 recipes per call
+SPOONACULAR_RANDOM_MAX_NUMBER = 100
+
+# Fields of a Spoonacular random recipe that /randomrecipe returns; the rest (unit
+# conversions, analyzed steps, per-ingredient nutrition, ...) is on /recipedetail/<id>
+RANDOM_RECIPE_FIELDS = (
+    'id', 'title', 'image', 'imageType', 'servings', 'readyInMinutes', 'sourceName', 'sourceUrl',
+    'summary', 'instructions', 'cuisines', 'dishTypes', 'diets', 'vegetarian', 'vegan',
+    'glutenFree', 'dairyFree', 'veryHealthy', 'healthScore', 'pricePerServing'
+)
+RANDOM_RECIPE_INGREDIENT_FIELDS = ('id', 'name', 'original', 'amount', 'unit', 'image')
+
+_lock = threading.Lock()
+_reservoirs = OrderedDict()  # bucket key -> RecipeReservoir, least recently used first
+_refill_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('RANDOM_RESERVOIR_REFILL_WORKERS', 2)),
+    thread_name_prefix='recipe-reservoir'
+)
+_stats = {
+    'requests': 0,
+    'served_from_reservoir': 0,
+    'cold_fills': 0,
+    'background_refills': 0,
+    'refill_errors': 0,
+    'recipes_fetched': 0,
+    'recipes_removed_allergens': 0,
+    'recipes_removed_nutrition': 0,
+    'buckets_evicted': 0
+}
+
+
+def _count(counter, amount=1):
+    with _lock:
+        _stats[counter] += amount
+
+
+def preference_bucket(prefs):
+    """Return the filters /randomrecipe applies for a user's preferences."""
+    nutrition_goals = prefs.get('nutrition_goals', [])
+    return {
+        'diet': sorted({d.lower() for d in prefs.get('diets', [])}),
+        'cuisine': sorted({c.lower() for c in prefs.get('cuisines', [])}),
+        'intolerances': sorted({a.lower() for a in prefs.get('intolerances', [])}),
+        'nutrition_goals': nutrition_goals
+    }
+
+
+def _bucket_key(bucket):
+    # Goals that compile to the same bounds share a reservoir
+    return (
+        tuple(bucket['diet']),
+        tuple(bucket['cuisine']),
+        tuple(bucket['intolerances']),
+        tuple(sorted(nutrition_goal_params(bucket['nutrition_goals']).items()))
+    )
+
+
+def filter_recipes(recipes, intolerances, nutrition_goals):
+    """
+    Keep the recipes of a batch that pass a user's allergen screen and nutrition goals.
+
+    Returns:
+        tuple: (passed, removed_allergens, removed_nutrition); a recipe that fails both
+        filters is counted as an allergen removal only
+    """
+    safe = screen_recipes(recipes, intolerances)
+    meets_goals = compile_nutrition_goals(nutrition_goals).mask(recipes)
+    passed = []
+    removed_allergens = removed_nutrition = 0
+    for recipe, is_safe, meets in zip(recipes, safe, meets_goals):
+        if not is_safe:
+            removed_allergens += 1
+        elif not meets:
+            removed_nutrition += 1
+        else:
+            passed.append(recipe)
+    return passed, removed_allergens, removed_nutrition
+
+
+def trim_recipe(recipe):
+    """Keep only the fields of a random recipe that /randomrecipe returns."""
+    trimmed = {field: recipe[field] for field in RANDOM_RECIPE_FIELDS if field in recipe}
+    if 'extendedIngredients' in recipe:
+        trimmed['extendedIngredients'] = [
+            {field: ingredient[field] for field in RANDOM_RECIPE_INGREDIENT_FIELDS if field in ingredient}
+            for ingredient in recipe['extendedIngredients']
+        ]
+    if 'nutrition' in recipe:
+        # Only the recipe totals; the goals in applied_filters are checked against these
+        trimmed['nutrition'] = {'nutrients': (recipe['nutrition'] or {}).get('nutrients', [])}
+    return trimmed
+
+
+class RecipeReservoir:
+    """Queue of pre-filtered random recipes for one preference bucket."""
+
+    def __init__(self, bucket):
+        self.bucket = bucket
+        self._lock = threading.Lock()
+        self._fill_lock = threading.Lock()  # one Spoonacular refill at a time per bucket
+        self._recipes = deque()
+        self._ids = set()
+        self._refill_pending = False
+
+    def __len__(self):
+        with self._lock:
+            return len(self._recipes)
+
+    def take(self, count):
+        """Pop up to count recipes."""
+        taken = []
+        with self._lock:
+            while self._recipes and len(taken) < count:
+                recipe = self._recipes.popleft()
+                self._ids.discard(recipe.get('id'))
+                taken.append(recipe)
+        return taken
+
+    def fill(self):
+        """
+        Fetch random recipes for this bucket from Spoonacular until the reservoir is
+        full (one call), keeping only recipes that pass the bucket's filters.
+
+        Returns:
+            tuple: (removed_allergens, removed_nutrition) recipes dropped by the filters
+        """
+        with self._fill_lock:
+            missing = RANDOM_RESERVOIR_SIZE - len(self)
+            if missing <= 0:
+                return 0, 0
+
+            params = {
+                "apiKey": SPOONACULAR_API_KEY,
+                # Fetch extra to make up for recipes the filters remove
+                "number": min(SPOONACULAR_RANDOM_MAX_NUMBER, missing * 2),
+                "limitLicense": "true"
+            }
+            if self.bucket['diet'] or self.bucket['cuisine']:
+                params["tags"] = ",".join(self.bucket['diet'] + self.bucket['cuisine'])
+            if compile_nutrition_goals(self.bucket['nutrition_goals']):
+                # Nutrition is only returned on request; without it every recipe passes the goals
+                params["includeNutrition"] = "true"
+
+            response = upstream_get('spoonacular', "https://api.spoonacular.com/recipes/random", params=params)
+            response.raise_for_status()
+            recipes = response.json().get("recipes", [])
+
+            passed, removed_allergens, removed_nutrition = filter_recipes(
+                recipes, self.bucket['intolerances'], self.bucket['nutrition_goals']
+            )
+            with self._lock:
+                for recipe in passed:
+                    if recipe.get('id') in self._ids or len(self._recipes) >= RANDOM_RESERVOIR_SIZE:
+                        continue
+                    self._recipes.append(trim_recipe(recipe))
+                    self._ids.add(recipe.get('id'))
+
+            _enforce_recipe_cap(self)
+            _count('recipes_fetched', len(recipes))
+            _count('recipes_removed_allergens', removed_allergens)
+            _count('recipes_removed_nutrition', removed_nutrition)
+            return removed_allergens, removed_nutrition
+
+    def schedule_refill(self):
+        """Refill in the background if the reservoir is below its low-water mark."""
+        with self._lock:
+            if self._refill_pending or len(self._recipes) >= RANDOM_RESERVOIR_LOW_WATER:
+                return
+            self._refill_pending = True
+        _refill_executor.submit(self._background_refill)
+
+    def _background_refill(self):
+        try:
+            self.fill()
+            _count('background_refills')
+        except Exception as e:
+            _count('refill_errors')
+            logger.error("Error refilling random recipe reservoir: %s", e)
+        finally:
+            with self._lock:
+                self._refill_pending = False
+
+
+def _get_reservoir(bucket):
+    key = _bucket_key(bucket)
+    with _lock:
+        reservoir = _reservoirs.get(key)
+        if reservoir is None:
+            reservoir = _reservoirs[key] = RecipeReservoir(bucket)
+            if len(_reservoirs) > RANDOM_RESERVOIR_MAX_BUCKETS:
+                _reservoirs.popitem(last=False)
+                _stats['buckets_evicted'] += 1
+        else:
+            _reservoirs.move_to_end(key)
+    return reservoir
+
+
+def _enforce_recipe_cap(current):
+    """
+    Drop the least recently used buckets other than current until all reservoirs
+    together hold at most RANDOM_RESERVOIR_MAX_RECIPES recipes.
+    """
+    with _lock:
+        total = sum(len(reservoir) for reservoir in _reservoirs.values())
+        for key in list(_reservoirs):
+            if total <= RANDOM_RESERVOIR_MAX_RECIPES:
+                break
+            reservoir = _reservoirs[key]
+            if reservoir is current:
+                continue
+            total -= len(reservoir)
+            del _reservoirs[key]
+            _stats['buckets_evicted'] += 1
+
+
+def take_random_recipes(prefs, limit):
+    """
+    Get up to limit random recipes matching a user's preferences.
+
+    Served from the bucket's reservoir; only a bucket that cannot cover the request
+    (e.g. the first request for it) makes a synchronous Spoonacular call.
+
+    Args:
+        prefs (dict): The user's preferences document
+        limit (int): Number of recipes wanted, at most RANDOM_RESERVOIR_SIZE
+
+    Returns:
+        tuple: (recipes, spoonacular_calls, removed_allergens, removed_nutrition). The
+        removal counts only cover the synchronous fills this request made, so they
+        are 0 when it was served from an already filled reservoir.
+    """
+    limit = min(limit, RANDOM_RESERVOIR_SIZE)
+    bucket = preference_bucket(prefs)
+    reservoir = _get_reservoir(bucket)
+    _count('requests')
+
+    calls = 0
+    removed_allergens = removed_nutrition = 0
+    if len(reservoir) >= limit:
+        _count('served_from_reservoir')
+    while len(reservoir) < limit and calls < RANDOM_RESERVOIR_COLD_ATTEMPTS:
+        calls += 1
+        _count('cold_fills')
+        try:
+            allergens, nutrition = reservoir.fill()
+            removed_allergens += allergens
+            removed_nutrition += nutrition
+        except Exception:
+            # Serve what is left if Spoonacular is unavailable; fail only with nothing to serve
+            if not len(reservoir):
+                raise
+            break
+
+    recipes = reservoir.take(limit)
+    reservoir.schedule_refill()
+    return recipes, calls, removed_allergens, removed_nutrition
+
+
+def recipe_reservoir_stats():
+    """Return reservoir counters and per-bucket fill levels."""
+    with _lock:
+        stats = dict(_stats)
+        reservoirs = list(_reservoirs.values())
+    stats['buckets'] = len(reservoirs)
+    stats['recipes_available'] = sum(len(reservoir) for reservoir in reservoirs)
+    stats['capacity_per_bucket'] = RANDOM_RESERVOIR_SIZE
+    stats['max_recipes'] = RANDOM_RESERVOIR_MAX_RECIPES
+    stats['low_water'] = RANDOM_RESERVOIR_LOW_WATER
+    return stats
\ No newline at end of file
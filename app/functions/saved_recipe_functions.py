@@ -1,12 +1,14 @@
 from flask import jsonify, request
 from bson.objectid import ObjectId
 from app import saved_recipes_collection
-from app.functions.recipe_functions import fetch_recipe_detail
+from app.functions.recipe_functions import fetch_recipe_detail, fetch_recipes_bulk, RECIPE_BULK_MAX_IDS
+from app.functions.upstream_errors import UpstreamUnavailable
 import datetime
 
 def get_saved_recipes(current_user):
-    """Get all saved recipes for the current user"""
-    saved_recipes = saved_recipes_collection.find({'user_email': current_user['email']})
+    """Get all saved recipes for the current user; ?hydrate=true adds each recipe's full details"""
+    saved_recipes = list(saved_recipes_collection.find({'user_email': current_user['email']}))
+    hydrate = request.args.get('hydrate', '').lower() in ('1', 'true')
     
     # Convert MongoDB objects to JSON-serializable format
     result = []
@@ -18,16 +20,32 @@ def get_saved_recipes(current_user):
             'image': recipe.get('image', ''),
             'saved_at': recipe.get('saved_at')
         })
-    
-    return jsonify({
+
+    response = {
         'saved_recipes': result,
         'count': len(result)
-    }), 200
+    }
+
+    if hydrate and result:
+        # One informationBulk call per chunk instead of one detail call per recipe
+        try:
+            details = fetch_recipes_bulk([recipe['recipe_id'] for recipe in result])
+        except UpstreamUnavailable as e:
+            # Spoonacular is down and none of the recipes are cached; the list itself is still ours to serve
+            details = [None] * len(result)
+            response['details_unavailable'] = True
+            response['retryAfter'] = e.retry_after
+        for recipe, detail in zip(result, details):
+            recipe['details'] = detail
+    
+    return jsonify(response), 200
 
 def save_recipe(current_user):
-    """Save a recipe for the current user"""
+    """Save a recipe (recipe_id) or several recipes at once (recipe_ids) for the current user"""
     data = request.json
     
+    if data and data.get('recipe_ids'):
+        return save_recipes(current_user, data['recipe_ids'])
     if not data or not data.get('recipe_id'):
         return jsonify({'message': 'Missing recipe_id field'}), 400
     
@@ -68,6 +86,60 @@ def save_recipe(current_user):
         }
     }), 201
 
+def save_recipes(current_user, recipe_ids):
+    """Save several recipes for the current user, fetching their details in bulk"""
+    # Spoonacular ids are integers; digit strings are accepted too, bools are not
+    if not isinstance(recipe_ids, list) or not all(
+        (isinstance(recipe_id, int) and not isinstance(recipe_id, bool))
+        or (isinstance(recipe_id, str) and recipe_id.isascii() and recipe_id.isdigit())
+        for recipe_id in recipe_ids
+    ):
+        return jsonify({'message': 'recipe_ids must be a list of recipe ids'}), 400
+    if len(recipe_ids) > RECIPE_BULK_MAX_IDS:
+        return jsonify({'message': f'Too many recipe_ids (max {RECIPE_BULK_MAX_IDS})'}), 400
+
+    # Dedupe after converting, so 5 and "5" are saved once
+    recipe_ids = list(dict.fromkeys(int(recipe_id) for recipe_id in recipe_ids))
+    already_saved = {
+        # Single saves store recipe_id as sent, so older records may hold it as a string
+        int(saved['recipe_id']) for saved in saved_recipes_collection.find(
+            {'user_email': current_user['email'],
+             'recipe_id': {'$in': recipe_ids + [str(recipe_id) for recipe_id in recipe_ids]}},
+            {'recipe_id': 1}
+        )
+    }
+    to_save = [recipe_id for recipe_id in recipe_ids if recipe_id not in already_saved]
+    recipes_details = fetch_recipes_bulk(to_save) if to_save else []
+
+    now = datetime.datetime.utcnow()
+    new_saved_recipes = []
+    failed = []
+    for recipe_id, recipe_details in zip(to_save, recipes_details):
+        if recipe_details is None:
+            failed.append(recipe_id)
+            continue
+        new_saved_recipes.append({
+            'user_email': current_user['email'],
+            'recipe_id': recipe_id,
+            'title': recipe_details.get('title', ''),
+            'image': recipe_details.get('image', ''),
+            'saved_at': now
+        })
+
+    if new_saved_recipes:
+        saved_recipes_collection.insert_many(new_saved_recipes)
+
+    return jsonify({
+        'message': f'{len(new_saved_recipes)} recipes saved',
+        'saved': [{
+            'recipe_id': recipe['recipe_id'],
+            'title': recipe['title'],
+            'image': recipe['image']
+        } for recipe in new_saved_recipes],
+        'already_saved': [recipe_id for recipe_id in recipe_ids if recipe_id in already_saved],
+        'failed': failed
+    }), 201 if new_saved_recipes else 200
+
 def remove_saved_recipe(current_user):
     """Remove a saved recipe for the current user"""
     data = request.json
@@ -0,0 +1,100 @@
+import threading
+from functools import wraps
+
+# Request coalescing for upstream lookups.
+#
+# When several threads ask for the same thing at the same time (a trending search
+# term, a popular recipe), only the first one calls the upstream; the others wait
+# for it and share its result or exception. Results are shared between callers,
+# so they must be treated as read-only.
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls that share a key."""
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._executed = 0
+        self._coalesced = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Run fn(*args, **kwargs), unless a call with the same key is already in
+        flight, in which case wait for it and return its result.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self._coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self._executed += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'executed': self._executed,
+                'coalesced': self._coalesced,
+                'in_flight': len(self._calls)
+            }
+
+
+_groups = {}
+
+
+def coalesce(name, key):
+    """
+    Decorator that coalesces concurrent calls of a function.
+
+    Args:
+        name (str): Name the call counters are reported under
+        key (callable): Takes the function's arguments and returns the hashable
+            key identifying identical calls
+    """
+    group = _groups.setdefault(name, SingleFlight(name))
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            return group.do(key(*args, **kwargs), fn, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def single_flight_stats():
+    """Return executed/coalesced call counters for every coalesced function."""
+    functions = {name: group.stats() for name, group in _groups.items()}
+    return {
+        'coalesced_total': sum(stats['coalesced'] for stats in functions.values()),
+        'functions': functions
+    }
\ No newline at end of file
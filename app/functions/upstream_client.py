@@ -0,0 +1,236 @@
+import os
+import time
+import random
+import threading
+from collections import deque
+import requests
+from requests.adapters import HTTPAdapter
+from app.functions.rate_limiter import get_rate_limiter
+from app.functions.circuit_breaker import get_circuit_breaker
+from app.functions.upstream_errors import UpstreamRateLimited, RateLimitExceeded
+from app.functions.app_logging import get_logger, log_payload
+
+logger = get_logger(__name__)
+
+# Status codes worth retrying: rate limited or a transient upstream failure
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def _upstream_config(name, pool_size, connect_timeout, read_timeout, max_retries, backoff_base):
+    """Read the settings for one upstream, e.g. KROGER_POOL_SIZE or SPOONACULAR_READ_TIMEOUT."""
+    prefix = name.upper()
+    return {
+        'pool_size': int(os.getenv(f'{prefix}_POOL_SIZE', pool_size)),
+        'connect_timeout': float(os.getenv(f'{prefix}_CONNECT_TIMEOUT', connect_timeout)),
+        'read_timeout': float(os.getenv(f'{prefix}_READ_TIMEOUT', read_timeout)),
+        'max_retries': int(os.getenv(f'{prefix}_MAX_RETRIES', max_retries)),
+        'backoff_base': float(os.getenv(f'{prefix}_BACKOFF_BASE', backoff_base)),
+        'backoff_max': float(os.getenv(f'{prefix}_BACKOFF_MAX', 5))
+    }
+
+
+class UpstreamClient:
+    """
+    Keep-alive HTTP client for one upstream API.
+
+    Wraps a requests.Session with its own connection pool, default connect/read
+    timeouts and bounded retries with jittered exponential backoff on 429/5xx
+    responses and connection errors. Every attempt is first cleared by the
+    upstream's circuit breaker and then takes a slot from its rate limiter.
+    Records latency and connection reuse.
+    """
+
+    def __init__(self, name, pool_size=20, connect_timeout=3.05, read_timeout=10,
+                 max_retries=2, backoff_base=0.25, backoff_max=5, limiter=None, breaker=None):
+        self.name = name
+        self.limiter = limiter
+        self.breaker = breaker
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.session = requests.Session()
+        self._adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', self._adapter)
+        self.session.mount('http://', self._adapter)
+
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=1000)
+        self._requests = 0
+        self._attempts = 0
+        self._retries = 0
+        self._errors = 0
+        self._statuses = {}
+
+    def request(self, method, url, log_body=True, **kwargs):
+        """
+        Send a request, retrying 429/5xx responses and connection failures.
+
+        Accepts the same keyword arguments as requests.request. After the last
+        retry the final response is returned (or its exception raised) so callers
+        keep their existing raise_for_status()/except handling. Pass
+        log_body=False for calls whose response carries credentials, so the
+        sampled DEBUG payload log never sees it.
+
+        Raises:
+            CircuitOpenError: If the upstream's circuit breaker is open
+            RateLimitExceeded: If no rate limiter slot frees up in time
+            UpstreamRateLimited: If the upstream still answers 429 after the last retry
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        with self._lock:
+            self._requests += 1
+
+        attempt = 0
+        while True:
+            self._acquire()
+            started = time.monotonic()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                self._record(time.monotonic() - started, None)
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+            except Exception:
+                self._record(time.monotonic() - started, None)
+                raise
+            else:
+                self._record(time.monotonic() - started, response.status_code)
+                if response.status_code == 429 and attempt >= self.max_retries:
+                    try:
+                        retry_after = float(response.headers.get('Retry-After', 1))
+                    except ValueError:
+                        retry_after = 1
+                    response.close()
+                    raise UpstreamRateLimited(self.name, f'{self.name} is rate limiting requests', retry_after)
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    logger.debug("%s %s %s -> %s in %.0f ms", self.name, method, url,
+                                 response.status_code, (time.monotonic() - started) * 1000)
+                    if log_body and not kwargs.get('stream'):
+                        log_payload(logger, f"{self.name} {method} {url} response", response.content)
+                    return response
+                delay = self._backoff(attempt, response.headers.get('Retry-After'))
+                response.close()
+
+            attempt += 1
+            with self._lock:
+                self._retries += 1
+            time.sleep(delay)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def _acquire(self):
+        """Get clearance from the circuit breaker and a slot from the rate limiter."""
+        if self.breaker is not None:
+            self.breaker.before_call()
+        if self.limiter is not None:
+            try:
+                self.limiter.acquire()
+            except RateLimitExceeded:
+                if self.breaker is not None:
+                    self.breaker.cancel()
+                raise
+
+    def _backoff(self, attempt, retry_after=None):
+        """Full-jitter exponential backoff, honouring a numeric Retry-After header."""
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _record(self, elapsed, status_code):
+        if self.breaker is not None:
+            # Rate limiting and client errors say nothing about the upstream's health
+            if status_code is None or status_code >= 500:
+                self.breaker.record_failure(elapsed)
+            else:
+                self.breaker.record_success(elapsed)
+        with self._lock:
+            self._attempts += 1
+            self._latencies.append(elapsed)
+            if status_code is None:
+                self._errors += 1
+                key = 'error'
+            else:
+                key = f'{status_code // 100}xx'
+            self._statuses[key] = self._statuses.get(key, 0) + 1
+
+    def _pool_stats(self):
+        connections = 0
+        pooled_requests = 0
+        pools = self._adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                connections += pool.num_connections
+                pooled_requests += pool.num_requests
+        return {
+            'pool_size': self.pool_size,
+            'connections_opened': connections,
+            'requests_sent': pooled_requests,
+            'reuse_ratio': round(1 - connections / pooled_requests, 3) if pooled_requests else None
+        }
+
+    def stats(self):
+        """Return request, retry, latency, connection-reuse, rate limit and breaker statistics."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            stats = {
+                'requests': self._requests,
+                'attempts': self._attempts,
+                'retries': self._retries,
+                'connection_errors': self._errors,
+                'statuses': dict(self._statuses)
+            }
+        if latencies:
+            stats['latency_ms'] = {
+                'avg': round(sum(latencies) / len(latencies) * 1000, 1),
+                'p50': round(latencies[len(latencies) // 2] * 1000, 1),
+                'p95': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1),
+                'max': round(latencies[-1] * 1000, 1)
+            }
+        stats['pool'] = self._pool_stats()
+        if self.limiter is not None:
+            stats['rate_limit'] = self.limiter.stats()
+        if self.breaker is not None:
+            stats['circuit_breaker'] = self.breaker.stats()
+        return stats
+
+
+_clients = {
+    'kroger': UpstreamClient('kroger', **_upstream_config(
+        'kroger', pool_size=20, connect_timeout=3.05, read_timeout=10, max_retries=2, backoff_base=0.25),
+        limiter=get_rate_limiter('kroger'), breaker=get_circuit_breaker('kroger')),
+    'spoonacular': UpstreamClient('spoonacular', **_upstream_config(
+        'spoonacular', pool_size=10, connect_timeout=3.05, read_timeout=15, max_retries=2, backoff_base=0.5),
+        limiter=get_rate_limiter('spoonacular'), breaker=get_circuit_breaker('spoonacular'))
+}
+
+
+def get_upstream_client(upstream):
+    """Return the shared client for 'kroger' or 'spoonacular'."""
+    return _clients[upstream]
+
+
+def upstream_get(upstream, url, **kwargs):
+    """GET through the pooled client of the given upstream."""
+    return _clients[upstream].get(url, **kwargs)
+
+
+def upstream_post(upstream, url, **kwargs):
+    """POST through the pooled client of the given upstream."""
+    return _clients[upstream].post(url, **kwargs)
+
+
+def upstream_stats():
+    """Return statistics for every upstream client."""
+    return {name: client.stats() for name, client in _clients.items()}
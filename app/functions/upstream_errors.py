@@ -0,0 +1,36 @@
+import math
+from flask import jsonify
+
+class UpstreamUnavailable(Exception):
+    """
+    Raised when an upstream API cannot be called right now and the client should retry later.
+
+    Flask turns it into a 503 response with a Retry-After header (see
+    upstream_unavailable_response), so handlers must let it propagate instead of
+    reporting it as a generic 500 or an empty result.
+    """
+
+    def __init__(self, upstream, message, retry_after=1):
+        super().__init__(message)
+        self.upstream = upstream
+        self.retry_after = max(1, int(math.ceil(retry_after)))
+
+class RateLimitExceeded(UpstreamUnavailable):
+    """No outbound slot for the upstream became free before the caller's deadline."""
+
+class UpstreamRateLimited(UpstreamUnavailable):
+    """The upstream itself kept answering 429 after all retries."""
+
+class CircuitOpenError(UpstreamUnavailable):
+    """The upstream's circuit breaker is open, so the call was not attempted."""
+
+def upstream_unavailable_response(error):
+    """Flask error handler for UpstreamUnavailable."""
+    response = jsonify({
+        'error': str(error),
+        'upstream': error.upstream,
+        'retryAfter': error.retry_after
+    })
+    response.status_code = 503
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
\ No newline at end of file
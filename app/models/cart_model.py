@@ -1,4 +1,10 @@
-from app import db
+from pymongo import ASCENDING
+from app.database import db
 
 cart_items_collection = db['cart_items']
-orders_collection = db['orders']
\ No newline at end of file
+orders_collection = db['orders']
+
+def create_indexes():
+    """Create the collection's indexes; app/__init__.py calls this once at startup."""
+    # Lets the background price refresher find every cart line for a product at a store
+    cart_items_collection.create_index([('product_id', ASCENDING), ('location_id', ASCENDING)])
\ No newline at end of file
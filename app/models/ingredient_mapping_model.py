@@ -0,0 +1,12 @@
+from pymongo import ASCENDING
+from app.database import db
+
+ingredient_mappings_collection = db['ingredient_mappings']
+
+def create_indexes():
+    """Create the collection's indexes; app/__init__.py calls this once at startup."""
+    # One mapping per (normalized ingredient name, store); expired mappings are dropped by MongoDB
+    ingredient_mappings_collection.create_index(
+        [('ingredient', ASCENDING), ('location_id', ASCENDING)], unique=True
+    )
+    ingredient_mappings_collection.create_index('expires_at', expireAfterSeconds=0)
\ No newline at end of file
@@ -0,0 +1,12 @@
+from pymongo import ASCENDING
+from app.database import db
+
+product_cache_collection = db['product_cache']
+
+def create_indexes():
+    """Create the collection's indexes; app/__init__.py calls this once at startup."""
+    # One document per (product, store); MongoDB drops it once even its static fields are too old
+    product_cache_collection.create_index(
+        [('product_id', ASCENDING), ('location_id', ASCENDING)], unique=True
+    )
+    product_cache_collection.create_index('expires_at', expireAfterSeconds=0)
\ No newline at end of file
@@ -0,0 +1,10 @@
+from pymongo import ASCENDING
+from app.database import db
+
+recipe_cache_collection = db['recipe_cache']
+
+def create_indexes():
+    """Create the collection's indexes; app/__init__.py calls this once at startup."""
+    # One document per Spoonacular recipe; MongoDB drops it once it is too old to serve even as a fallback
+    recipe_cache_collection.create_index([('recipe_id', ASCENDING)], unique=True)
+    recipe_cache_collection.create_index('expires_at', expireAfterSeconds=0)
\ No newline at end of file
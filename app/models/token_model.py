@@ -1,3 +1,3 @@
-from app import db
+from app.database import db
 
 tokens_collection = db['tokens']
\ No newline at end of file
@@ -1,3 +1,3 @@
-from app import db
+from app.database import db
 
 users_collection = db['users']
\ No newline at end of file
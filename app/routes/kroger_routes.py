@@ -1,6 +1,9 @@
 from flask import Blueprint, request, jsonify
-from app.functions.kroger_functions import get_access_token, search_products, kroger_search, kroger_recipe_ingredients_info, get_product_details
+from app.functions.kroger_functions import get_access_token, search_products, kroger_search, kroger_recipe_ingredients_info, get_product_details, get_products_batch
 from app.functions.auth_functions import token_required 
+from app.functions.preference_functions import get_user_location_id
+from app.functions.location_warmup import ensure_location_warm
+from app.functions.product_autocomplete import product_autocomplete
 
 kroger_routes = Blueprint('kroger_routes', __name__)
 
@@ -8,13 +11,18 @@ kroger_routes = Blueprint('kroger_routes', __name__)
 @token_required # add iddentification 
 def kroger_search_route(current_user):
 #def kroger_search_route():
-    return kroger_search()
+    location_id = get_user_location_id(current_user)
+    ensure_location_warm(location_id)
+    return kroger_search(location_id)
 
 @kroger_routes.route("/kroger/recipe/<int:recipe_id>", methods = ['GET'])
 @token_required # add iddentification 
 def kroger_recipe_ingredients_info_route(current_user,recipe_id):
 #def kroger_recipe_ingredients_info_route(recipe_id):
-    return kroger_recipe_ingredients_info(recipe_id)
+    location_id = get_user_location_id(current_user)
+    ensure_location_warm(location_id)
+    stream = request.args.get('stream', '').lower() in ('1', 'true')
+    return kroger_recipe_ingredients_info(recipe_id, location_id, stream=stream)
 
 @kroger_routes.route("/kroger/product/<string:product_id>", methods=['GET'])
 @token_required
@@ -22,5 +30,25 @@ def get_product_details_route(current_user, product_id):
     """
     Returns detailed information about a specific Kroger product.
     """
-    product_data, status_code = get_product_details(product_id)
-    return jsonify(product_data), status_code
\ No newline at end of file
+    location_id = get_user_location_id(current_user)
+    ensure_location_warm(location_id)
+    product_data, status_code = get_product_details(product_id, location_id)
+    return jsonify(product_data), status_code
+
+@kroger_routes.route("/kroger/products", methods=['GET'])
+@token_required
+def get_products_batch_route(current_user):
+    """
+    Returns details for up to KROGER_BATCH_MAX_IDS products given as ?ids=a,b,c.
+    """
+    location_id = get_user_location_id(current_user)
+    ensure_location_warm(location_id)
+    return get_products_batch(location_id)
+
+@kroger_routes.route("/kroger/autocomplete", methods=['GET'])
+@token_required
+def product_autocomplete_route(current_user):
+    """
+    Suggests products for the search box from the local product index (?q=prefix&limit=n).
+    """
+    return product_autocomplete()
\ No newline at end of file
@@ -0,0 +1,13 @@
+from flask import Blueprint
+from app.functions.auth_functions import token_required
+from app.functions.metrics_functions import get_metrics
+
+metrics_routes = Blueprint('metrics_routes', __name__)
+
+@metrics_routes.route('/metrics', methods=['GET'])
+@token_required
+def get_metrics_route(current_user):
+    """
+    Returns token, cache and upstream counters.
+    """
+    return get_metrics()
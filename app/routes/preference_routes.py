@@ -3,7 +3,8 @@ from app.functions.auth_functions import token_required
 from app.functions.preference_functions import (
     add_nutrition_goals, get_diets, add_diets, get_nutrition_goals, remove_diets,
     get_intolerances, add_intolerances, remove_intolerances,
-    get_cuisines, add_cuisines, remove_cuisines, remove_nutrition_goals
+    get_cuisines, add_cuisines, remove_cuisines, remove_nutrition_goals,
+    get_location, set_location
 )
 
 preference_routes = Blueprint('preference_routes', __name__)
@@ -70,4 +71,15 @@ def add_nutrition_goals_route(current_user):
 @preference_routes.route('/nutrition_goals', methods=['DELETE'])
 @token_required
 def remove_nutrition_goals_route(current_user):
-    return remove_nutrition_goals(current_user)
\ No newline at end of file
+    return remove_nutrition_goals(current_user)
+
+# Store Location Routes
+@preference_routes.route('/location', methods=['GET'])
+@token_required
+def get_location_route(current_user):
+    return get_location(current_user)
+
+@preference_routes.route('/location', methods=['PUT'])
+@token_required
+def set_location_route(current_user):
+    return set_location(current_user)
\ No newline at end of file
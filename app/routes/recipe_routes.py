@@ -1,10 +1,12 @@
 import os
 import requests
-import json
 from flask import Blueprint, jsonify, request
-from app.functions.auth_functions import token_required
-from app.functions.preference_functions import NUTRITION_GOALS
-from app.functions.recipe_functions import fetch_recipe_detail, find_recipes_by_ingredients
+from app.functions.auth_functions import token_required, admin_required
+from app.functions.nutrition_filter import nutrition_goal_params, compile_nutrition_goals
+from app.functions.recipe_functions import fetch_recipe_detail, find_recipes_by_ingredients, recipes_bulk, complex_search
+from app.functions.recipe_cache import invalidate_recipe
+from app.functions.recipe_reservoir import RANDOM_RESERVOIR_SIZE, preference_bucket, take_random_recipes
+from app.functions.upstream_errors import UpstreamUnavailable
 from dotenv import load_dotenv
 from pathlib import Path
 
@@ -16,7 +18,6 @@ BASE_DIR = Path(__file__).resolve().parent.parent.parent
 load_dotenv(BASE_DIR / '.env', override=True)
 
 API_KEY = os.getenv("API_KEY")
-print(f"🔑 Recipe Routes API Key: {API_KEY}")
 
 @recipe_routes.route("/recipedetail/<int:recipe_id>", methods=['GET'])
 @token_required
@@ -31,6 +32,25 @@ def recipe_detail_get(current_user, recipe_id):
 
     return jsonify(data), status_code
 
+@recipe_routes.route("/recipedetail/<int:recipe_id>/cache", methods=['DELETE'])
+@token_required
+@admin_required
+def recipe_detail_invalidate(current_user, recipe_id):
+    """
+    Drops a recipe from the shared recipe cache so the next request fetches it from Spoonacular.
+    Admins only (ADMIN_EMAILS); other users get a 403.
+    """
+    invalidate_recipe(recipe_id)
+    return jsonify({"message": "Recipe cache entry removed", "recipe_id": recipe_id}), 200
+
+@recipe_routes.route('/recipes/bulk', methods=['GET'])
+@token_required
+def recipes_bulk_route(current_user):
+    """
+    Returns information for up to RECIPE_BULK_MAX_IDS recipes given as ?ids=1,2,3, in request order.
+    """
+    return recipes_bulk()
+
 @recipe_routes.route('/randomrecipe', methods=['GET'])
 @token_required
 def get_random_recipes(current_user):
@@ -40,92 +60,38 @@ def get_random_recipes(current_user):
 
         # Get number of recipes to fetch (default: 5)
         limit = request.args.get("limit", 5, type=int)
-        max_attempts = 1  # Prevent infinite loop by retrying only 3 times
-        attempt = 0
-        filtered_recipes = []
-
-        while len(filtered_recipes) < limit and attempt < max_attempts:
-            attempt += 1  # Keep track of attempts
-            params = {
-                "apiKey": API_KEY,
-                "number": (limit - len(filtered_recipes)) * 2,  # Fetch more if needed
-                "limitLicense": "true"
-            }
-
-            # ✅ Convert diet preferences to lowercase
-            diet_tags = [d.lower() for d in prefs.get("diets", [])]
+        if limit is None or not 1 <= limit <= RANDOM_RESERVOIR_SIZE:
+            return jsonify({"error": f"limit must be between 1 and {RANDOM_RESERVOIR_SIZE}"}), 400
 
-            # ✅ Convert cuisine preferences to lowercase
-            cuisine_tags = [c.lower() for c in prefs.get("cuisines", [])]
-
-            # ✅ Combine diet & cuisine into the `tags` parameter
-            if diet_tags or cuisine_tags:
-                params["tags"] = ",".join(diet_tags + cuisine_tags)
-
-            # ✅ Print API request URL for debugging
-            print("Fetching from Spoonacular API with URL:")
-            print(f"https://api.spoonacular.com/recipes/random?{params}")
-
-            response = requests.get(
-                "https://api.spoonacular.com/recipes/random",
-                params=params
-            )
-            response.raise_for_status()
-            data = response.json()
-
-            # ✅ Print raw API response for debugging
-            print("\n🔍 Raw API Response:")
-            print(json.dumps(data, indent=2))  # Pretty print JSON
-
-            # ✅ Filter out recipes containing allergens
-            allergies = [a.lower() for a in prefs.get("intolerances", [])]  # Convert allergies to lowercase
-            removed_due_to_allergens = 0
-            for recipe in data.get("recipes", []):
-                if "extendedIngredients" in recipe:
-                    ingredients = [ingredient["name"].lower() for ingredient in recipe["extendedIngredients"]]
-                    if any(allergy in ingredients for allergy in allergies):
-                        removed_due_to_allergens += 1
-                        continue  # Skip this recipe if it contains an allergen
-
-                # ✅ Apply nutrition filters manually
-                nutrition_goals = prefs.get("nutrition_goals", {})
-                if "nutrition" in recipe:
-                    if any(
-                        ("minCalories" in nutrition_goals and recipe["nutrition"]["nutrients"][0]["amount"] < nutrition_goals["minCalories"]) or
-                        ("maxCalories" in nutrition_goals and recipe["nutrition"]["nutrients"][0]["amount"] > nutrition_goals["maxCalories"]) or
-                        ("minProtein" in nutrition_goals and recipe["nutrition"]["nutrients"][1]["amount"] < nutrition_goals["minProtein"]) or
-                        ("maxProtein" in nutrition_goals and recipe["nutrition"]["nutrients"][1]["amount"] > nutrition_goals["maxProtein"])
-                    ):
-                        continue  # Skip recipe if it doesn't match nutrition goals
-
-                filtered_recipes.append(recipe)
-
-                # Stop once we have enough recipes
-                if len(filtered_recipes) >= limit:
-                    break
-
-        # ✅ Print removed recipe count for debugging
-        print(f"\n🚨 Removed {removed_due_to_allergens} recipes due to allergies")
-        print(f"✅ Final recipe count: {len(filtered_recipes)} / {limit}")
+        # Recipes come pre-filtered for allergens and nutrition goals from the
+        # reservoir of this user's preference bucket
+        bucket = preference_bucket(prefs)
+        filtered_recipes, attempts, removed_allergens, removed_nutrition = take_random_recipes(prefs, limit)
 
         return jsonify({
             "results": filtered_recipes,
             "meta": {
                 "count": len(filtered_recipes),
                 "limit": limit,
-                "attempts": attempt,
-                "removed_due_to_allergens": removed_due_to_allergens,
+                "attempts": attempts,
+                # Recipes dropped by Spoonacular calls made for this request only;
+                # 0 when it was served from an already filled reservoir
+                "removed_due_to_allergens": removed_allergens,
+                "removed_due_to_nutrition": removed_nutrition,
                 "applied_filters": {
-                    "diet": diet_tags,
-                    "intolerances": allergies,
-                    "cuisine": cuisine_tags,
-                    "nutrition_goals": prefs.get("nutrition_goals", {})
+                    "diet": bucket['diet'],
+                    "intolerances": bucket['intolerances'],
+                    "cuisine": bucket['cuisine'],
+                    "nutrition_goals": bucket['nutrition_goals'],
+                    "nutrition_bounds": compile_nutrition_goals(bucket['nutrition_goals']).bounds()
                 }
             }
         }), 200
 
     except requests.exceptions.HTTPError as e:
         return jsonify({"error": f"Spoonacular API error: {str(e)}"}), 502
+    except UpstreamUnavailable:
+        raise
     except Exception as e:
         return jsonify({"error": f"Server error: {str(e)}"}), 500
 
@@ -161,13 +127,7 @@ def get_recipes(current_user):
             params["cuisine"] = ",".join(prefs['cuisines'])
 
         # Nutrition goals
-        if prefs.get('nutrition_goals'):
-            nutrition_params = {}
-            for goal in prefs['nutrition_goals']:
-                goal_config = next((g for g in NUTRITION_GOALS.values() if g['name'] == goal), None)
-                if goal_config:
-                    nutrition_params.update(goal_config['params'])
-            params.update(nutrition_params)
+        params.update(nutrition_goal_params(prefs.get('nutrition_goals')))
 
         # === Frontend Filters ===
         price_range = request.args.get("price_range")
@@ -195,13 +155,8 @@ def get_recipes(current_user):
         if mapped_meal_type:
             params["type"] = mapped_meal_type
 
-        # === Make the API call ===
-        response = requests.get(
-            "https://api.spoonacular.com/recipes/complexSearch",
-            params=params
-        )
-        response.raise_for_status()
-        data = response.json()
+        # === Make the API call (shared with users sending the same search) ===
+        data, stale = complex_search(params)
         all_results = data.get("results", [])
 
         # === Post-filter price range ===
@@ -229,6 +184,8 @@ def get_recipes(current_user):
                 "page": page,
                 "limit": limit,
                 "next_page": page + 1 if offset + limit < data.get("totalResults", 0) else None,
+                # Cached results served past their TTL because Spoonacular is unavailable
+                "stale": stale,
                 "filters": {
                     "diets": prefs.get('diets', []),
                     "intolerances": prefs.get('intolerances', []),
@@ -243,6 +200,8 @@ def get_recipes(current_user):
 
     except requests.exceptions.HTTPError as e:
         return jsonify({"error": f"Spoonacular API error: {str(e)}"}), 502
+    except UpstreamUnavailable:
+        raise
     except Exception as e:
         return jsonify({"error": f"Server error: {str(e)}"}), 500
 
@@ -281,5 +240,7 @@ def recipes_by_ingredients(current_user):
             }
         }), status_code
         
+    except UpstreamUnavailable:
+        raise
     except Exception as e:
         return jsonify({"error": f"Server error: {str(e)}"}), 500
@@ -0,0 +1,21 @@
+import sys
+import types
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent / 'app'
+
+
+def without_app_startup():
+    """
+    Make the standalone modules under app.functions importable without running
+    app/__init__.py, which connects to MongoDB and starts the cart price refresher
+    and the autocomplete seed thread.
+
+    Call it before the first import from app. Modules that need the database or
+    the Flask app still need the full app (see bench_kroger_resolution_modes).
+    """
+    if 'app' in sys.modules:
+        return
+    package = types.ModuleType('app')
+    package.__path__ = [str(APP_DIR)]
+    sys.modules['app'] = package
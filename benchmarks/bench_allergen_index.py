@@ -0,0 +1,112 @@
+"""
+Throughput microbenchmark for allergen screening of random-recipe batches.
+
+Screens thousands of synthetic Spoonacular recipes against a user's
+intolerances with screen_recipes() (cold, then with the ingredient memo warm)
+and with the exact-name list scan it replaced. Also reports how many recipes
+each approach removes, since the old check only caught ingredients literally
+named after the intolerance. Before timing, it checks the intolerances found
+in compound ingredients whose names hide an allergen (e.g. worcestershire sauce
+contains anchovies) and in look-alikes that must stay clear, and stops if any differ.
+
+Run from the Backend folder (no database or .env needed):
+    python -m benchmarks.bench_allergen_index
+"""
+import random
+import timeit
+
+from benchmarks import without_app_startup
+without_app_startup()
+
+from app.functions import allergen_index
+from app.functions.allergen_index import screen_recipes, ingredient_allergens, ALLERGEN_BITS
+
+RECIPES = 5000
+INGREDIENTS_PER_RECIPE = 12
+ROUNDS = 5
+INTOLERANCES = ['peanut', 'sesame']
+
+INGREDIENT_NAMES = [
+    'butter', 'salt', 'garlic cloves', 'fresh basil leaves', 'large eggs', 'extra virgin olive oil',
+    'green beans', 'onion', 'cheddar cheese', 'all purpose flour', 'brown sugar', 'soy sauce',
+    'red bell peppers', 'lemons', 'ground black pepper', 'boneless skinless chicken breasts',
+    'heavy cream', 'baby spinach', 'cherry tomatoes', 'unsalted butter, softened', 'potatoes',
+    'scallions', 'fresh cilantro', 'limes', 'avocados', 'walnuts', 'shrimp', 'peanut butter',
+    'coconut milk', 'almond flour', 'eggplant', 'nutmeg', 'parmesan', 'milk', 'water chestnuts',
+    'rice noodles', 'sesame seeds', 'tofu', 'greek yogurt', 'butternut squash', 'dairy',
+]
+
+# Ingredient name -> the intolerances it must be flagged for, no more and no less
+COMPOUND_INGREDIENTS = {
+    'worcestershire sauce': {'seafood'},
+    'Lea & Perrins Worcestershire Sauce': {'seafood'},
+    'vegan worcestershire sauce': set(),
+    'fish sauce': {'seafood'},
+    'beer': {'gluten'},
+    '1 bottle dark beer': {'gluten'},
+    'stout': {'gluten'},
+    'root beer': set(),
+    'ginger beer': set(),
+    'gluten free beer': set(),
+    'soy sauce': {'soy', 'gluten', 'wheat'},
+    'peanut butter': {'peanut'},
+    'almond milk': {'tree nut'},
+    'pesto': {'tree nut'},
+    'mayonnaise': {'egg'},
+    'eggplant': set(),
+    'nutmeg': set(),
+    'water chestnuts': set(),
+    'oyster mushrooms': set(),
+}
+
+
+def check_compound_ingredients():
+    failures = []
+    for name, expected in COMPOUND_INGREDIENTS.items():
+        mask = ingredient_allergens(name)
+        found = {intolerance for intolerance, bit in ALLERGEN_BITS.items() if mask & bit}
+        if found != expected:
+            failures.append(f"{name!r}: expected {sorted(expected)}, got {sorted(found)}")
+    if failures:
+        raise SystemExit('Allergen check failed:\n  ' + '\n  '.join(failures))
+    print(f"{len(COMPOUND_INGREDIENTS)} compound ingredient checks passed")
+
+
+def make_recipes(count, rng):
+    return [{
+        'id': i,
+        'extendedIngredients': [{'name': name} for name in rng.sample(INGREDIENT_NAMES, INGREDIENTS_PER_RECIPE)]
+    } for i in range(count)]
+
+
+# The check screen_recipes replaced, kept here for comparison
+def legacy_screen(recipes, allergies):
+    results = []
+    for recipe in recipes:
+        ingredients = [ingredient['name'].lower() for ingredient in recipe['extendedIngredients']]
+        results.append(not any(allergy in ingredients for allergy in allergies))
+    return results
+
+
+def main():
+    check_compound_ingredients()
+    recipes = make_recipes(RECIPES, random.Random(42))
+    print(f"{RECIPES} recipes x {INGREDIENTS_PER_RECIPE} ingredients, intolerances {INTOLERANCES}, "
+          f"best of {ROUNDS} rounds")
+
+    def cold():
+        allergen_index._ingredient_masks.clear()
+        return screen_recipes(recipes, INTOLERANCES)
+
+    for label, func in (
+        ('legacy exact-name scan', lambda: legacy_screen(recipes, INTOLERANCES)),
+        ('screen_recipes (cold)', cold),
+        ('screen_recipes (warm)', lambda: screen_recipes(recipes, INTOLERANCES)),
+    ):
+        best = min(timeit.repeat(func, number=1, repeat=ROUNDS))
+        removed = func().count(False)
+        print(f"  {label:<24} {RECIPES / best:>10,.0f} recipes/s  {removed:>5} removed")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Microbenchmark for the ingredient normalization stage used on every priced recipe.
+
+Reports the cost per ingredient of the full rule pipeline (cold, bypassing the
+memoization), the memoized path hit by repeated names, the lighter Kroger
+search-term cleanup, and the ad-hoc "additional toppings: " split it replaced,
+for reference.
+
+Run from the Backend folder (no database or .env needed):
+    python -m benchmarks.bench_ingredient_normalizer
+"""
+import timeit
+
+from benchmarks import without_app_startup
+without_app_startup()
+
+from app.functions.ingredient_normalizer import normalize_ingredient, ingredient_search_term
+
+SAMPLE_NAMES = [
+    'butter', 'salt', 'Salt', 'garlic cloves', 'fresh basil leaves', 'large eggs',
+    'eggs', 'extra virgin olive oil', 'Additional toppings: Freshly Chopped Tomatoes',
+    'green beans', 'onion, finely diced', 'cheddar cheese (shredded)', 'all purpose flour',
+    'brown sugar, packed', 'for the sauce: soy sauce', 'red bell peppers', 'lemons',
+    'ground black pepper', 'boneless skinless chicken breasts', 'heavy cream',
+    'baby spinach', 'cherry tomatoes, halved', 'unsalted butter, softened', 'potatoes',
+    'scallions, thinly sliced', 'fresh cilantro', 'limes', 'avocados', 'radishes', 'berries',
+]
+ROUNDS = 2000
+
+
+def legacy_clean(ingredient_name):
+    new_ingredient_name = ingredient_name
+    if "additional toppings: " in new_ingredient_name.lower():
+        new_ingredient_name = new_ingredient_name.split("additional toppings: ")[-1]
+        prefix = new_ingredient_name.split("additional toppings: ")[0]
+        if prefix and prefix.strip():
+            new_ingredient_name = prefix.strip() + " " + new_ingredient_name
+    return new_ingredient_name
+
+
+def per_name_us(func):
+    elapsed = timeit.timeit(lambda: [func(name) for name in SAMPLE_NAMES], number=ROUNDS)
+    return elapsed / (ROUNDS * len(SAMPLE_NAMES)) * 1e6
+
+
+def main():
+    uncached = normalize_ingredient.__wrapped__
+    normalize_ingredient.cache_clear()
+    for name in SAMPLE_NAMES:
+        normalize_ingredient(name)
+
+    print(f"{len(SAMPLE_NAMES)} names x {ROUNDS} rounds")
+    print(f"  rule pipeline (cold)   {per_name_us(uncached):7.2f} us/name")
+    print(f"  rule pipeline (cached) {per_name_us(normalize_ingredient):7.2f} us/name")
+    print(f"  search term (cold)     {per_name_us(ingredient_search_term.__wrapped__):7.2f} us/name")
+    print(f"  legacy prefix split    {per_name_us(legacy_clean):7.2f} us/name")
+
+    keys = [uncached(name) for name in SAMPLE_NAMES]
+    print(f"  {len(SAMPLE_NAMES)} names -> {len(set(keys))} distinct lookups")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""
+Memory and throughput microbenchmark for the Kroger product normalizer.
+
+Compares KrogerProduct (normalize, then serialize) with the per-endpoint dict
+formatters it replaced, over a large search payload. Pass the path of a recorded
+/v1/products response to use it; otherwise a synthetic payload with the same
+shape (several image sizes, multiple items, aisle locations) is generated.
+
+Products served from the product cache reuse the KrogerProduct built when they
+were cached, so for those only the 'to_dict (cached)' cost applies; products just
+fetched from Kroger pay 'normalize + to_dict'.
+
+Run from the Backend folder (no database or .env needed):
+    python -m benchmarks.bench_kroger_product [recorded_search.json]
+"""
+import sys
+import json
+import timeit
+import tracemalloc
+
+from benchmarks import without_app_startup
+without_app_startup()
+
+from app.functions.kroger_product import KrogerProduct
+
+SYNTHETIC_PRODUCTS = 5000
+ROUNDS = 5
+
+
+def make_payload(count):
+    products = []
+    for i in range(count):
+        product_id = f'{i:013d}'
+        products.append({
+            'productId': product_id,
+            'upc': product_id,
+            'aisleLocations': [{'bayNumber': '12', 'description': 'Aisle 7', 'number': '7', 'side': 'L'}],
+            'brand': 'Kroger',
+            'categories': ['Dairy', 'Natural & Organic'],
+            'countryOrigin': 'UNITED STATES',
+            'description': f'Kroger Whole Milk {i}',
+            'images': [
+                {'perspective': perspective, 'featured': perspective == 'front', 'sizes': [
+                    {'size': size, 'url': f'https://www.kroger.com/product/images/{size}/{perspective}/{product_id}'}
+                    for size in ('xlarge', 'large', 'medium', 'small', 'thumbnail')
+                ]}
+                for perspective in ('front', 'back', 'left')
+            ],
+            'items': [
+                {
+                    'itemId': f'{product_id}{n}',
+                    'price': {'regular': 3.49 + n, 'promo': 2.99 + n if i % 3 == 0 else 0},
+                    'size': f'{n + 1} gal',
+                    'soldBy': 'UNIT',
+                    'inventory': {'stockLevel': 'HIGH'},
+                    'fulfillment': {'curbside': True, 'delivery': True, 'inStore': True, 'shipToHome': False}
+                }
+                for n in range(1 + i % 3)
+            ] if i % 25 else [],  # some products come back without items
+            'itemInformation': {'depth': '3.5', 'height': '10.1', 'width': '6.0'},
+            'temperature': {'indicator': 'Refrigerated', 'heatSensitive': False}
+        })
+    return products
+
+
+# The formatters KrogerProduct replaced, kept here for comparison
+def legacy_default_item_info():
+    return {
+        'itemId': 'N/A',
+        'price': {'regular': 0.0, 'promo': None},
+        'size': 'N/A',
+        'soldBy': 'N/A',
+        'inventory': {'status': 'N/A'},
+        'fulfillment': {'status': 'N/A'}
+    }
+
+
+def legacy_format_search_product_info(product):
+    product_info = {
+        'productId': product.get('productId', 'N/A'),
+        'upc': product.get('upc', 'N/A'),
+        'description': product.get('description', 'N/A'),
+        'brand': product.get('brand', 'N/A'),
+        'categories': product.get('categories', ['N/A']),
+        'countryOrigin': product.get('countryOrigin', 'N/A'),
+        'temperature': product.get('temperature', 'N/A'),
+        'images': product.get('images', []),
+        'items': []
+    }
+    for item in product.get('items', []):
+        product_info['items'].append({
+            'itemId': item.get('itemId', 'N/A'),
+            'price': {
+                'regular': item.get('price', {}).get('regular', 0.0),
+                'promo': item.get('price', {}).get('promo', None)
+            },
+            'size': item.get('size', 'N/A'),
+            'soldBy': item.get('soldBy', 'N/A'),
+            'inventory': item.get('inventory', {'status': 'N/A'}),
+            'fulfillment': item.get('fulfillment', {'status': 'N/A'})
+        })
+    if not product_info['items']:
+        product_info['items'].append(legacy_default_item_info())
+    return product_info
+
+
+def normalize(payload):
+    return [KrogerProduct.from_payload(product) for product in payload]
+
+
+def serialize(products):
+    return [product.to_dict(default_item=True) for product in products]
+
+
+def retained_bytes(build):
+    """Bytes still allocated after build() returns, i.e. the size of what it built."""
+    tracemalloc.start()
+    result = build()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current, peak
+
+
+def main():
+    if len(sys.argv) > 1:
+        with open(sys.argv[1]) as f:
+            payload = json.load(f)['data']
+        source = sys.argv[1]
+    else:
+        payload = make_payload(SYNTHETIC_PRODUCTS)
+        source = 'synthetic payload'
+
+    legacy = [legacy_format_search_product_info(product) for product in payload]
+    current = serialize(normalize(payload))
+    assert json.dumps(legacy, sort_keys=True) == json.dumps(current, sort_keys=True), 'output differs'
+
+    count = len(payload)
+    print(f"{count} products from {source}, best of {ROUNDS} rounds")
+    for label, func in (
+        ('legacy formatter', lambda: [legacy_format_search_product_info(p) for p in payload]),
+        ('normalize only', lambda: normalize(payload)),
+        ('normalize + to_dict', lambda: serialize(normalize(payload))),
+    ):
+        best = min(timeit.repeat(func, number=1, repeat=ROUNDS))
+        held, peak = retained_bytes(func)
+        print(f"  {label:<20} {count / best:>10,.0f} products/s  "
+              f"{held / count:>7.0f} B/product held  {peak / count:>7.0f} B/product peak")
+
+    cached = normalize(payload)
+    best = min(timeit.repeat(lambda: serialize(cached), number=1, repeat=ROUNDS))
+    print(f"  {'to_dict (cached)':<20} {count / best:>10,.0f} products/s")
+    best = min(timeit.repeat(lambda: json.dumps(serialize(cached)), number=1, repeat=ROUNDS))
+    print(f"  {'to_dict + json.dumps':<20} {count / best:>10,.0f} products/s")
+
+
+if __name__ == '__main__':
+    main()
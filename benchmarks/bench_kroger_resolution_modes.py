@@ -0,0 +1,132 @@
+"""
+Compare Kroger call counts and latency between the 'detail' and 'search' resolution modes.
+
+The Kroger API is replaced by an in-process fake that answers with recorded-shape
+payloads after a fixed delay, so the numbers reflect how many round trips each mode
+makes rather than live network conditions. The product cache and the learned
+ingredient mappings are bypassed so both modes start cold, and the app is not
+started, so no database is needed.
+
+Run from the Backend folder:
+    python -m benchmarks.bench_kroger_resolution_modes
+"""
+import time
+from urllib.parse import urlparse, parse_qs
+
+from flask import Flask
+
+from benchmarks import without_app_startup
+without_app_startup()
+
+from app.functions import kroger_functions
+
+# kroger_search only needs a request context, not the real app and its startup
+app = Flask(__name__)
+
+UPSTREAM_LATENCY = 0.02  # seconds per simulated Kroger round trip
+SEARCH_HITS = 10
+RECIPE_INGREDIENTS = ['butter', 'garlic', 'onion', 'olive oil', 'salt',
+                      'pepper', 'chicken breast', 'rice', 'milk', 'egg']
+
+
+def make_product(product_id, term):
+    return {
+        'productId': product_id,
+        'upc': product_id.rjust(13, '0'),
+        'description': f'Kroger {term.title()} {product_id}',
+        'brand': 'Kroger',
+        'categories': ['Pantry'],
+        'countryOrigin': 'UNITED STATES',
+        'temperature': {'indicator': 'Ambient', 'heatSensitive': False},
+        'images': [{'perspective': 'front', 'sizes': [{'size': 'medium', 'url': 'https://example.com/img.jpg'}]}],
+        'items': [{
+            'itemId': product_id,
+            'price': {'regular': 2.49, 'promo': 0},
+            'size': '16 oz',
+            'soldBy': 'UNIT',
+            'inventory': {'stockLevel': 'HIGH'},
+            'fulfillment': {'curbside': True, 'delivery': True, 'inStore': True, 'shipToHome': False}
+        }]
+    }
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self._payload = payload
+        self.status_code = 200
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeKroger:
+    def __init__(self):
+        self.calls = {'search': 0, 'detail': 0}
+
+    def get(self, upstream, url, headers=None, timeout=None, **kwargs):
+        time.sleep(UPSTREAM_LATENCY)
+        parsed = urlparse(url)
+        if parsed.path.rstrip('/') == '/v1/products':
+            self.calls['search'] += 1
+            term = parse_qs(parsed.query).get('filter.term', ['item'])[0]
+            return FakeResponse({'data': [make_product(f'{abs(hash(term)) % 10**6}{i:02d}', term)
+                                          for i in range(SEARCH_HITS)]})
+        self.calls['detail'] += 1
+        product_id = parsed.path.rsplit('/', 1)[-1]
+        return FakeResponse({'data': make_product(product_id, 'item')})
+
+
+def run(mode, fake):
+    kroger_functions.KROGER_RESOLUTION_MODE = mode
+    fake.calls = {'search': 0, 'detail': 0}
+
+    started = time.perf_counter()
+    with app.test_request_context('/krogerSearchItem?query=milk'):
+        kroger_functions.kroger_search()
+    search_elapsed = time.perf_counter() - started
+    search_calls = dict(fake.calls)
+
+    fake.calls = {'search': 0, 'detail': 0}
+    started = time.perf_counter()
+    for name in RECIPE_INGREDIENTS:
+        kroger_functions.get_kroger_product_details(name, 'bench-token')
+    recipe_elapsed = time.perf_counter() - started
+    recipe_calls = dict(fake.calls)
+
+    return search_calls, search_elapsed, recipe_calls, recipe_elapsed
+
+
+def main():
+    fake = FakeKroger()
+    patches = {
+        'upstream_get': fake.get,
+        'get_access_token': lambda: 'bench-token',
+        'get_cached_product': lambda *args, **kwargs: None,
+        'cache_product': lambda *args, **kwargs: None,
+        'cache_products': lambda *args, **kwargs: None,
+        'lookup_ingredient_mapping': lambda *args, **kwargs: None,
+        'record_ingredient_mapping': lambda *args, **kwargs: None,
+    }
+    originals = {name: getattr(kroger_functions, name) for name in patches}
+    for name, replacement in patches.items():
+        setattr(kroger_functions, name, replacement)
+    try:
+        print(f"{'mode':<8} {'endpoint':<22} {'search':>7} {'detail':>7} {'total':>6} {'ms':>8}")
+        for mode in ('detail', 'search'):
+            search_calls, search_elapsed, recipe_calls, recipe_elapsed = run(mode, fake)
+            for label, calls, elapsed in (
+                (f'kroger_search ({SEARCH_HITS} hits)', search_calls, search_elapsed),
+                (f'recipe ({len(RECIPE_INGREDIENTS)} ingr.)', recipe_calls, recipe_elapsed),
+            ):
+                print(f"{mode:<8} {label:<22} {calls['search']:>7} {calls['detail']:>7} "
+                      f"{calls['search'] + calls['detail']:>6} {elapsed * 1000:>8.1f}")
+    finally:
+        for name, original in originals.items():
+            setattr(kroger_functions, name, original)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Throughput microbenchmark for the logging pipeline on a hot request path.
+
+Simulates a handler that reports one upstream response per call and compares the
+old print-debugging (pretty-printed json.dumps of the whole payload, then a
+print of the error line) with the queued logger (one error line, the payload
+passed to log_payload). Both write to os.devnull so only the cost paid by the
+request thread is measured; the listener thread drains the queue for the logger.
+
+Run from the Backend folder (no database or .env needed):
+    python -m benchmarks.bench_logging
+"""
+import os
+import json
+import time
+import timeit
+import logging
+
+from benchmarks import without_app_startup
+without_app_startup()
+
+from app.functions import app_logging
+from app.functions.app_logging import configure_logging, get_logger, log_payload, logging_stats
+
+CALLS = 2000
+ROUNDS = 5
+PRODUCTS_PER_PAYLOAD = 50
+
+
+def make_payload(count):
+    return {'data': [{
+        'productId': f'{i:013d}',
+        'description': f'Kroger Whole Milk {i}',
+        'brand': 'Kroger',
+        'categories': ['Dairy'],
+        'items': [{'itemId': f'{i:013d}0', 'price': {'regular': 3.49, 'promo': 2.99}, 'size': '1 gal'}],
+        'images': [{'perspective': 'front', 'sizes': [
+            {'size': size, 'url': f'https://www.kroger.com/product/images/{size}/front/{i:013d}'}
+            for size in ('xlarge', 'large', 'medium', 'small', 'thumbnail')
+        ]}]
+    } for i in range(count)]}
+
+
+def main():
+    payload = make_payload(PRODUCTS_PER_PAYLOAD)
+    devnull = open(os.devnull, 'w')
+    configure_logging(stream=devnull)
+    logger = get_logger('app.benchmarks.logging')
+
+    def print_debugging():
+        print(json.dumps(payload, indent=2), file=devnull)
+        print(f"Error searching Kroger products: {'timeout'}", file=devnull)
+
+    def queued_logging():
+        log_payload(logger, 'kroger GET /v1/products response', payload)
+        logger.error("Error searching Kroger products: %s", 'timeout')
+
+    size = len(json.dumps(payload))
+    print(f"{CALLS} calls per round with a {size:,} byte payload, best of {ROUNDS} rounds")
+    print(f"payload sample rate {app_logging.LOG_PAYLOAD_SAMPLE_RATE}, cap {app_logging.LOG_PAYLOAD_MAX_BYTES} bytes")
+    for label, level, func in (
+        ('print + json.dumps', None, print_debugging),
+        ('logger, payload at INFO', logging.INFO, queued_logging),
+        ('logger, payload at DEBUG', logging.DEBUG, queued_logging),
+    ):
+        if level is not None:
+            logger.setLevel(level)
+        best = min(timeit.repeat(func, number=CALLS, repeat=ROUNDS))
+        print(f"  {label:<26} {CALLS / best:>10,.0f} calls/s  {best / CALLS * 1e6:>8.1f} us/call")
+        # Let the listener drain so queue overflow doesn't flatter the next case
+        while logging_stats()['queue_length']:
+            time.sleep(0.01)
+
+    print(f"  dropped records: {logging_stats()['dropped']}")
+
+
+if __name__ == '__main__':
+    main()
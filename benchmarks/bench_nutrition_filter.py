@@ -0,0 +1,97 @@
+"""
+Throughput microbenchmark for local nutrition-goal filtering.
+
+Evaluates a user's compiled nutrition goals over batches of synthetic
+Spoonacular recipes with NutritionFilter.mask() and with per-recipe Python
+checks: the index-based check it replaced (nutrients[0] is calories,
+nutrients[1] protein) and a name-based per-recipe loop applying the same
+bounds, which must agree with the mask. The vectorized bounds check is also
+timed on its own, separately from pulling the nutrients out of the recipes.
+
+Run from the Backend folder (no database or .env needed):
+    python -m benchmarks.bench_nutrition_filter
+"""
+import random
+import timeit
+
+from benchmarks import without_app_startup
+without_app_startup()
+
+from app.functions.nutrition_filter import compile_nutrition_goals, nutrition_goal_params, GOAL_PARAM_NUTRIENTS
+
+BATCH_SIZES = (100, 1000, 10000)
+ROUNDS = 5
+GOALS = ['Low Carb', 'Balanced']  # stored as display names
+NUTRIENT_NAMES = ('Calories', 'Fat', 'Saturated Fat', 'Carbohydrates', 'Net Carbohydrates', 'Sugar',
+                  'Cholesterol', 'Sodium', 'Protein', 'Fiber', 'Vitamin C', 'Iron')
+
+
+def make_recipes(count, rng):
+    recipes = []
+    for i in range(count):
+        recipe = {'id': i}
+        if i % 20:  # some recipes come back without nutrition
+            recipe['nutrition'] = {'nutrients': [
+                {'name': name, 'amount': round(rng.uniform(0, 800 if name == 'Calories' else 80), 2), 'unit': 'g'}
+                for name in NUTRIENT_NAMES
+            ]}
+        recipes.append(recipe)
+    return recipes
+
+
+# The check NutritionFilter replaced, kept here for comparison; it wrapped this
+# condition in any(), which raises TypeError on a bool once nutrition is present
+def legacy_passes(recipe, nutrition_goals):
+    if "nutrition" in recipe:
+        if (
+            ("minCalories" in nutrition_goals and recipe["nutrition"]["nutrients"][0]["amount"] < nutrition_goals["minCalories"]) or
+            ("maxCalories" in nutrition_goals and recipe["nutrition"]["nutrients"][0]["amount"] > nutrition_goals["maxCalories"]) or
+            ("minProtein" in nutrition_goals and recipe["nutrition"]["nutrients"][1]["amount"] < nutrition_goals["minProtein"]) or
+            ("maxProtein" in nutrition_goals and recipe["nutrition"]["nutrients"][1]["amount"] > nutrition_goals["maxProtein"])
+        ):
+            return False
+    return True
+
+
+def python_passes(recipe, params):
+    """Per-recipe equivalent of NutritionFilter.mask(), looking nutrients up by name."""
+    if not recipe.get('nutrition'):
+        return True
+    amounts = {nutrient['name']: nutrient['amount'] for nutrient in recipe['nutrition']['nutrients']}
+    for param, value in params.items():
+        nutrient, side = GOAL_PARAM_NUTRIENTS[param]
+        amount = amounts.get(nutrient)
+        if amount is None:
+            continue
+        if (side == 'min' and amount < value) or (side == 'max' and amount > value):
+            return False
+    return True
+
+
+def main():
+    rng = random.Random(42)
+    params = nutrition_goal_params(GOALS)
+    compiled = compile_nutrition_goals(GOALS)
+    print(f"goals {GOALS} -> {params}, best of {ROUNDS} rounds")
+
+    for count in BATCH_SIZES:
+        recipes = make_recipes(count, rng)
+        mask = compiled.mask(recipes)
+        assert mask.tolist() == [python_passes(recipe, params) for recipe in recipes], 'mask differs'
+
+        print(f"  batch of {count}")
+        for label, func in (
+            ('legacy index-based check', lambda: [legacy_passes(recipe, params) for recipe in recipes]),
+            ('per-recipe by name', lambda: [python_passes(recipe, params) for recipe in recipes]),
+            ('NutritionFilter.mask', lambda: compiled.mask(recipes)),
+        ):
+            best = min(timeit.repeat(func, number=1, repeat=ROUNDS))
+            print(f"    {label:<26} {count / best:>12,.0f} recipes/s")
+        matrix = compiled.nutrient_matrix(recipes)
+        best = min(timeit.repeat(lambda: compiled.evaluate(matrix), number=1, repeat=ROUNDS))
+        print(f"    {'  of which bounds check':<26} {count / best:>12,.0f} recipes/s")
+        print(f"    {int(mask.sum())} of {count} recipes meet the goals")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Latency microbenchmark for /kroger/autocomplete on a full-size prefix index.
+
+Builds a ProductPrefixIndex of AUTOCOMPLETE_MAX_PRODUCTS synthetic products with
+grocery-like descriptions and brands and a skewed popularity count per product,
+then times search() for short, common prefixes (the worst case: thousands of
+matching index entries) and for longer, selective ones. Common prefixes are
+ranked once before timing, as the background ranking does after their first
+query in a running process; the cost of that ranking is reported too.
+
+Run from the Backend folder (no database or .env needed):
+    python -m benchmarks.bench_product_autocomplete
+"""
+import time
+import random
+import timeit
+
+from benchmarks import without_app_startup
+without_app_startup()
+
+from app.functions.product_autocomplete import ProductPrefixIndex, AUTOCOMPLETE_MAX_PRODUCTS
+
+CALLS = 2000
+ROUNDS = 5
+LIMIT = 8
+PREFIXES = ['k', 'mi', 's', 'milk', 'whole m', 'chick', 'organic b', 'zz']
+
+BRANDS = ['Kroger', 'Simple Truth', 'Private Selection', 'Heritage Farm', 'Kellogg', 'General Mills',
+          'Oscar Mayer', 'Tyson', 'Dannon', 'Chobani', 'Barilla', 'Bush', 'Heinz', 'Kraft']
+ADJECTIVES = ['whole', 'organic', 'low fat', 'fresh', 'frozen', 'smoked', 'sliced', 'shredded',
+              'sweet', 'spicy', 'classic', 'original', 'reduced sodium', 'gluten free', 'unsalted']
+NOUNS = ['milk', 'cheese', 'bread', 'chicken breast', 'ground beef', 'salmon', 'rice', 'pasta',
+         'yogurt', 'butter', 'eggs', 'apples', 'bananas', 'spinach', 'cereal', 'sauce', 'soup',
+         'coffee', 'tea', 'juice', 'chips', 'crackers', 'cookies', 'beans', 'tomatoes', 'onions']
+SIZES = ['8 oz', '12 oz', '16 oz', '1 lb', '2 lb', '1 gal', '64 fl oz', '6 ct', '12 ct']
+
+
+def build_index(count, rng):
+    popularity = {}
+    index = ProductPrefixIndex(max_products=count, popularity=lambda ids: {
+        product_id: popularity[product_id] for product_id in ids if product_id in popularity
+    })
+    for i in range(count):
+        product_id = f'{i:013d}'
+        brand = rng.choice(BRANDS)
+        description = f'{brand} {rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {rng.choice(SIZES)}'
+        index.add(product_id, description, brand)
+        # A few products get most of the requests
+        if rng.random() < 0.3:
+            popularity[product_id] = int(rng.paretovariate(1.2) * 10)
+    return index
+
+
+def main():
+    rng = random.Random(7)
+    index = build_index(AUTOCOMPLETE_MAX_PRODUCTS, rng)
+    rank_started = time.perf_counter()
+    for prefix in PREFIXES:
+        index.rank_prefix(prefix)
+    rank_elapsed = time.perf_counter() - rank_started
+
+    stats = index.stats()
+    print(f"{stats['products']:,} products, {stats['keys']:,} index keys, "
+          f"limit {LIMIT}, best of {ROUNDS} rounds x {CALLS} queries")
+    for prefix in PREFIXES:
+        best = min(timeit.repeat(lambda: index.search(prefix, LIMIT), number=CALLS, repeat=ROUNDS))
+        top = ', '.join(result['description'] for result in index.search(prefix, 2))
+        print(f"  {prefix!r:<12} {best / CALLS * 1e6:>8.1f} us/query   {top}")
+    print(f"  background ranking of all {len(PREFIXES)} prefixes: {rank_elapsed * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
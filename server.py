@@ -29,7 +29,7 @@ CLIENT_ID = os.getenv('KROGER_CLIENT_ID')
 CLIENT_SECRET = os.getenv('KROGER_CLIENT_SECRET')
 
 accessTokenKroger = None
-LOCATION_ID = '01400943'
+LOCATION_ID = os.getenv('KROGER_LOCATION_ID', '01400943')
 
 
 